@@ -1,44 +1,117 @@
-from search_engines import Google, Bing, Yahoo, Duckduckgo, Startpage, Aol, Dogpile, Ask, Mojeek, Brave, Torch
-
-def search_multiple_engines_limited_results(query, num_results):
-    """
-    Effettua una query su più motori di ricerca e restituisce i primi 'num_results' risultati per ciascuno.
-
-    Args:
-        query (str): La query di ricerca da eseguire.
-        num_results (int): Il numero massimo di risultati da restituire per motore di ricerca.
-
-    Returns:
-        dict: Un dizionario dove le chiavi sono i nomi dei motori di ricerca e i valori sono liste
-              dei primi 'num_results' link trovati.
-              Restituisce None se si verifica un errore durante la ricerca.
-    """
-    engines = {
-        "Google": Google(),
-        "Bing": Bing(),
-        "Yahoo": Yahoo(),
-        "DuckDuckGo": Duckduckgo(),
-        "Startpage": Startpage(),
-        "AOL": Aol(),
-        "Dogpile": Dogpile(),
-        "Ask": Ask(),
-        "Mojeek": Mojeek(),
-        "Brave": Brave(),
-        "Torch": Torch(),
-    }
-
-    all_results = {}
-
-    for engine_name, engine_instance in engines.items():
-        print(f"Esecuzione query su {engine_name}...")
-        try:
-            results = engine_instance.search(query)
-            links = results.links()[:num_results]  # Prendi solo i primi 'num_results' link
-            all_results[engine_name] = links
-            print(f"Risultati da {engine_name}: {len(links)} link trovati.")
-        except Exception as e:
-            print(f"Errore durante la ricerca con {engine_name}: {e}")
-            all_results[engine_name] = [] # In caso di errore, salva una lista vuota per questo motore
-
-    return all_results
-
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from search_engines import Google, Bing, Yahoo, Duckduckgo, Startpage, Aol, Dogpile, Ask, Mojeek, Brave, Torch
+
+ENGINES = {
+    "Google": Google,
+    "Bing": Bing,
+    "Yahoo": Yahoo,
+    "DuckDuckGo": Duckduckgo,
+    "Startpage": Startpage,
+    "AOL": Aol,
+    "Dogpile": Dogpile,
+    "Ask": Ask,
+    "Mojeek": Mojeek,
+    "Brave": Brave,
+    "Torch": Torch,
+}
+
+# Tempo massimo (secondi) concesso a ogni motore e all'intera ricerca: oltre, i motori
+# che non hanno ancora risposto vengono abbandonati con una lista vuota
+ENGINE_TIMEOUT = 15
+DEADLINE = 30
+
+def search_engine(engine_instance, query, num_results):
+    """Esegue la query su un singolo motore e restituisce i primi 'num_results' link."""
+    results = engine_instance.search(query)
+    return results.links()[:num_results]  # Prendi solo i primi 'num_results' link
+
+def _search_engine_name(engine_name, query, num_results, timeout, cache):
+    engine_instance = ENGINES[engine_name](timeout=timeout)  # Timeout delle singole richieste HTTP del motore
+    if cache is not None:
+        return cache.get_or_fetch('main', engine_name, query, {'num': num_results},
+                                  lambda: search_engine(engine_instance, query, num_results))
+    return search_engine(engine_instance, query, num_results)
+
+def iter_search_results(query, num_results, engines=None, timeout=ENGINE_TIMEOUT, deadline=DEADLINE, cache=None):
+    """
+    Interroga i motori in parallelo e restituisce i risultati man mano che arrivano, così
+    salvataggio e scraping possono iniziare prima che risponda il motore più lento.
+
+    Args:
+        query (str): La query di ricerca da eseguire.
+        num_results (int): Il numero massimo di risultati per motore di ricerca.
+        engines (list, optional): Nomi dei motori (chiavi di ENGINES); tutti se None.
+        timeout (float): Tempo massimo per ogni motore, dall'avvio della ricerca.
+        deadline (float): Tempo massimo per l'intera ricerca.
+        cache (searchcache.SearchCache, optional): Cache dei risultati.
+
+    Yields:
+        tuple: (nome del motore, lista di link), nell'ordine di completamento. Un motore in
+               errore, oltre il suo timeout o oltre la scadenza restituisce una lista vuota.
+    """
+    engines = [name for name in (engines or ENGINES) if name in ENGINES]
+    if not engines:
+        return
+    start = time.monotonic()
+    engine_expiry = start + timeout
+    search_expiry = start + deadline
+    # Un thread per motore: partono tutti subito, quindi il timeout di ognuno decorre dall'avvio
+    executor = ThreadPoolExecutor(max_workers=len(engines), thread_name_prefix='search-engine')
+    try:
+        pending = {}
+        for engine_name in engines:
+            print(f"Esecuzione query su {engine_name}...")
+            future = executor.submit(_search_engine_name, engine_name, query, num_results, timeout, cache)
+            pending[future] = engine_name
+
+        while pending:
+            remaining = min(engine_expiry, search_expiry) - time.monotonic()
+            done, _ = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+            if not done:
+                reason = "timeout" if engine_expiry <= search_expiry else "scadenza della ricerca"
+                for engine_name in pending.values():
+                    print(f"Nessuna risposta da {engine_name} entro il limite ({reason}).")
+                    yield engine_name, []
+                return
+            for future in done:
+                engine_name = pending.pop(future)
+                try:
+                    links = future.result()
+                    print(f"Risultati da {engine_name}: {len(links)} link trovati.")
+                except Exception as e:
+                    print(f"Errore durante la ricerca con {engine_name}: {e}")
+                    links = [] # In caso di errore, restituisce una lista vuota per questo motore
+                yield engine_name, links
+    finally:
+        # I motori ancora in corso vengono abbandonati: non si attende la loro risposta
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def search_multiple_engines_limited_results(query, num_results, cache=None, engines=None, timeout=ENGINE_TIMEOUT,
+                                            deadline=DEADLINE, on_result=None):
+    """
+    Effettua una query su più motori di ricerca e restituisce i primi 'num_results' risultati per ciascuno.
+
+    I motori sono interrogati in parallelo (vedi iter_search_results): la durata è quella
+    del motore più lento, limitata da 'timeout' e 'deadline'.
+
+    Args:
+        query (str): La query di ricerca da eseguire.
+        num_results (int): Il numero massimo di risultati da restituire per motore di ricerca.
+        cache (searchcache.SearchCache, optional): Cache dei risultati; i motori già interrogati
+                                                   con la stessa query non vengono contattati.
+        engines (list, optional): Nomi dei motori da interrogare; tutti se None.
+        timeout (float): Tempo massimo per ogni motore.
+        deadline (float): Tempo massimo per l'intera ricerca.
+        on_result (callable, optional): Chiamata con (nome del motore, link) appena un motore risponde.
+
+    Returns:
+        dict: Un dizionario dove le chiavi sono i nomi dei motori di ricerca e i valori sono liste
+              dei primi 'num_results' link trovati (vuote per i motori in errore o senza risposta).
+    """
+    all_results = {}
+    for engine_name, links in iter_search_results(query, num_results, engines, timeout, deadline, cache):
+        all_results[engine_name] = links
+        if on_result is not None:
+            on_result(engine_name, links)
+    return all_results
@@ -0,0 +1,205 @@
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+CACHE_FILE = 'search_cache.db'
+
+# Per quanto tempo un risultato è fresco, e per quanto ancora (scaduto) può essere
+# restituito subito mentre viene aggiornato in background
+DEFAULT_TTL = 24 * 3600
+DEFAULT_STALE_TTL = 7 * 24 * 3600
+
+def normalize_query(query):
+    """Query in minuscolo con gli spazi compattati: 'Python  Scraping ' e 'python scraping' coincidono."""
+    return ' '.join(query.lower().split())
+
+def normalize_links(links):
+    """Lista di risultati ripulita: solo URL http(s), senza spazi e senza duplicati, nell'ordine originale."""
+    normalized = {}
+    for link in links or []:
+        if isinstance(link, str):
+            link = link.strip()
+            if link.startswith(('http://', 'https://')):
+                normalized[link] = None
+    return list(normalized)
+
+class SearchCache:
+    """
+    Cache persistente (SQLite) dei risultati dei motori di ricerca, indicizzata per
+    (sorgente, motore, query, parametri), davanti a serpapi_code.LinkExtractor,
+    unifiedscraper.gather_links e main.search_multiple_engines_limited_results.
+
+    Ogni voce è fresca per il TTL del suo motore (ttls, altrimenti default_ttl). Una voce
+    scaduta da meno di stale_ttl secondi viene restituita subito e aggiornata in un thread
+    in background (stale-while-revalidate); oltre, la ricerca viene rifatta e attesa.
+    Le liste vuote (errori, nessun risultato) non vengono salvate.
+
+    I contatori di hit, hit scaduti e miss sono disponibili con stats(), per la sessione
+    corrente e in totale per sorgente e motore.
+    """
+    def __init__(self, db_file=CACHE_FILE, ttls=None, default_ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL):
+        self.ttls = {engine.lower(): ttl for engine, ttl in (ttls or {}).items()}  # Es. {'google': 6 * 3600}
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS search_cache (
+            cache_key TEXT PRIMARY KEY,
+            source TEXT,
+            engine TEXT,
+            query TEXT,
+            params TEXT,
+            links TEXT,
+            fetched REAL,
+            hits INTEGER DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS search_cache_stats (
+            source TEXT,
+            engine TEXT,
+            hits INTEGER DEFAULT 0,
+            stale_hits INTEGER DEFAULT 0,
+            misses INTEGER DEFAULT 0,
+            PRIMARY KEY (source, engine)
+        );
+        """)
+        self.conn.commit()
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0}  # Contatori della sessione
+        self._refreshing = {}  # cache_key -> thread di aggiornamento in corso
+
+    @staticmethod
+    def _key(source, engine, query, params):
+        record = json.dumps([source, engine.lower(), normalize_query(query), params or {}], sort_keys=True)
+        return hashlib.sha256(record.encode('utf-8')).hexdigest()
+
+    def _count(self, source, engine, counter):
+        """Aggiorna il contatore della sessione e quello persistente (da chiamare con il lock)."""
+        self.counters[counter] += 1
+        self.conn.execute(f"""
+            INSERT INTO search_cache_stats (source, engine, {counter}) VALUES (?, ?, 1)
+            ON CONFLICT(source, engine) DO UPDATE SET {counter} = {counter} + 1
+        """, (source, engine.lower()))
+        self.conn.commit()
+
+    def lookup(self, source, engine, query, params=None):
+        """
+        Cerca i risultati in cache e aggiorna i contatori.
+
+        Returns:
+            tuple: (links, fresh) se la voce è utilizzabile (fresh False se scaduta ma entro
+                   stale_ttl), altrimenti None.
+        """
+        cache_key = self._key(source, engine, query, params)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT links, fetched FROM search_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            age = time.time() - row[1] if row else None
+            ttl = self.ttls.get(engine.lower(), self.default_ttl)
+            if row is None or age > ttl + self.stale_ttl:
+                self._count(source, engine, 'misses')
+                return None
+            fresh = age <= ttl
+            self._count(source, engine, 'hits' if fresh else 'stale_hits')
+            self.conn.execute("UPDATE search_cache SET hits = hits + 1 WHERE cache_key = ?", (cache_key,))
+            self.conn.commit()
+        return json.loads(row[0]), fresh
+
+    def store(self, source, engine, query, params, links):
+        """
+        Salva la lista di risultati normalizzata e la restituisce (le liste vuote non vengono salvate).
+        """
+        links = normalize_links(links)
+        if not links:
+            return links
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO search_cache (cache_key, source, engine, query, params, links, fetched)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET links = excluded.links, fetched = excluded.fetched
+            """, (self._key(source, engine, query, params), source, engine.lower(), normalize_query(query),
+                  json.dumps(params or {}, sort_keys=True), json.dumps(links), time.time()))
+            self.conn.commit()
+        return links
+
+    def refresh_in_background(self, source, engine, query, params, fetch):
+        """Ripete la ricerca in un thread e aggiorna la voce; una sola ricerca per voce alla volta."""
+        cache_key = self._key(source, engine, query, params)
+
+        def refresh():
+            try:
+                self.store(source, engine, query, params, fetch())
+            except Exception as e:
+                print(f"Errore durante l'aggiornamento in background di {engine} per '{query}': {e}")
+            finally:
+                with self.lock:
+                    self._refreshing.pop(cache_key, None)
+
+        with self.lock:
+            if cache_key in self._refreshing:
+                return
+            thread = threading.Thread(target=refresh, name=f'search-cache-{engine}', daemon=True)
+            self._refreshing[cache_key] = thread
+        thread.start()
+
+    def get_or_fetch(self, source, engine, query, params, fetch):
+        """
+        Restituisce i risultati dalla cache o, se mancano, chiama fetch() e li salva.
+
+        Args:
+            fetch (callable): Esegue la ricerca e restituisce la lista di link.
+        """
+        cached = self.lookup(source, engine, query, params)
+        if cached is not None:
+            links, fresh = cached
+            if not fresh:
+                self.refresh_in_background(source, engine, query, params, fetch)
+            return links
+        return self.store(source, engine, query, params, fetch())
+
+    async def get_or_fetch_async(self, source, engine, query, params, fetch, refresh):
+        """
+        Versione asincrona di get_or_fetch.
+
+        Args:
+            fetch (callable): Restituisce la coroutine che esegue la ricerca.
+            refresh (callable): Versione sincrona della ricerca, eseguita nel thread di
+                                aggiornamento (con una propria sessione e un proprio event loop).
+        """
+        cached = self.lookup(source, engine, query, params)
+        if cached is not None:
+            links, fresh = cached
+            if not fresh:
+                self.refresh_in_background(source, engine, query, params, refresh)
+            return links
+        return self.store(source, engine, query, params, await fetch())
+
+    def stats(self):
+        """
+        Restituisce i contatori della sessione ('session') e quelli totali per sorgente e motore
+        ('totals': {(sorgente, motore): {'hits', 'stale_hits', 'misses'}}).
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT source, engine, hits, stale_hits, misses FROM search_cache_stats"
+            ).fetchall()
+        totals = {(source, engine): {'hits': hits, 'stale_hits': stale_hits, 'misses': misses}
+                  for source, engine, hits, stale_hits, misses in rows}
+        return {'session': dict(self.counters), 'totals': totals}
+
+    def close(self, wait=True):
+        """Chiude la cache; con wait=True attende prima gli aggiornamenti in background in corso."""
+        if wait:
+            while True:
+                with self.lock:
+                    threads = list(self._refreshing.values())
+                if not threads:
+                    break
+                for thread in threads:
+                    thread.join()
+        with self.lock:
+            self.conn.close()
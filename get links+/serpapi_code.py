@@ -1,172 +1,294 @@
-from serpapi import GoogleSearch
-from typing import List, Dict, Set, Optional
-import asyncio
-from dataclasses import dataclass
-from enum import Enum
-import logging
-from urllib.parse import urlparse, urljoin
-import json
-from concurrent.futures import ThreadPoolExecutor
-from functools import partial
-import sys
-import io
-
-# Forza la codifica UTF-8 per stdout
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-
-# --- Il resto del codice di serpapi_code.py rimane invariato ---
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-class SearchEngine(Enum):
-    GOOGLE = "google"
-    BING = "bing"
-    BAIDU = "baidu"
-    YANDEX = "yandex"
-    YAHOO = "yahoo"
-    DUCKDUCKGO = "duckduckgo"
-    NAVER = "naver"
-    YELP = "yelp"
-
-@dataclass
-class SearchConfig:
-    query: str
-    num_links: int
-    engines: List[SearchEngine]
-    async_mode: bool = True
-    api_key: str = ""
-
-class LinkExtractor:
-    def __init__(self, config: SearchConfig):
-        self.config = config
-        self.results: Dict[str, List[str]] = {}
-
-    async def extract_links(self) -> Dict[str, List[str]]:
-        """Main method to extract links based on configuration"""
-        if self.config.async_mode:
-            return await self._extract_links_async()
-        return await self._extract_links_sync()
-
-    async def _extract_links_async(self) -> Dict[str, List[str]]:
-        """Extract links from all configured search engines asynchronously"""
-        tasks = []
-        for engine in self.config.engines:
-            tasks.append(self._process_engine(engine))
-
-        results = await asyncio.gather(*tasks)
-
-        # Merge results from all engines
-        all_results = {}
-        for engine_results in results:
-            all_results.update(engine_results)
-
-        return all_results
-
-    async def _extract_links_sync(self) -> Dict[str, List[str]]:
-        """Extract links from all configured search engines synchronously"""
-        all_results = {}
-
-        for engine in self.config.engines:
-            engine_results = await self._process_engine(engine)
-            all_results.update(engine_results)
-
-        return all_results
-
-    async def _process_engine(self, engine: SearchEngine) -> Dict[str, List[str]]:
-        """Process a single search engine with retries"""
-        max_retries = 3
-        retry_count = 0
-
-        while retry_count < max_retries:
-            try:
-                results = await self._search_engine(engine)
-                return {engine.value: results}
-            except Exception as e:
-                logger.error(f"Error processing {engine.value}: {str(e)}")
-                retry_count += 1
-                if retry_count == max_retries:
-                    logger.error(f"Max retries reached for {engine.value}")
-                    return {engine.value: []}
-                await asyncio.sleep(1)  # Wait before retry
-
-    async def _search_engine(self, engine: SearchEngine) -> List[str]:
-        """Perform search using specific engine"""
-        params = self._get_engine_params(engine)
-
-        try:
-            search = GoogleSearch(params)
-            results = search.get_dict()
-
-            if "organic_results" in results:
-                links = [result.get("link") for result in results["organic_results"]
-                        if result.get("link")]
-                return links[:self.config.num_links]  # Limit after fetching
-            else:
-                logger.warning(f"No organic results found for {engine.value}")
-                return []
-
-        except Exception as e:
-            logger.error(f"Error searching {engine.value}: {str(e)}")
-            raise
-
-    def _get_engine_params(self, engine: SearchEngine) -> Dict:
-        """Get parameters for specific search engine"""
-        base_params = {
-            "api_key": self.config.api_key
-        }
-
-        engine_specific_params = {
-            SearchEngine.GOOGLE: {
-                "engine": "google",
-                "q": self.config.query,
-                "num": self.config.num_links  # Specify number of results
-            },
-            SearchEngine.BING: {
-                "engine": "bing",
-                "q": self.config.query,
-                "cc": "US",
-                "count": self.config.num_links # Specify number of results
-            },
-            SearchEngine.BAIDU: {
-                "engine": "baidu",
-                "q": self.config.query,
-                "rn": self.config.num_links # Specify number of results
-            },
-            SearchEngine.YANDEX: {
-                "engine": "yandex",
-                "text": self.config.query,
-                "p": 0, # Start page
-                "n": self.config.num_links # Specify number of results per page (adjust 'p' for more)
-            },
-            SearchEngine.YAHOO: {
-                "engine": "yahoo",
-                "p": self.config.query,
-                "b": 1, # Start result
-                "count": self.config.num_links # Specify number of results
-            },
-            SearchEngine.DUCKDUCKGO: {
-                "engine": "duckduckgo",
-                "q": self.config.query,
-                "kl": "us-en",
-                "t": "h_", # Type of search (web)
-                "df": "y", # Do not filter
-                "vnr": "1" # Show all results (may not be exact num_links)
-            },
-            SearchEngine.NAVER: {
-                "engine": "naver",
-                "query": self.config.query,
-                "display": self.config.num_links # Specify number of results
-            },
-            SearchEngine.YELP: {
-                "engine": "yelp",
-                "find_desc": self.config.query,
-                "find_loc": "United States",
-                "attrs": "RestaurantsTakeOut", # Example attribute (can be removed)
-                "sortby": "relevance",
-                "size": self.config.num_links # Specify number of results (may have limits)
-            }
-        }
-
-        return {**base_params, **engine_specific_params[engine]}
-
+from typing import List, Dict, Set, Optional
+import asyncio
+import random
+import aiohttp
+from dataclasses import dataclass, replace
+from enum import Enum
+import logging
+from urllib.parse import urlparse, urljoin
+import json
+import sys
+import io
+
+# Forza la codifica UTF-8 per stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# --- Il resto del codice di serpapi_code.py rimane invariato ---
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class SearchEngine(Enum):
+    GOOGLE = "google"
+    BING = "bing"
+    BAIDU = "baidu"
+    YANDEX = "yandex"
+    YAHOO = "yahoo"
+    DUCKDUCKGO = "duckduckgo"
+    NAVER = "naver"
+    YELP = "yelp"
+
+SERPAPI_ENDPOINT = "https://serpapi.com/search.json"
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+@dataclass
+class SearchConfig:
+    query: str
+    num_links: int
+    engines: List[SearchEngine]
+    async_mode: bool = True
+    api_key: str = ""
+    endpoint: str = SERPAPI_ENDPOINT  # Any SerpAPI-compatible endpoint (e.g. a local mock server)
+    max_concurrency: int = 8  # Requests in flight at the same time, across all engines
+    max_retries: int = 3  # Attempts per request before giving up
+    backoff_base: float = 0.5  # Seconds before the first retry, doubled at every attempt
+    backoff_max: float = 8.0
+    max_pages: int = 5  # Result pages fetched per engine to reach num_links
+    timeout: float = 30.0  # Seconds per request
+
+class SerpApiError(Exception):
+    """Non-retryable error returned by the search API (bad key, invalid parameters, ...)."""
+
+class SerpApiClient:
+    """
+    Non-blocking SerpAPI-compatible client on a single shared aiohttp session.
+
+    A semaphore bounds the requests in flight across all engines. Rate limiting
+    (429), server errors and network failures are retried with exponential backoff
+    and jitter, honouring Retry-After when the server sends it.
+
+    Usage:
+        async with SerpApiClient(config) as client:
+            results = await client.search({"engine": "google", "q": "python"})
+    """
+    def __init__(self, config: SearchConfig):
+        self.config = config
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.semaphore = asyncio.Semaphore(config.max_concurrency)
+
+    async def __aenter__(self) -> "SerpApiClient":
+        timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+        connector = aiohttp.TCPConnector(limit=self.config.max_concurrency)
+        self.session = aiohttp.ClientSession(timeout=timeout, connector=connector)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.session.close()
+        self.session = None
+
+    def _same_origin(self, url: str) -> bool:
+        """True if the URL has the scheme and host of the configured endpoint."""
+        target, endpoint = urlparse(url), urlparse(self.config.endpoint)
+        return (target.scheme, target.netloc) == (endpoint.scheme, endpoint.netloc)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Delay before the next attempt: Retry-After if given, else exponential with full jitter."""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.config.backoff_max)
+        return random.uniform(0, min(self.config.backoff_base * 2 ** attempt, self.config.backoff_max))
+
+    async def search(self, params: Dict, url: Optional[str] = None) -> Dict:
+        """
+        Run one search request and return the decoded JSON.
+
+        Args:
+            params: Query parameters (the api_key is added here).
+            url: Full URL to fetch instead of the endpoint, e.g. a pagination "next" link.
+        """
+        if url and not self._same_origin(url):
+            # Never send the api_key anywhere but the configured endpoint
+            raise SerpApiError(f"Refusing to follow a link outside {urlparse(self.config.endpoint).netloc}")
+        params = {**params, "api_key": self.config.api_key}
+        for attempt in range(self.config.max_retries):
+            last_attempt = attempt == self.config.max_retries - 1
+            retry_after = None
+            try:
+                async with self.semaphore:
+                    async with self.session.get(url or self.config.endpoint, params=params) as response:
+                        if response.status in RETRY_STATUSES:
+                            retry_after = response.headers.get("Retry-After")
+                            raise aiohttp.ClientResponseError(
+                                response.request_info, response.history,
+                                status=response.status, message=response.reason or "",
+                            )
+                        try:
+                            data = await response.json(content_type=None)
+                        except ValueError:
+                            raise SerpApiError(f"Invalid JSON response (HTTP {response.status})") from None
+                if response.status >= 400:
+                    raise SerpApiError(data.get("error") or f"HTTP {response.status}")
+                return data
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Messages without the request URL, which contains the api_key
+                reason = f"HTTP {e.status}" if isinstance(e, aiohttp.ClientResponseError) else type(e).__name__
+                if last_attempt:
+                    raise SerpApiError(f"{reason} after {self.config.max_retries} attempts") from None
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(f"Search request failed ({reason}), retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+class LinkExtractor:
+    def __init__(self, config: SearchConfig, cache=None):
+        self.config = config
+        self.cache = cache  # Optional searchcache.SearchCache shared with the other search scripts
+        self.results: Dict[str, List[str]] = {}
+        self.client: Optional[SerpApiClient] = None
+
+    async def extract_links(self) -> Dict[str, List[str]]:
+        """Main method to extract links based on configuration"""
+        async with SerpApiClient(self.config) as client:
+            self.client = client
+            try:
+                if self.config.async_mode:
+                    return await self._extract_links_async()
+                return await self._extract_links_sync()
+            finally:
+                self.client = None
+
+    async def _extract_links_async(self) -> Dict[str, List[str]]:
+        """Extract links from all configured search engines concurrently (as long as the slowest engine)"""
+        results = await asyncio.gather(*(self._process_engine(engine) for engine in self.config.engines))
+
+        # Merge results from all engines
+        all_results = {}
+        for engine_results in results:
+            all_results.update(engine_results)
+
+        return all_results
+
+    async def _extract_links_sync(self) -> Dict[str, List[str]]:
+        """Extract links from all configured search engines one after another"""
+        all_results = {}
+
+        for engine in self.config.engines:
+            engine_results = await self._process_engine(engine)
+            all_results.update(engine_results)
+
+        return all_results
+
+    async def _process_engine(self, engine: SearchEngine) -> Dict[str, List[str]]:
+        """Process a single search engine; retries with backoff happen inside SerpApiClient"""
+        try:
+            if self.cache is not None:
+                results = await self.cache.get_or_fetch_async(
+                    "serpapi", engine.value, self.config.query, {"num": self.config.num_links},
+                    lambda: self._search_engine(engine),
+                    refresh=lambda: self._refresh_engine(engine),
+                )
+            else:
+                results = await self._search_engine(engine)
+        except (SerpApiError, ValueError) as e:
+            logger.error(f"Error processing {engine.value}: {str(e)}")
+            results = []
+        self.results[engine.value] = results
+        return {engine.value: results}
+
+    async def _search_engine(self, engine: SearchEngine) -> List[str]:
+        """
+        Perform search using specific engine, following the pagination links
+        until num_links results or max_pages pages have been collected.
+        """
+        params = self._get_engine_params(engine)
+        links: List[str] = []
+        seen: Set[str] = set()
+        next_url = None
+
+        for page in range(self.config.max_pages):
+            try:
+                results = await self.client.search({} if next_url else params, next_url)
+            except SerpApiError as e:
+                if page == 0:
+                    raise
+                # A failing page does not discard the results already collected
+                logger.warning(f"Pagination stopped for {engine.value} at page {page + 1}: {e}")
+                break
+            new_links = [result.get("link") for result in results.get("organic_results", [])
+                         if result.get("link") and result.get("link") not in seen]
+            if not new_links:
+                if page == 0:
+                    logger.warning(f"No organic results found for {engine.value}")
+                break
+            seen.update(new_links)
+            links.extend(new_links)
+            if len(links) >= self.config.num_links:
+                break
+            # Only serpapi_pagination points to the API: "pagination" holds the engine's own URLs
+            next_url = (results.get("serpapi_pagination") or {}).get("next")
+            if not next_url:
+                break
+
+        return links[:self.config.num_links]  # Limit after fetching
+
+    def _refresh_engine(self, engine: SearchEngine) -> List[str]:
+        """
+        Search a single engine with its own client and event loop, for the cache
+        background refresh (the caller's session may already be closed by then)
+        """
+        extractor = LinkExtractor(replace(self.config, engines=[engine]))
+        results = asyncio.run(extractor.extract_links())
+        if not results.get(engine.value):
+            raise SerpApiError(f"No results from {engine.value} during the cache refresh")
+        return results[engine.value]
+
+    def _get_engine_params(self, engine: SearchEngine) -> Dict:
+        """Get parameters for specific search engine"""
+        base_params = {
+            "api_key": self.config.api_key
+        }
+
+        engine_specific_params = {
+            SearchEngine.GOOGLE: {
+                "engine": "google",
+                "q": self.config.query,
+                "num": self.config.num_links  # Specify number of results
+            },
+            SearchEngine.BING: {
+                "engine": "bing",
+                "q": self.config.query,
+                "cc": "US",
+                "count": self.config.num_links # Specify number of results
+            },
+            SearchEngine.BAIDU: {
+                "engine": "baidu",
+                "q": self.config.query,
+                "rn": self.config.num_links # Specify number of results
+            },
+            SearchEngine.YANDEX: {
+                "engine": "yandex",
+                "text": self.config.query,
+                "p": 0, # Start page
+                "n": self.config.num_links # Specify number of results per page (adjust 'p' for more)
+            },
+            SearchEngine.YAHOO: {
+                "engine": "yahoo",
+                "p": self.config.query,
+                "b": 1, # Start result
+                "count": self.config.num_links # Specify number of results
+            },
+            SearchEngine.DUCKDUCKGO: {
+                "engine": "duckduckgo",
+                "q": self.config.query,
+                "kl": "us-en",
+                "t": "h_", # Type of search (web)
+                "df": "y", # Do not filter
+                "vnr": "1" # Show all results (may not be exact num_links)
+            },
+            SearchEngine.NAVER: {
+                "engine": "naver",
+                "query": self.config.query,
+                "display": self.config.num_links # Specify number of results
+            },
+            SearchEngine.YELP: {
+                "engine": "yelp",
+                "find_desc": self.config.query,
+                "find_loc": "United States",
+                "attrs": "RestaurantsTakeOut", # Example attribute (can be removed)
+                "sortby": "relevance",
+                "size": self.config.num_links # Specify number of results (may have limits)
+            }
+        }
+
+        return {**base_params, **engine_specific_params[engine]}
+
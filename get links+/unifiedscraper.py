@@ -1,122 +1,223 @@
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-import logging
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-class ScraperConfig:
-    def __init__(self, query, search_engine, num_pages):
-        self.query = query
-        self.search_engine = search_engine.lower()
-        self.num_pages = num_pages
-
-def get_search_results(query, search_engine, num_results):
-    options = Options()
-    options.headless = True
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-
-    driver = webdriver.Chrome(options=options)
-
-    search_urls = {
-        'google': 'https://www.google.com/search?q={query}&num={num}',
-        'bing': 'https://www.bing.com/search?q={query}&count={num}',
-        'baidu': 'https://www.baidu.com/s?wd={query}',
-        'duckduckgo': 'https://duckduckgo.com/?q={query}',
-        'yahoo': 'https://search.yahoo.com/search?p={query}&n={num}',
-        'yandex': 'https://yandex.com/search/?text={query}',
-        'ask': 'https://www.ask.com/web?q={query}'
-    }
-
-    if search_engine not in search_urls:
-        logger.error(f"Search engine {search_engine} not supported.")
-        driver.quit()
-        return []
-
-    url = search_urls[search_engine].format(query=query, num=num_results)
-    driver.get(url)
-    time.sleep(10)  # Reduced wait time
-
-    links = []
-    try:
-        if search_engine == 'google':
-            results = driver.find_elements(By.CSS_SELECTOR, 'div.g')
-            for result in results[:num_results]:
-                link_element = result.find_element(By.TAG_NAME, 'a')
-                if link_element:
-                    link = link_element.get_attribute('href')
-                    if link:
-                        links.append(link)
-        elif search_engine == 'bing':
-            results = driver.find_elements(By.CSS_SELECTOR, 'li.b_algo')
-            for result in results[:num_results]:
-                link_element = result.find_element(By.TAG_NAME, 'a')
-                if link_element:
-                    link = link_element.get_attribute('href')
-                    if link:
-                        links.append(link)
-        elif search_engine == 'baidu':
-            results = driver.find_elements(By.CSS_SELECTOR, 'h3.t > a')
-            for result in results[:num_results]:
-                link = result.get_attribute('href')
-                if link:
-                    links.append(link)
-        elif search_engine == 'duckduckgo':
-            results = driver.find_elements(By.CSS_SELECTOR, 'a.result__a')
-            for result in results[:num_results]:
-                link = result.get_attribute('href')
-                if link:
-                    links.append(link)
-        elif search_engine == 'yahoo':
-            results = driver.find_elements(By.CSS_SELECTOR, 'div.dd.algo')
-            for result in results[:num_results]:
-                link_element = result.find_element(By.TAG_NAME, 'a')
-                if link_element:
-                    link = link_element.get_attribute('href')
-                    if link:
-                        links.append(link)
-        elif search_engine == 'yandex':
-            results = driver.find_elements(By.CSS_SELECTOR, 'a.Link.Link_theme_normal.organic__url.link_cropped_no.i-bem')
-            for result in results[:num_results]:
-                link = result.get_attribute('href')
-                if link:
-                    links.append(link)
-        elif search_engine == 'ask':
-            results = driver.find_elements(By.CSS_SELECTOR, 'div.PartialSearchResults-item')
-            for result in results[:num_results]:
-                link_element = result.find_element(By.CSS_SELECTOR, 'a.PartialSearchResults-item-title-link.result-link')
-                if link_element:
-                    link = link_element.get_attribute('href')
-                    if link:
-                        links.append(link)
-        else:
-            logger.error(f"Search engine {search_engine} not supported.")
-    except Exception as e:
-        logger.error(f"Error extracting search results: {e}")
-
-    driver.quit()
-    return links
-
-def gather_links(query, search_engine, num_links):
-    """
-    Gathers search result links for a given query from a specified search engine.
-
-    Args:
-        query (str): The search query.
-        search_engine (str): The search engine to use (e.g., 'google', 'bing', etc.).
-        num_links (int): The number of links to retrieve.
-
-    Returns:
-        list: A list of URLs from the search results, or an empty list if no links are found or an error occurs.
-    """
-    config = ScraperConfig(query, search_engine, num_links)
-    initial_links = get_search_results(config.query, config.search_engine, config.num_pages)
-
-    if not initial_links:
-        logger.warning("No initial links found for the query.")
-    return initial_links
-
+import atexit
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Browser pool defaults: warm instances kept open, and queries served by each before it is replaced
+POOL_SIZE = 4
+MAX_USES = 20
+# Maximum wait for a free browser when all of them are busy
+ACQUIRE_TIMEOUT = 60
+# Maximum wait for the result selector; the page is read as soon as the results appear
+RESULTS_TIMEOUT = 10
+
+# Per engine: search URL, CSS selector of a result, and of the link inside it (None if the result is the link)
+SEARCH_ENGINES = {
+    'google': ('https://www.google.com/search?q={query}&num={num}', 'div.g', 'a'),
+    'bing': ('https://www.bing.com/search?q={query}&count={num}', 'li.b_algo', 'a'),
+    'baidu': ('https://www.baidu.com/s?wd={query}', 'h3.t > a', None),
+    'duckduckgo': ('https://duckduckgo.com/?q={query}', 'a.result__a', None),
+    'yahoo': ('https://search.yahoo.com/search?p={query}&n={num}', 'div.dd.algo', 'a'),
+    'yandex': ('https://yandex.com/search/?text={query}', 'a.Link.Link_theme_normal.organic__url.link_cropped_no.i-bem', None),
+    'ask': ('https://www.ask.com/web?q={query}', 'div.PartialSearchResults-item', 'a.PartialSearchResults-item-title-link.result-link'),
+}
+
+class ScraperConfig:
+    def __init__(self, query, search_engine, num_pages):
+        self.query = query
+        self.search_engine = search_engine.lower()
+        self.num_pages = num_pages
+
+def create_driver():
+    """Start a headless Chrome that returns from get() at DOMContentLoaded and skips images"""
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    options.page_load_strategy = 'eager'
+    return webdriver.Chrome(options=options)
+
+class BrowserPool:
+    """
+    Pool of warm headless Chrome instances shared by concurrent engine queries.
+
+    Up to `size` browsers are started on demand and handed out one query at a time;
+    a browser is quit and replaced after `max_uses` queries, or as soon as it fails,
+    so memory leaks and broken sessions do not accumulate.
+
+    A semaphore of `size` slots bounds the browsers in use: a caller waits (at most
+    `acquire_timeout` seconds) for a free slot, then takes an idle browser or starts
+    a new one, so retiring a browser always frees a slot for the next waiter.
+    """
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES, acquire_timeout=ACQUIRE_TIMEOUT):
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = queue.LifoQueue()  # (driver, uses); the most recently used browser is the warmest
+        self.closed = False
+
+    def acquire(self):
+        """
+        Return an idle browser, or a new one if none is idle.
+
+        Raises:
+            TimeoutError: If no slot is freed within `acquire_timeout` seconds.
+        """
+        if self.closed:
+            raise RuntimeError("BrowserPool is closed")
+        if not self.slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"No browser available within {self.acquire_timeout} seconds")
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return create_driver(), 0
+        except Exception:
+            self.slots.release()
+            raise
+
+    def release(self, driver, uses, broken=False):
+        """Give the browser back after a query; recycle it if it is worn out or broken"""
+        uses += 1
+        if broken or uses >= self.max_uses or self.closed:
+            self._quit(driver)
+        else:
+            self.idle.put((driver, uses))
+        self.slots.release()
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            logger.warning(f"Error closing browser: {e}")
+
+    def close(self):
+        """Quit all idle browsers; those in use are quit when released"""
+        self.closed = True
+        while True:
+            try:
+                driver, _ = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(driver)
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def get_default_pool():
+    """Shared pool used when no pool is passed; its browsers are quit at interpreter exit"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = BrowserPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
+
+def _extract_links(driver, result_selector, link_selector, num_results):
+    links = []
+    for result in driver.find_elements(By.CSS_SELECTOR, result_selector)[:num_results]:
+        try:
+            link_element = result.find_element(By.CSS_SELECTOR, link_selector) if link_selector else result
+        except WebDriverException:
+            continue
+        link = link_element.get_attribute('href')
+        if link:
+            links.append(link)
+    return links
+
+def get_search_results(query, search_engine, num_results, pool=None, timeout=RESULTS_TIMEOUT):
+    if search_engine not in SEARCH_ENGINES:
+        logger.error(f"Search engine {search_engine} not supported.")
+        return []
+
+    url_template, result_selector, link_selector = SEARCH_ENGINES[search_engine]
+    url = url_template.format(query=quote_plus(query), num=num_results)
+    pool = pool or get_default_pool()
+    try:
+        driver, uses = pool.acquire()
+    except (TimeoutError, WebDriverException) as e:
+        logger.error(f"No browser available for {search_engine}: {e}")
+        return []
+
+    links = []
+    broken = False
+    try:
+        driver.get(url)
+        # Wait for the results instead of a fixed sleep; no results within the timeout means an empty list
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, result_selector))
+        )
+        links = _extract_links(driver, result_selector, link_selector, num_results)
+    except TimeoutException:
+        logger.warning(f"No results from {search_engine} within {timeout} seconds.")
+    except WebDriverException as e:
+        logger.error(f"Error extracting search results: {e}")
+        broken = True  # The session may be unusable: the browser is replaced
+    finally:
+        pool.release(driver, uses, broken)
+    return links
+
+def gather_links(query, search_engine, num_links, cache=None, pool=None):
+    """
+    Gathers search result links for a given query from a specified search engine.
+
+    Args:
+        query (str): The search query.
+        search_engine (str): The search engine to use (e.g., 'google', 'bing', etc.).
+        num_links (int): The number of links to retrieve.
+        cache (searchcache.SearchCache, optional): Serves repeated queries without opening a browser.
+        pool (BrowserPool, optional): Browsers to use; defaults to the shared pool.
+
+    Returns:
+        list: A list of URLs from the search results, or an empty list if no links are found or an error occurs.
+    """
+    config = ScraperConfig(query, search_engine, num_links)
+    if cache is not None:
+        initial_links = cache.get_or_fetch(
+            'unifiedscraper', config.search_engine, config.query, {'num': config.num_pages},
+            lambda: get_search_results(config.query, config.search_engine, config.num_pages, pool),
+        )
+    else:
+        initial_links = get_search_results(config.query, config.search_engine, config.num_pages, pool)
+
+    if not initial_links:
+        logger.warning("No initial links found for the query.")
+    return initial_links
+
+def gather_links_concurrent(query, search_engines, num_links, cache=None, pool=None):
+    """
+    Query several search engines at once, one pooled browser per engine.
+
+    Returns:
+        dict: Search engine name -> list of URLs, in the order of `search_engines`.
+    """
+    pool = pool or get_default_pool()
+    if not search_engines:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(pool.size, len(search_engines))) as executor:
+        futures = {engine: executor.submit(gather_links, query, engine, num_links, cache, pool)
+                   for engine in search_engines}
+    results = {}
+    for engine, future in futures.items():
+        try:
+            results[engine] = future.result()
+        except Exception as e:
+            logger.error(f"Error searching {engine}: {e}")
+            results[engine] = []
+    return results
@@ -0,0 +1,83 @@
+import re
+import sys
+import time
+import sqlite3
+import contacts
+import sink
+import utils
+
+# Pattern della versione precedente degli estrattori, compilati a ogni chiamata di re.findall
+LEGACY_EMAIL_PATTERN = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+LEGACY_PHONE_PATTERNS = [r"\+?\d[\d -]{8,12}\d"]
+
+def load_texts(path, limit=None):
+    """
+    Restituisce i testi delle pagine salvati dal campo 'testo':
+    da un database SQLite (link_texts o link_details), da results.json o da results.jsonl[.gz|.zst].
+    """
+    if path.endswith('.db'):
+        conn = sqlite3.connect(path)
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        texts = []
+        if 'link_texts' in tables:
+            texts.extend(row[0] for row in conn.execute("SELECT testo FROM link_texts"))
+        if 'link_details' in tables:
+            texts.extend(row[0] for row in conn.execute(
+                "SELECT detail_value FROM link_details WHERE feature_type = 'testo'"
+            ))
+        conn.close()
+    elif path.endswith('.json'):
+        texts = [page_data.get('testo') for page_data in utils.load_results(path).values()]
+    else:
+        texts = [record.get('testo') for record in sink.read_records(path)]
+    texts = [text for text in texts if isinstance(text, str) and text]
+    return texts[:limit]
+
+def legacy_extract(text):
+    """Estrazione come nella versione precedente: una scansione per l'email e una per ogni pattern di telefono."""
+    emails = list(set(re.findall(LEGACY_EMAIL_PATTERN, text)))
+    phones = []
+    for pattern in LEGACY_PHONE_PATTERNS:
+        phones.extend(re.findall(pattern, text))
+    return emails, list(set(phones))
+
+def benchmark(texts, repeats=3):
+    """
+    Misura le due versioni sugli stessi testi (migliore di 'repeats' passaggi).
+
+    Returns:
+        dict: versione -> (secondi, email distinte, telefoni distinti)
+    """
+    timings = {}
+    for name, extract in (('precedente', legacy_extract), ('contacts', contacts.extract_contacts)):
+        best = float('inf')
+        for _ in range(repeats):
+            emails, phones = set(), set()
+            start = time.perf_counter()
+            for text in texts:
+                found_emails, found_phones = extract(text)
+                emails.update(found_emails)
+                phones.update(found_phones)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = (best, len(emails), len(phones))
+    return timings
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Utilizzo: python bench_contacts.py <scraper_database.db|results.json|results.jsonl> [numero_testi] [ripetizioni]")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    texts = load_texts(path, limit)
+    if not texts:
+        print("Nessun testo disponibile per il benchmark.")
+        sys.exit(1)
+
+    total_mb = sum(len(text) for text in texts) / (1024 * 1024)
+    print(f"Benchmark su {len(texts)} testi ({total_mb:.1f} MB), migliore di {repeats} passaggi:")
+    print(f"{'versione':<12} {'tempo (s)':>10} {'email':>8} {'telefoni':>9}")
+    for name, (elapsed, email_count, phone_count) in benchmark(texts, repeats).items():
+        print(f"{name:<12} {elapsed:>10.3f} {email_count:>8} {phone_count:>9}")
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import hashlib
+import requests
+import extractors
+import parsers
+import sink
+import utils
+
+PAGES_FOLDER = 'bench_pages'  # Copia locale delle pagine, per misurare sempre lo stesso HTML
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+}
+
+def load_pages(results_path, limit=None):
+    """
+    Restituisce l'HTML delle pagine elencate in un file di risultati
+    (results.json delle vecchie esecuzioni o results.jsonl[.gz|.zst]), scaricandole
+    solo la prima volta e riutilizzando poi la copia salvata in PAGES_FOLDER.
+    """
+    os.makedirs(PAGES_FOLDER, exist_ok=True)
+    if results_path.endswith('.json'):
+        links = list(utils.load_results(results_path))
+    else:
+        links = [record['url'] for record in sink.read_records(results_path)]
+    links = links[:limit]
+    pages = []
+    with requests.Session() as session:
+        session.headers.update(HEADERS)
+        for link in links:
+            filepath = os.path.join(PAGES_FOLDER, hashlib.sha1(link.encode('utf-8')).hexdigest() + '.html')
+            if not os.path.exists(filepath):
+                try:
+                    response = session.get(link, timeout=20)
+                    response.raise_for_status()
+                except requests.exceptions.RequestException as e:
+                    print(f"Pagina saltata {link}: {e}")
+                    continue
+                with open(filepath, 'wb') as f:
+                    f.write(response.content)
+            with open(filepath, 'rb') as f:
+                pages.append((link, f.read()))
+    return pages
+
+def extract_all(page, link):
+    """Esegue tutti gli estrattori sulla PageView, senza scaricare file."""
+    for extractor in extractors.create_extractors(extractors.EXTRACTORS, page, link):
+        extractor.extract_sync()
+
+def benchmark(pages, repeats=3):
+    """
+    Misura il tempo di parsing e di estrazione per ogni backend disponibile.
+    Per ogni backend viene tenuto il migliore dei 'repeats' passaggi.
+
+    Returns:
+        dict: backend -> (secondi di parsing, secondi di estrazione)
+    """
+    timings = {}
+    for name in parsers.available_backends():
+        parser = parsers.get_parser(name)
+        best_parse = best_extract = float('inf')
+        for _ in range(repeats):
+            parse_time = extract_time = 0.0
+            for link, html in pages:
+                start = time.perf_counter()
+                page = parser.parse(html)
+                parsed = time.perf_counter()
+                extract_all(page, link)
+                parse_time += parsed - start
+                extract_time += time.perf_counter() - parsed
+            best_parse = min(best_parse, parse_time)
+            best_extract = min(best_extract, extract_time)
+        timings[name] = (best_parse, best_extract)
+    return timings
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Utilizzo: python bench_parsers.py <results.json|results.jsonl> [numero_pagine] [ripetizioni]")
+        sys.exit(1)
+
+    results_path = sys.argv[1]
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    pages = load_pages(results_path, limit)
+    if not pages:
+        print("Nessuna pagina disponibile per il benchmark.")
+        sys.exit(1)
+
+    total_mb = sum(len(html) for _, html in pages) / (1024 * 1024)
+    print(f"Benchmark su {len(pages)} pagine ({total_mb:.1f} MB), migliore di {repeats} passaggi:")
+    print(f"{'backend':<12} {'parsing (s)':>12} {'estrazione (s)':>15} {'totale (s)':>11}")
+    for name, (parse_time, extract_time) in benchmark(pages, repeats).items():
+        print(f"{name:<12} {parse_time:>12.3f} {extract_time:>15.3f} {parse_time + extract_time:>11.3f}")
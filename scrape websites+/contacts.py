@@ -0,0 +1,115 @@
+import re
+
+try:
+    import phonenumbers
+except ImportError:  # phonenumbers è opzionale: senza, si usa la normalizzazione semplificata
+    phonenumbers = None
+
+# Paese con cui vengono interpretati i numeri scritti senza prefisso internazionale
+DEFAULT_REGION = 'IT'
+# Senza phonenumbers: per ogni paese, prefisso internazionale e prefisso nazionale da togliere
+# (es. lo 0 di 020 7946 0958 nel Regno Unito; in Italia lo 0 fa parte del numero). Con una regione
+# non elencata i numeri nazionali vengono scartati, perché il prefisso non è noto
+COUNTRY_CODES = {
+    'IT': ('39', None), 'SM': ('378', None), 'VA': ('39', None), 'ES': ('34', None), 'PT': ('351', None),
+    'GB': ('44', '0'), 'DE': ('49', '0'), 'FR': ('33', '0'), 'CH': ('41', '0'), 'AT': ('43', '0'),
+    'NL': ('31', '0'), 'BE': ('32', '0'), 'US': ('1', '1'), 'CA': ('1', '1'),
+}
+
+# Tutti i pattern sono compilati all'import. Le email vengono cercate a partire dai
+# caratteri '@' (trovati con str.find, in C): per ciascuno si verifica la parte locale
+# che precede e il dominio che segue, invece di tentare un'espressione da ogni
+# posizione del testo. Misurato sul corpus 'testo' con bench_contacts.py, questo è più
+# veloce di un'unica espressione con email e telefono in alternativa.
+EMAIL_LOCAL_PATTERN = re.compile(r"[a-zA-Z0-9._%+-]+\Z")
+EMAIL_DOMAIN_PATTERN = re.compile(r"[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+MAX_EMAIL_LOCAL_LENGTH = 64
+
+# Il pattern dei telefoni inizia con una classe di caratteri, così il motore salta
+# rapidamente tutto ciò che non è una cifra o '+'. I lookbehind scartano le cifre
+# attaccate a parole, email, decimali o altre cifre separate da -, / o spazio; il
+# lookahead iniziale scarta le date ISO (2024-01-31). La corrispondenza può essere più
+# lunga di un numero valido e non può fermarsi prima di un altro gruppo di cifre, così
+# un numero lungo non viene troncato in un prefisso plausibile: il numero di cifre
+# viene verificato dopo la normalizzazione.
+PHONE_PATTERN = re.compile(r"""
+    [+\d](?<![\w+@./-][+\d])(?<!\d[ ][+\d])
+    (?!\d{3}-\d\d-\d\d(?!\d))
+    [\d -]{8,24}\d
+    (?![\w@]|\.\d|[ -]\d)
+""", re.VERBOSE)
+
+NON_DIGITS = re.compile(r'\D')
+
+def normalize_email(email):
+    """Email in minuscolo: 'Info@Example.com' e 'info@example.com' sono lo stesso indirizzo."""
+    return email.lower()
+
+def normalize_phone(raw, region=DEFAULT_REGION):
+    """
+    Restituisce il numero in formato E.164 (es. '+390612345678'), o None se non è un numero valido.
+
+    Con il pacchetto 'phonenumbers' installato la validazione è completa; altrimenti si
+    applicano le regole di base: '+' o '00' indicano il prefisso internazionale, i numeri
+    nazionali ricevono il prefisso del paese region (da COUNTRY_CODES), la lunghezza deve
+    essere 8-15 cifre. In entrambi i casi i numeri nazionali sono letti come numeri di
+    region, così '+39 06 1234 5678' e '06-12345678' danno lo stesso risultato.
+    """
+    if phonenumbers is not None:
+        try:
+            number = phonenumbers.parse(raw, region)
+        except phonenumbers.NumberParseException:
+            return None
+        if not phonenumbers.is_possible_number(number):
+            return None
+        return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+
+    digits = NON_DIGITS.sub('', raw)
+    if raw.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif region in COUNTRY_CODES:
+        country_code, national_prefix = COUNTRY_CODES[region]
+        if national_prefix and digits.startswith(national_prefix):
+            digits = digits[len(national_prefix):]
+        digits = country_code + digits
+    else:
+        return None # Numero nazionale di un paese non noto: non si indovina il prefisso
+    if not 8 <= len(digits) <= 15 or digits[0] == '0':
+        return None
+    return '+' + digits
+
+def find_emails(text):
+    """Restituisce gli indirizzi email presenti nel testo, così come sono scritti."""
+    emails = []
+    at = text.find('@')
+    while at != -1:
+        local = EMAIL_LOCAL_PATTERN.search(text, max(0, at - MAX_EMAIL_LOCAL_LENGTH), at)
+        if local:
+            domain = EMAIL_DOMAIN_PATTERN.match(text, at + 1)
+            if domain:
+                emails.append(text[local.start():domain.end()])
+        at = text.find('@', at + 1)
+    return emails
+
+def extract_contacts(text, region=DEFAULT_REGION):
+    """
+    Estrae email e numeri di telefono dallo stesso testo, già estratto una sola volta.
+
+    Args:
+        text (str): Testo già estratto dalla pagina (es. PageView.text o il campo 'testo' salvato).
+        region (str): Paese dei numeri senza prefisso internazionale (es. 'IT').
+
+    Returns:
+        tuple: (emails, phones), liste senza duplicati nell'ordine in cui compaiono,
+               con email in minuscolo e numeri in formato E.164.
+    """
+    # I dizionari eliminano i duplicati (dopo la normalizzazione) mantenendo l'ordine
+    emails = dict.fromkeys(normalize_email(email) for email in find_emails(text))
+    phones = {}
+    for raw in PHONE_PATTERN.findall(text):
+        phone = normalize_phone(raw, region)
+        if phone is not None:
+            phones[phone] = None
+    return list(emails), list(phones)
@@ -1,142 +1,651 @@
-import sqlite3
-import os
-from datetime import datetime
-
-DB_FILE = 'scraper_database.db' # Nome del file del database SQLite
-
-def create_tables():
-    """
-    Crea le tabelle 'search_results' e 'link_details' nel database se non esistono già.
-    """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS search_results (
-        link_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        query TEXT,
-        search_engine_name TEXT,
-        link_url TEXT UNIQUE,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS link_details (
-        detail_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        link_id INTEGER,
-        feature_type TEXT,
-        detail_value TEXT,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (link_id) REFERENCES search_results(link_id)
-    )
-    """)
-
-    conn.commit()
-    cursor.close()
-    conn.close()
-    print("Database e tabelle create o già esistenti.")
-
-def insert_search_results(query, search_engine_name, links):
-    """
-    Inserisce i risultati della ricerca (link) nella tabella 'search_results'.
-
-    Args:
-        query (str): La query di ricerca.
-        search_engine_name (str): Il nome del motore di ricerca.
-        links (list): Una lista di URL dei link trovati.
-
-    Returns:
-        list: Una lista di dizionari, ognuno contenente 'link_id' e 'link_url' per ogni link inserito con successo.
-              Restituisce una lista vuota se nessun link viene inserito (o in caso di errore).
-    """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    saved_links_info = []
-
-    for link_url in links:
-        try:
-            cursor.execute("""
-                INSERT INTO search_results (query, search_engine_name, link_url, timestamp)
-                VALUES (?, ?, ?, ?)
-            """, (query, search_engine_name, link_url, datetime.now()))
-            link_id = cursor.lastrowid # Ottieni l'ID dell'ultima riga inserita
-            conn.commit()
-            saved_links_info.append({'link_id': link_id, 'link_url': link_url})
-            print(f"Link salvato nel database: {link_url}") # Log di successo semplificato
-        except sqlite3.IntegrityError:
-            conn.rollback() # Rollback in caso di violazione di UNIQUE (link già esistente)
-            print(f"Avviso: Link già presente nel database (UNIQUE constraint): {link_url}")
-            cursor.execute("SELECT link_id FROM search_results WHERE link_url = ?", (link_url,))
-            result = cursor.fetchone()
-            if result:
-                link_id = result[0]
-                saved_links_info.append({'link_id': link_id, 'link_url': link_url})
-        except sqlite3.Error as e:
-            conn.rollback()
-            print(f"Errore SQLite durante l'inserimento del link {link_url}: {e}")
-        except Exception as e:
-            conn.rollback()
-            print(f"Errore generico durante l'inserimento del link {link_url}: {e}")
-
-    cursor.close()
-    conn.close()
-    return saved_links_info
-
-def insert_link_details(link_id, feature_type, detail_value):
-    """
-    Inserisce i dettagli (feature) di un link nella tabella 'link_details'.
-
-    Args:
-        link_id (int): L'ID del link a cui sono associati i dettagli (chiave esterna da 'search_results').
-        feature_type (str): Il tipo di feature estratta (es. 'testo', 'immagini', 'video').
-        detail_value (str): Il valore della feature estratta (es. il testo, URL delle immagini, ecc.).
-    """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            INSERT INTO link_details (link_id, feature_type, detail_value)
-            VALUES (?, ?, ?)
-        """, (link_id, feature_type, detail_value))
-        conn.commit()
-        print(f"Dettaglio '{feature_type}' salvato per link_id: {link_id}") # Log di successo semplificato
-    except sqlite3.Error as e:
-        conn.rollback()
-        print(f"Errore SQLite durante l'inserimento dei dettagli del link (link_id: {link_id}, feature: {feature_type}): {e}")
-    except Exception as e:
-        conn.rollback()
-        print(f"Errore generico durante l'inserimento dei dettagli del link (link_id: {link_id}, feature: {feature_type}): {e}")
-    cursor.close()
-    conn.close()
-
-def fetch_link_details(link_id):
-    """
-    Recupera i dettagli di un link specifico dalla tabella 'link_details'.
-
-    Args:
-        link_id (int): L'ID del link di cui recuperare i dettagli.
-
-    Returns:
-        list: Una lista di tuple, dove ogni tupla contiene (feature_type, detail_value) per il link specificato.
-              Restituisce una lista vuota se non vengono trovati dettagli.
-    """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT feature_type, detail_value FROM link_details WHERE link_id = ?", (link_id,))
-        details = cursor.fetchall()
-        print(f"Dettagli recuperati per link_id: {link_id}") # Log di successo semplificato
-    except sqlite3.Error as e:
-        print(f"Errore SQLite durante il recupero dei dettagli del link (link_id: {link_id}): {e}")
-        details = [] # Restituisci una lista vuota in caso di errore
-    except Exception as e:
-        print(f"Errore generico durante il recupero dei dettagli del link (link_id: {link_id}): {e}")
-        details = [] # Restituisci una lista vuota in caso di errore
-    cursor.close()
-    conn.close()
-    return details
-
-if __name__ == '__main__':
-    create_tables() # Esempio di utilizzo: crea le tabelle se eseguito direttamente
+import ast
+import sqlite3
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+DB_FILE = 'scraper_database.db' # Nome del file del database SQLite
+
+# Inserisce un link o, se esiste già, restituisce comunque il suo link_id (SQLite >= 3.35)
+UPSERT_LINK_SQL = """
+    INSERT INTO search_results (query, search_engine_name, link_url, timestamp)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(link_url) DO UPDATE SET link_url = excluded.link_url
+    RETURNING link_id
+"""
+
+INSERT_DETAIL_SQL = """
+    INSERT INTO link_details (link_id, feature_type, detail_value)
+    VALUES (?, ?, ?)
+"""
+
+# Provenienza dei link: in quale posizione ogni motore (script-motore) ha restituito il link per una query
+UPSERT_PROVENANCE_SQL = """
+    INSERT INTO link_provenance (link_id, query, search_engine_name, rank, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(link_id, query, search_engine_name) DO UPDATE SET rank = excluded.rank, timestamp = excluded.timestamp
+"""
+
+RRF_K = 60 # Costante della reciprocal rank fusion: punteggio = somma di 1 / (RRF_K + posizione)
+
+SCHEMA_VERSION = 1 # Versione dello schema normalizzato (salvata in PRAGMA user_version)
+
+# Tabelle figlie tipizzate: una riga per ogni valore estratto, indicizzate per link e per valore
+FEATURE_TABLES = {
+    'immagini': 'link_images',
+    'video': 'link_videos',
+    'link': 'link_outlinks',
+    'email': 'link_emails',
+    'numeri_telefono': 'link_phones',
+    'documenti': 'link_documents',
+}
+TEXT_FEATURE = 'testo' # Salvato in 'link_texts' e indicizzato full-text in 'link_text_fts'
+DUPLICATE_FEATURE = 'duplicato_di' # URL canonico dei quasi duplicati (neardup.py), salvato in 'link_duplicates'
+
+UPSERT_TEXT_SQL = """
+    INSERT INTO link_texts (link_id, testo) VALUES (?, ?)
+    ON CONFLICT(link_id) DO UPDATE SET testo = excluded.testo
+"""
+
+UPSERT_DUPLICATE_SQL = """
+    INSERT INTO link_duplicates (link_id, canonical_url) VALUES (?, ?)
+    ON CONFLICT(link_id) DO UPDATE SET canonical_url = excluded.canonical_url
+"""
+
+# Pragma per un unico writer con molte scritture: WAL consente letture concorrenti
+WRITER_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MB
+    "PRAGMA busy_timeout=5000",
+)
+
+def create_tables():
+    """
+    Crea le tabelle 'search_results' e 'link_details', le tabelle normalizzate delle feature
+    e l'indice full-text del testo se non esistono già, poi migra i vecchi dettagli.
+    """
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS search_results (
+        link_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        query TEXT,
+        search_engine_name TEXT,
+        link_url TEXT UNIQUE,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS link_details (
+        detail_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        link_id INTEGER,
+        feature_type TEXT,
+        detail_value TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (link_id) REFERENCES search_results(link_id)
+    )
+    """)
+
+    _create_feature_tables(cursor)
+
+    conn.commit()
+    cursor.close()
+    migrate_link_details(conn)
+    conn.close()
+    print("Database e tabelle create o già esistenti.")
+
+def _create_feature_tables(cursor):
+    """
+    Crea le tabelle figlie tipizzate, la tabella del testo con il suo indice FTS5,
+    la tabella dei quasi duplicati, quella della provenienza dei link e gli indici.
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_link_details_link ON link_details(link_id, feature_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_link_details_feature ON link_details(feature_type)")
+
+    for table in FEATURE_TABLES.values():
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            link_id INTEGER NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (link_id, value),
+            FOREIGN KEY (link_id) REFERENCES search_results(link_id)
+        ) WITHOUT ROWID
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_value ON {table}(value)")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS link_texts (
+        link_id INTEGER PRIMARY KEY,
+        testo TEXT,
+        FOREIGN KEY (link_id) REFERENCES search_results(link_id)
+    )
+    """)
+    # Indice full-text a contenuto esterno: il testo è memorizzato una sola volta in link_texts
+    cursor.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS link_text_fts
+    USING fts5(testo, content='link_texts', content_rowid='link_id')
+    """)
+    cursor.executescript("""
+    CREATE TRIGGER IF NOT EXISTS link_texts_ai AFTER INSERT ON link_texts BEGIN
+        INSERT INTO link_text_fts(rowid, testo) VALUES (new.link_id, new.testo);
+    END;
+    CREATE TRIGGER IF NOT EXISTS link_texts_ad AFTER DELETE ON link_texts BEGIN
+        INSERT INTO link_text_fts(link_text_fts, rowid, testo) VALUES ('delete', old.link_id, old.testo);
+    END;
+    CREATE TRIGGER IF NOT EXISTS link_texts_au AFTER UPDATE ON link_texts BEGIN
+        INSERT INTO link_text_fts(link_text_fts, rowid, testo) VALUES ('delete', old.link_id, old.testo);
+        INSERT INTO link_text_fts(rowid, testo) VALUES (new.link_id, new.testo);
+    END;
+    """)
+    # Quasi duplicati: collegati alla pagina canonica invece di avere una copia dei dettagli
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS link_duplicates (
+        link_id INTEGER PRIMARY KEY,
+        canonical_url TEXT NOT NULL,
+        FOREIGN KEY (link_id) REFERENCES search_results(link_id)
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_link_duplicates_canonical ON link_duplicates(canonical_url)")
+    # Provenienza: un link unico può essere stato restituito da più motori e script
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS link_provenance (
+        link_id INTEGER NOT NULL,
+        query TEXT NOT NULL,
+        search_engine_name TEXT NOT NULL,
+        rank INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (link_id, query, search_engine_name),
+        FOREIGN KEY (link_id) REFERENCES search_results(link_id)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_link_provenance_query ON link_provenance(query, search_engine_name)")
+
+def _parse_list_value(detail_value):
+    """Converte in lista un valore salvato come str(list) dalle versioni precedenti."""
+    if isinstance(detail_value, (list, tuple, set)):
+        return list(detail_value)
+    if isinstance(detail_value, str) and detail_value.startswith('['):
+        try:
+            parsed = ast.literal_eval(detail_value)
+        except (ValueError, SyntaxError):
+            return None
+        if isinstance(parsed, list):
+            return parsed
+    return None
+
+def _detail_rows(link_id, feature_type, detail_value):
+    """
+    Restituisce le righe da inserire per una feature come lista di (sql, parametri):
+    una riga per valore nelle tabelle tipizzate, il testo in link_texts, il collegamento
+    alla pagina canonica in link_duplicates, tutto il resto (es. 'error') in link_details.
+    """
+    table = FEATURE_TABLES.get(feature_type)
+    if table is not None:
+        values = _parse_list_value(detail_value)
+        if values is not None:
+            sql = f"INSERT OR IGNORE INTO {table} (link_id, value) VALUES (?, ?)"
+            return [(sql, (link_id, str(value))) for value in values]
+    if feature_type == TEXT_FEATURE:
+        return [(UPSERT_TEXT_SQL, (link_id, str(detail_value)))]
+    if feature_type == DUPLICATE_FEATURE:
+        return [(UPSERT_DUPLICATE_SQL, (link_id, str(detail_value)))]
+    return [(INSERT_DETAIL_SQL, (link_id, feature_type, str(detail_value)))]
+
+def _group_rows(rows, grouped=None):
+    """Raggruppa le righe per istruzione SQL, per poterle scrivere con executemany."""
+    grouped = {} if grouped is None else grouped
+    for sql, params in rows:
+        grouped.setdefault(sql, []).append(params)
+    return grouped
+
+def migrate_link_details(conn):
+    """
+    Migra i dettagli salvati come str(list) / testo in 'link_details' verso le tabelle
+    normalizzate. Viene eseguita una sola volta per database (PRAGMA user_version).
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+
+    feature_types = list(FEATURE_TABLES) + [TEXT_FEATURE]
+    placeholders = ', '.join('?' for _ in feature_types)
+    rows = conn.execute(
+        f"SELECT detail_id, link_id, feature_type, detail_value FROM link_details WHERE feature_type IN ({placeholders})",
+        feature_types,
+    ).fetchall()
+
+    grouped = {}
+    migrated_ids = []
+    for detail_id, link_id, feature_type, detail_value in rows:
+        detail_rows = _detail_rows(link_id, feature_type, detail_value)
+        if any(sql == INSERT_DETAIL_SQL for sql, _ in detail_rows):
+            continue # Valore non interpretabile: resta in link_details
+        _group_rows(detail_rows, grouped)
+        migrated_ids.append((detail_id,))
+
+    try:
+        with conn:
+            for sql, params in grouped.items():
+                conn.executemany(sql, params)
+            conn.executemany("DELETE FROM link_details WHERE detail_id = ?", migrated_ids)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        if migrated_ids:
+            print(f"Migrazione completata: {len(migrated_ids)} dettagli spostati nelle tabelle normalizzate.")
+    except sqlite3.Error as e:
+        print(f"Errore SQLite durante la migrazione dei dettagli: {e}")
+
+def insert_search_results(query, search_engine_name, links):
+    """
+    Inserisce i risultati della ricerca (link) nella tabella 'search_results'.
+
+    Args:
+        query (str): La query di ricerca.
+        search_engine_name (str): Il nome del motore di ricerca.
+        links (list): Una lista di URL dei link trovati.
+
+    Returns:
+        list: Una lista di dizionari, ognuno contenente 'link_id' e 'link_url' per ogni link inserito con successo.
+              Restituisce una lista vuota se nessun link viene inserito (o in caso di errore).
+    """
+    conn = sqlite3.connect(DB_FILE)
+    try:
+        saved_links_info = _upsert_links(conn, query, search_engine_name, links)
+    finally:
+        conn.close()
+    return saved_links_info
+
+def _upsert_links(conn, query, search_engine_name, links):
+    """
+    Inserisce (o ritrova) i link in un'unica transazione usando INSERT ... ON CONFLICT ... RETURNING.
+    """
+    saved_links_info = []
+    timestamp = datetime.now()
+    cursor = conn.cursor()
+    try:
+        with conn:
+            for link_url in links:
+                cursor.execute(UPSERT_LINK_SQL, (query, search_engine_name, link_url, timestamp))
+                link_id = cursor.fetchone()[0]
+                saved_links_info.append({'link_id': link_id, 'link_url': link_url})
+        print(f"{len(saved_links_info)} link salvati nel database ({search_engine_name}).")
+    except sqlite3.Error as e:
+        print(f"Errore SQLite durante l'inserimento dei link ({search_engine_name}): {e}")
+        saved_links_info = []
+    except Exception as e:
+        print(f"Errore generico durante l'inserimento dei link ({search_engine_name}): {e}")
+        saved_links_info = []
+    finally:
+        cursor.close()
+    return saved_links_info
+
+def insert_fused_results(query, fused_results):
+    """
+    Inserisce i risultati già fusi e deduplicati (un link per URL canonico) e la loro
+    provenienza nella tabella 'link_provenance'.
+
+    Args:
+        query (str): La query di ricerca.
+        fused_results (list): Dizionari con 'link_url', 'score' e 'sources' (lista di
+                              (nome script-motore, posizione)), in ordine di punteggio.
+
+    Returns:
+        list: Dizionari con 'link_id', 'link_url' e 'score' nello stesso ordine, un solo
+              elemento per link_id. Lista vuota in caso di errore.
+    """
+    conn = sqlite3.connect(DB_FILE)
+    try:
+        saved_links_info = _upsert_fused(conn, query, fused_results)
+    finally:
+        conn.close()
+    return saved_links_info
+
+def _upsert_fused(conn, query, fused_results):
+    """
+    Inserisce (o ritrova) i link fusi e la loro provenienza in un'unica transazione.
+    """
+    saved_links_info = []
+    seen_ids = set()
+    timestamp = datetime.now()
+    cursor = conn.cursor()
+    try:
+        with conn:
+            for result in fused_results:
+                sources = result['sources']
+                # search_engine_name resta quello della prima fonte; l'elenco completo è in link_provenance
+                cursor.execute(UPSERT_LINK_SQL, (query, sources[0][0], result['link_url'], timestamp))
+                link_id = cursor.fetchone()[0]
+                cursor.executemany(UPSERT_PROVENANCE_SQL, [
+                    (link_id, query, source, rank, timestamp) for source, rank in sources
+                ])
+                if link_id not in seen_ids:
+                    seen_ids.add(link_id)
+                    saved_links_info.append({'link_id': link_id, 'link_url': result['link_url'], 'score': result['score']})
+        print(f"{len(saved_links_info)} link unici salvati nel database.")
+    except sqlite3.Error as e:
+        print(f"Errore SQLite durante l'inserimento dei link fusi: {e}")
+        saved_links_info = []
+    except Exception as e:
+        print(f"Errore generico durante l'inserimento dei link fusi: {e}")
+        saved_links_info = []
+    finally:
+        cursor.close()
+    return saved_links_info
+
+def fetch_ranked_links(query, limit=None):
+    """
+    Classifica i link di una query con la reciprocal rank fusion sulle posizioni salvate
+    in 'link_provenance'.
+
+    Returns:
+        list: Tuple (link_id, link_url, punteggio, numero di fonti) in ordine di punteggio.
+    """
+    conn = sqlite3.connect(DB_FILE)
+    try:
+        return conn.execute("""
+            SELECT s.link_id, s.link_url, SUM(1.0 / (? + p.rank)) AS score, COUNT(*)
+            FROM link_provenance p JOIN search_results s ON s.link_id = p.link_id
+            WHERE p.query = ?
+            GROUP BY s.link_id
+            ORDER BY score DESC
+            LIMIT ?
+        """, (RRF_K, query, -1 if limit is None else limit)).fetchall()
+    except sqlite3.Error as e:
+        print(f"Errore SQLite durante la classifica dei link per '{query}': {e}")
+        return []
+    finally:
+        conn.close()
+
+def insert_link_details(link_id, feature_type, detail_value):
+    """
+    Inserisce i dettagli (feature) di un link: le liste (immagini, link, email, ...) vanno
+    nelle tabelle tipizzate con una riga per valore, il testo in 'link_texts' (con indice
+    full-text), gli altri dettagli (es. 'error') nella tabella 'link_details'.
+
+    Args:
+        link_id (int): L'ID del link a cui sono associati i dettagli (chiave esterna da 'search_results').
+        feature_type (str): Il tipo di feature estratta (es. 'testo', 'immagini', 'video').
+        detail_value (str | list): Il valore della feature estratta (es. il testo, lista di URL delle immagini, ecc.).
+    """
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    try:
+        for sql, params in _group_rows(_detail_rows(link_id, feature_type, detail_value)).items():
+            cursor.executemany(sql, params)
+        conn.commit()
+        print(f"Dettaglio '{feature_type}' salvato per link_id: {link_id}") # Log di successo semplificato
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"Errore SQLite durante l'inserimento dei dettagli del link (link_id: {link_id}, feature: {feature_type}): {e}")
+    except Exception as e:
+        conn.rollback()
+        print(f"Errore generico durante l'inserimento dei dettagli del link (link_id: {link_id}, feature: {feature_type}): {e}")
+    cursor.close()
+    conn.close()
+
+def fetch_link_details(link_id):
+    """
+    Recupera i dettagli di un link specifico dalle tabelle normalizzate e da 'link_details'.
+
+    Args:
+        link_id (int): L'ID del link di cui recuperare i dettagli.
+
+    Returns:
+        list: Una lista di tuple, dove ogni tupla contiene (feature_type, detail_value) per il link specificato;
+              per le feature a più valori detail_value è una lista.
+              Restituisce una lista vuota se non vengono trovati dettagli.
+    """
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    try:
+        details = []
+        cursor.execute("SELECT testo FROM link_texts WHERE link_id = ?", (link_id,))
+        row = cursor.fetchone()
+        if row:
+            details.append((TEXT_FEATURE, row[0]))
+        cursor.execute("SELECT canonical_url FROM link_duplicates WHERE link_id = ?", (link_id,))
+        row = cursor.fetchone()
+        if row:
+            details.append((DUPLICATE_FEATURE, row[0]))
+        for feature_type, table in FEATURE_TABLES.items():
+            cursor.execute(f"SELECT value FROM {table} WHERE link_id = ?", (link_id,))
+            values = [value for (value,) in cursor.fetchall()]
+            if values:
+                details.append((feature_type, values))
+        cursor.execute("SELECT feature_type, detail_value FROM link_details WHERE link_id = ?", (link_id,))
+        details.extend(cursor.fetchall())
+        print(f"Dettagli recuperati per link_id: {link_id}") # Log di successo semplificato
+    except sqlite3.Error as e:
+        print(f"Errore SQLite durante il recupero dei dettagli del link (link_id: {link_id}): {e}")
+        details = [] # Restituisci una lista vuota in caso di errore
+    except Exception as e:
+        print(f"Errore generico durante il recupero dei dettagli del link (link_id: {link_id}): {e}")
+        details = [] # Restituisci una lista vuota in caso di errore
+    cursor.close()
+    conn.close()
+    return details
+
+def find_links_with_feature(feature_type, value):
+    """
+    Restituisce i link (link_id, link_url) che contengono un certo valore,
+    es. find_links_with_feature('email', 'info@example.com').
+    """
+    table = FEATURE_TABLES.get(feature_type)
+    if table is None:
+        raise ValueError(f"Feature non indicizzata: {feature_type}")
+    conn = sqlite3.connect(DB_FILE)
+    try:
+        return conn.execute(f"""
+            SELECT s.link_id, s.link_url
+            FROM {table} f JOIN search_results s ON s.link_id = f.link_id
+            WHERE f.value = ?
+        """, (value,)).fetchall()
+    except sqlite3.Error as e:
+        print(f"Errore SQLite durante la ricerca di {feature_type} = {value}: {e}")
+        return []
+    finally:
+        conn.close()
+
+def find_duplicates(canonical_url):
+    """
+    Restituisce i link (link_id, link_url) collegati come quasi duplicati alla pagina canonica.
+    """
+    conn = sqlite3.connect(DB_FILE)
+    try:
+        return conn.execute("""
+            SELECT s.link_id, s.link_url
+            FROM link_duplicates d JOIN search_results s ON s.link_id = d.link_id
+            WHERE d.canonical_url = ?
+        """, (canonical_url,)).fetchall()
+    except sqlite3.Error as e:
+        print(f"Errore SQLite durante la ricerca dei duplicati di {canonical_url}: {e}")
+        return []
+    finally:
+        conn.close()
+
+def search_text(match_query, limit=50):
+    """
+    Ricerca full-text (sintassi FTS5 MATCH) nel testo delle pagine.
+
+    Returns:
+        list: Tuple (link_id, link_url, snippet) ordinate per rilevanza.
+    """
+    conn = sqlite3.connect(DB_FILE)
+    try:
+        return conn.execute("""
+            SELECT s.link_id, s.link_url, snippet(link_text_fts, 0, '[', ']', '...', 12)
+            FROM link_text_fts JOIN search_results s ON s.link_id = link_text_fts.rowid
+            WHERE link_text_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, (match_query, limit)).fetchall()
+    except sqlite3.Error as e:
+        print(f"Errore SQLite durante la ricerca full-text '{match_query}': {e}")
+        return []
+    finally:
+        conn.close()
+
+class DatabaseWriter:
+    """
+    Writer SQLite con un'unica connessione (WAL e pragma ottimizzati) gestita da un thread dedicato.
+
+    Le richieste arrivano tramite una coda: insert_link_details() non blocca mai il chiamante
+    (utile per gli scraper asincroni) e i dettagli, già convertiti nelle righe delle tabelle
+    normalizzate, vengono scritti con executemany in transazioni da circa 'batch_size'
+    righe, oppure ogni 'flush_interval' secondi.
+    insert_search_results() restituisce i link_id come la funzione omonima del modulo.
+
+    Esempio:
+        with DatabaseWriter() as writer:
+            links_info = writer.insert_search_results(query, 'google', links)
+            writer.insert_link_details(links_info[0]['link_id'], 'testo', testo)
+    """
+    def __init__(self, db_file=DB_FILE, batch_size=500, flush_interval=1.0):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.thread = None
+        self.details_written = 0
+
+    def start(self):
+        """Avvia il thread di scrittura."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='DatabaseWriter', daemon=True)
+            self.thread.start()
+        return self
+
+    def close(self):
+        """Scrive i dettagli in attesa e chiude la connessione."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def insert_link_details(self, link_id, feature_type, detail_value):
+        """Accoda un dettaglio da salvare (non bloccante)."""
+        self.queue.put(('detail', _detail_rows(link_id, feature_type, detail_value)))
+
+    def submit_search_results(self, query, search_engine_name, links):
+        """
+        Accoda l'inserimento dei link e restituisce un Future con la lista di
+        {'link_id', 'link_url'} (usare asyncio.wrap_future() dal codice asincrono).
+        """
+        future = Future()
+        self.queue.put(('links', (query, search_engine_name, list(links), future)))
+        return future
+
+    def insert_search_results(self, query, search_engine_name, links):
+        """Inserisce i link e attende i relativi link_id."""
+        return self.submit_search_results(query, search_engine_name, links).result()
+
+    def insert_fused_results(self, query, fused_results):
+        """Inserisce i link fusi con la loro provenienza e attende i relativi link_id (vedi insert_fused_results)."""
+        future = Future()
+        self.queue.put(('fused', (query, list(fused_results), future)))
+        return future.result()
+
+    def flush(self):
+        """Attende che tutti i dettagli accodati finora siano stati scritti."""
+        future = Future()
+        self.queue.put(('flush', future))
+        return future.result()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file)
+        for pragma in WRITER_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _write_details(self, conn, pending):
+        """
+        Scrive in un'unica transazione le righe in attesa, raggruppate per istruzione SQL.
+        Se la transazione fallisce, le righe vengono riscritte una alla volta: solo quelle
+        che non possono essere salvate vanno perse.
+        """
+        row_count = sum(len(rows) for rows in pending.values())
+        if not row_count:
+            return
+        try:
+            with conn:
+                for sql, rows in pending.items():
+                    conn.executemany(sql, rows)
+            self.details_written += row_count
+            print(f"{row_count} dettagli salvati nel database.")
+        except sqlite3.Error as e:
+            print(f"Errore SQLite durante l'inserimento di {row_count} dettagli: {e}. Riprovo riga per riga.")
+            self._write_rows_one_by_one(conn, pending)
+        pending.clear()
+
+    def _write_rows_one_by_one(self, conn, pending):
+        written = 0
+        for sql, rows in pending.items():
+            for row in rows:
+                try:
+                    with conn:
+                        conn.execute(sql, row)
+                    written += 1
+                except sqlite3.Error as e:
+                    print(f"Errore SQLite, dettaglio scartato (link_id {row[0]}): {e}")
+        self.details_written += written
+        print(f"{written} dettagli salvati nel database dopo il nuovo tentativo.")
+
+    def _run(self):
+        conn = self._connect()
+        pending = {}
+        pending_rows = 0
+        last_flush = time.monotonic()
+        try:
+            while True:
+                # Le righe in attesa vengono scritte al più tardi flush_interval secondi dopo
+                # l'ultima scrittura, anche se continuano ad arrivare dettagli
+                timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+                try:
+                    item = self.queue.get(timeout=timeout if pending_rows else self.flush_interval)
+                except queue.Empty:
+                    item = ()
+
+                if item is None:
+                    break
+                if item:
+                    kind, payload = item
+                    if kind == 'detail':
+                        _group_rows(payload, pending)
+                        pending_rows += len(payload)
+                    elif kind == 'links':
+                        query, search_engine_name, links, future = payload
+                        future.set_result(_upsert_links(conn, query, search_engine_name, links))
+                    elif kind == 'fused':
+                        query, fused_results, future = payload
+                        future.set_result(_upsert_fused(conn, query, fused_results))
+                    elif kind == 'flush':
+                        self._write_details(conn, pending)
+                        pending_rows = 0
+                        last_flush = time.monotonic()
+                        payload.set_result(self.details_written)
+
+                if pending_rows and (pending_rows >= self.batch_size
+                                     or time.monotonic() - last_flush >= self.flush_interval):
+                    self._write_details(conn, pending)
+                    pending_rows = 0
+                if not pending_rows:
+                    last_flush = time.monotonic()
+        finally:
+            self._write_details(conn, pending)
+            conn.close()
+
+if __name__ == '__main__':
+    create_tables() # Esempio di utilizzo: crea le tabelle se eseguito direttamente
     print("Funzioni del database definite nel file database.py")
\ No newline at end of file
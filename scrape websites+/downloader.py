@@ -1,65 +1,379 @@
-import os
-import requests
-import aiohttp
-import asyncio
-from urllib.parse import urlparse
-
-async def download_files_async(urls, folder, base_url):
-    """Scarica i file in modalità asincrona."""
-    async with aiohttp.ClientSession() as session:
-        tasks = [download_file_async(url, folder, base_url, session) for url in urls]
-        await asyncio.gather(*tasks)
-
-async def download_file_async(url, folder, base_url, session):
-    """Scarica un singolo file in modalità asincrona."""
-    try:
-        # Crea la cartella se non esiste
-        os.makedirs(folder, exist_ok=True)
-
-        # Estrai il nome del file dall'URL
-        parsed_url = urlparse(url)
-        filename = os.path.basename(parsed_url.path)
-        filepath = os.path.join(folder, filename)
-
-        async with session.get(url) as response:
-          if response.status == 200:
-            with open(filepath, 'wb') as f:
-                while True:
-                    chunk = await response.content.read(1024) # Leggi 1KB alla volta
-                    if not chunk:
-                        break
-                    f.write(chunk)
-          else:
-            print(f"Errore {response.status} durante il download di {url}")
-
-    except Exception as e:
-        print(f"Errore durante il download di {url}: {e}")
-
-def download_files(urls, folder, base_url):
-    """Scarica i file in modalità sincrona."""
-    for url in urls:
-        download_file(url, folder, base_url)
-
-def download_file(url, folder, base_url):
-    """Scarica un singolo file in modalità sincrona."""
-    try:
-        # Crea la cartella se non esiste
-        os.makedirs(folder, exist_ok=True)
-
-        # Estrai il nome del file dall'URL
-        parsed_url = urlparse(url)
-        filename = os.path.basename(parsed_url.path)
-        filepath = os.path.join(folder, filename)
-
-        # Scarica il file
-        response = requests.get(url, stream=True)
-        response.raise_for_status()  # Gestione degli errori HTTP
-
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-
-    except requests.exceptions.RequestException as e:
-        print(f"Errore durante il download di {url}: {e}")
-    except Exception as e:
-        print(f"Errore durante il download di {url}: {e}")
\ No newline at end of file
+import os
+import json
+import hashlib
+import threading
+import requests
+import aiohttp
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import mediastore
+
+# Letture adattive: si parte da 64 KB e si raddoppia finché i dati arrivano a blocchi pieni
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Sopra questa dimensione, se il server accetta i Range, il file viene scaricato a segmenti
+SEGMENT_THRESHOLD = 8 * 1024 * 1024
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+MAX_SEGMENTS = 4
+
+# Ogni quanti byte scaricati viene aggiornato il file di stato (.part.json)
+PROGRESS_SAVE_BYTES = 8 * 1024 * 1024
+
+# Nessun limite sulla durata totale (i file grandi richiedono minuti), solo sulle letture ferme
+SEGMENT_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+
+class ResourceChanged(Exception):
+    """Il file sul server è cambiato rispetto al download parziale salvato."""
+
+def _next_chunk_size(chunk_size, received):
+    """Raddoppia la dimensione della lettura se l'ultima ha riempito il buffer."""
+    if received >= chunk_size:
+        return min(chunk_size * 2, MAX_CHUNK_SIZE)
+    return chunk_size
+
+def _response_info(headers):
+    """Ricava dagli header della risposta le informazioni utili a dividere il download."""
+    length = headers.get('Content-Length', '')
+    return {
+        'size': int(length) if length.isdigit() else None,
+        # Con un Content-Encoding i Range si riferiscono ai byte compressi: niente segmenti
+        'ranges': headers.get('Accept-Ranges', '').lower() == 'bytes' and not headers.get('Content-Encoding'),
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'content_type': headers.get('Content-Type'),
+    }
+
+def _should_split(info):
+    return info['ranges'] and info['size'] is not None and info['size'] >= SEGMENT_THRESHOLD
+
+def _hash_file(path):
+    """SHA-256 di un file letto a blocchi grandi."""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(MAX_CHUNK_SIZE)
+            if not block:
+                break
+            hasher.update(block)
+    return hasher.hexdigest()
+
+class PartialDownload:
+    """
+    Download a segmenti di un singolo file, ripristinabile.
+
+    Il file viene preallocato nella cartella temporanea dell'archivio e ogni segmento
+    scrive direttamente al proprio offset. Accanto al file parziale (<hash>.part) un
+    file di stato (<hash>.part.json) registra dimensione, validatori e byte completati
+    di ogni segmento: se il download si interrompe, la volta successiva riparte da lì
+    invece che da zero.
+    """
+    def __init__(self, url, part_path):
+        self.url = url
+        self.part_path = part_path
+        self.state_path = part_path + '.json'
+        self.size = None
+        self.etag = None
+        self.last_modified = None
+        self.content_type = None
+        self.segments = []  # Liste [inizio, fine (inclusa), byte completati]
+        self.lock = threading.Lock()
+        self._unsaved = 0
+
+    def load(self):
+        """Carica lo stato di un download interrotto. Restituisce False se non ce n'è uno valido."""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get('url') != self.url or not os.path.exists(self.part_path):
+            return False
+        self.size = state['size']
+        self.etag = state['etag']
+        self.last_modified = state['last_modified']
+        self.content_type = state['content_type']
+        self.segments = state['segments']
+        return True
+
+    def start(self, info):
+        """Prepara un nuovo download: divide il file in segmenti e prealloca il file parziale."""
+        self.size = info['size']
+        self.etag = info['etag']
+        self.last_modified = info['last_modified']
+        self.content_type = info['content_type']
+
+        count = max(1, min(MAX_SEGMENTS, self.size // MIN_SEGMENT_SIZE))
+        step = -(-self.size // count)
+        self.segments = [[start, min(start + step, self.size) - 1, 0] for start in range(0, self.size, step)]
+
+        with open(self.part_path, 'wb') as f:
+            if hasattr(os, 'posix_fallocate'):
+                os.posix_fallocate(f.fileno(), 0, self.size)
+            else:
+                f.truncate(self.size)
+        self.save()
+
+    def range_headers(self, segment):
+        """Header della richiesta per la parte mancante del segmento."""
+        start, end, done = segment
+        headers = {'Range': f'bytes={start + done}-{end}', 'Accept-Encoding': 'identity'}
+        # If-Range: se il file è cambiato il server risponde 200 con il file intero
+        if self.etag and not self.etag.startswith('W/'):
+            headers['If-Range'] = self.etag
+        elif self.last_modified:
+            headers['If-Range'] = self.last_modified
+        return headers
+
+    def pending(self):
+        return [segment for segment in self.segments if segment[0] + segment[2] <= segment[1]]
+
+    def advance(self, segment, received):
+        """Registra i byte scritti da un segmento e salva lo stato a intervalli regolari."""
+        with self.lock:
+            segment[2] += received
+            self._unsaved += received
+            if self._unsaved >= PROGRESS_SAVE_BYTES:
+                self._save_locked()
+
+    def save(self):
+        with self.lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        state = {
+            'url': self.url, 'size': self.size, 'etag': self.etag,
+            'last_modified': self.last_modified, 'content_type': self.content_type,
+            'segments': self.segments,
+        }
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+        self._unsaved = 0
+
+    def remove(self, keep_data=False):
+        """Elimina il file di stato e, se keep_data è False, anche il file parziale."""
+        paths = [self.state_path] if keep_data else [self.state_path, self.part_path]
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+async def download_files_async(urls, folder, base_url, session=None):
+    """
+    Scarica i file in modalità asincrona.
+    Se viene passata una sessione (es. quella condivisa dello Scraper) viene riutilizzata,
+    altrimenti ne viene aperta una temporanea.
+    """
+    if session is not None:
+        tasks = [download_file_async(url, folder, base_url, session) for url in urls]
+        await asyncio.gather(*tasks)
+        return
+
+    async with aiohttp.ClientSession() as session:
+        tasks = [download_file_async(url, folder, base_url, session) for url in urls]
+        await asyncio.gather(*tasks)
+
+async def download_file_async(url, folder, base_url, session, throttle=None):
+    """
+    Scarica un singolo file in modalità asincrona nell'archivio indirizzato per contenuto
+    della cartella. Gli URL già scaricati vengono saltati senza richieste di rete.
+
+    I file grandi serviti con Accept-Ranges vengono scaricati in più segmenti paralleli
+    e, se interrotti, ripresi dal punto in cui si erano fermati.
+
+    Se indicato, throttle è una coroutine chiamata con il numero di byte di ogni
+    blocco ricevuto (es. TokenBucket.acquire) per limitare la banda.
+
+    Returns:
+        str: Il percorso del file nell'archivio, o None in caso di errore.
+    """
+    store = mediastore.get_store(folder)
+    existing = store.lookup(url)
+    if existing:
+        return existing
+
+    partial = PartialDownload(url, store.partial_path(url))
+    try:
+        try:
+            return await _download_async(url, store, session, partial, throttle)
+        except ResourceChanged:
+            print(f"Il file {url} è cambiato sul server, il download riparte da zero")
+            partial.remove()
+            partial = PartialDownload(url, store.partial_path(url))
+            return await _download_async(url, store, session, partial, throttle)
+    except Exception as e:
+        if partial.segments:
+            partial.save()  # Conserva i progressi per la prossima esecuzione
+        print(f"Errore durante il download di {url}: {e}")
+        return None
+
+async def _download_async(url, store, session, partial, throttle):
+    if not partial.load():
+        async with session.get(url, timeout=SEGMENT_TIMEOUT) as response:
+            if response.status != 200:
+                print(f"Errore {response.status} durante il download di {url}")
+                return None
+            info = _response_info(response.headers)
+            if not _should_split(info):
+                return await _stream_single_async(url, store, response, throttle)
+        # File grande: la risposta completa viene chiusa e sostituita dalle richieste a segmenti
+        partial.start(info)
+
+    await asyncio.gather(*(_fetch_segment_async(url, session, partial, segment, throttle) for segment in partial.pending()))
+    loop = asyncio.get_running_loop()
+    digest = await loop.run_in_executor(None, _hash_file, partial.part_path)
+    path = store.commit(url, partial.part_path, digest, store.guess_extension(url, partial.content_type))
+    partial.remove(keep_data=True)
+    return path
+
+async def _stream_single_async(url, store, response, throttle):
+    """Scarica con un'unica richiesta un file piccolo o servito senza supporto ai Range."""
+    temp_path = store.new_temp_path()
+    try:
+        # Calcola l'hash mentre scrive, senza rileggere il file
+        chunk_size = MIN_CHUNK_SIZE
+        with mediastore.HashingWriter(temp_path) as f:
+            while True:
+                chunk = await response.content.read(chunk_size)
+                if not chunk:
+                    break
+                f.write(chunk)
+                if throttle is not None:
+                    await throttle(len(chunk))
+                chunk_size = _next_chunk_size(chunk_size, len(chunk))
+    except Exception:
+        store.discard(temp_path)
+        raise
+    ext = store.guess_extension(url, response.headers.get('Content-Type'))
+    return store.commit(url, temp_path, f.hexdigest(), ext)
+
+async def _fetch_segment_async(url, session, partial, segment, throttle):
+    """Scarica la parte mancante di un segmento scrivendola al suo offset nel file."""
+    async with session.get(url, headers=partial.range_headers(segment), timeout=SEGMENT_TIMEOUT) as response:
+        if response.status == 200:
+            raise ResourceChanged(url)
+        if response.status != 206:
+            raise ValueError(f"Risposta {response.status} alla richiesta Range")
+        # Scrittura senza buffer: i byte registrati nello stato sono già nel file
+        with open(partial.part_path, 'r+b', buffering=0) as f:
+            f.seek(segment[0] + segment[2])
+            chunk_size = MIN_CHUNK_SIZE
+            while True:
+                remaining = segment[1] + 1 - segment[0] - segment[2]
+                if remaining <= 0:
+                    break
+                chunk = await response.content.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                f.write(chunk)
+                partial.advance(segment, len(chunk))
+                if throttle is not None:
+                    await throttle(len(chunk))
+                chunk_size = _next_chunk_size(chunk_size, len(chunk))
+    if segment[0] + segment[2] <= segment[1]:
+        raise ValueError(f"Segmento {segment[0]}-{segment[1]} incompleto")
+
+def download_files(urls, folder, base_url, session=None):
+    """Scarica i file in modalità sincrona, riutilizzando la sessione se fornita."""
+    for url in urls:
+        download_file(url, folder, base_url, session)
+
+def download_file(url, folder, base_url, session=None):
+    """
+    Scarica un singolo file in modalità sincrona nell'archivio indirizzato per contenuto
+    della cartella. Gli URL già scaricati vengono saltati senza richieste di rete.
+
+    I file grandi serviti con Accept-Ranges vengono scaricati in più segmenti paralleli
+    (un thread per segmento) e, se interrotti, ripresi dal punto in cui si erano fermati.
+
+    Returns:
+        str: Il percorso del file nell'archivio, o None in caso di errore.
+    """
+    store = mediastore.get_store(folder)
+    existing = store.lookup(url)
+    if existing:
+        return existing
+
+    http = session if session is not None else requests
+    partial = PartialDownload(url, store.partial_path(url))
+    try:
+        try:
+            return _download(url, store, http, partial)
+        except ResourceChanged:
+            print(f"Il file {url} è cambiato sul server, il download riparte da zero")
+            partial.remove()
+            partial = PartialDownload(url, store.partial_path(url))
+            return _download(url, store, http, partial)
+    except requests.exceptions.RequestException as e:
+        print(f"Errore durante il download di {url}: {e}")
+    except Exception as e:
+        print(f"Errore durante il download di {url}: {e}")
+    if partial.segments:
+        partial.save()  # Conserva i progressi per la prossima esecuzione
+    return None
+
+def _download(url, store, http, partial):
+    if not partial.load():
+        with http.get(url, stream=True, timeout=(30, 60)) as response:
+            response.raise_for_status()  # Gestione degli errori HTTP
+            info = _response_info(response.headers)
+            if not _should_split(info):
+                return _stream_single(url, store, response)
+        # File grande: la risposta completa viene chiusa e sostituita dalle richieste a segmenti
+        partial.start(info)
+
+    pending = partial.pending()
+    with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+        for future in [executor.submit(_fetch_segment, url, http, partial, segment) for segment in pending]:
+            future.result()
+    digest = _hash_file(partial.part_path)
+    path = store.commit(url, partial.part_path, digest, store.guess_extension(url, partial.content_type))
+    partial.remove(keep_data=True)
+    return path
+
+def _read_adaptive(response):
+    """Legge il corpo di una risposta requests con blocchi di dimensione crescente."""
+    chunk_size = MIN_CHUNK_SIZE
+    while True:
+        chunk = response.raw.read(chunk_size, decode_content=True)
+        if not chunk:
+            break
+        yield chunk
+        chunk_size = _next_chunk_size(chunk_size, len(chunk))
+
+def _stream_single(url, store, response):
+    """Scarica con un'unica richiesta un file piccolo o servito senza supporto ai Range."""
+    temp_path = store.new_temp_path()
+    try:
+        # Calcola l'hash mentre scrive, senza rileggere il file
+        with mediastore.HashingWriter(temp_path) as f:
+            for chunk in _read_adaptive(response):
+                f.write(chunk)
+    except Exception:
+        store.discard(temp_path)
+        raise
+    ext = store.guess_extension(url, response.headers.get('Content-Type'))
+    return store.commit(url, temp_path, f.hexdigest(), ext)
+
+def _fetch_segment(url, http, partial, segment):
+    """Scarica la parte mancante di un segmento scrivendola al suo offset nel file."""
+    with http.get(url, headers=partial.range_headers(segment), stream=True, timeout=(30, 60)) as response:
+        if response.status_code == 200:
+            raise ResourceChanged(url)
+        if response.status_code != 206:
+            raise ValueError(f"Risposta {response.status_code} alla richiesta Range")
+        # Scrittura senza buffer: i byte registrati nello stato sono già nel file
+        with open(partial.part_path, 'r+b', buffering=0) as f:
+            f.seek(segment[0] + segment[2])
+            for chunk in _read_adaptive(response):
+                remaining = segment[1] + 1 - segment[0] - segment[2]
+                if remaining <= 0:
+                    break
+                chunk = chunk[:remaining]
+                f.write(chunk)
+                partial.advance(segment, len(chunk))
+    if segment[0] + segment[2] <= segment[1]:
+        raise ValueError(f"Segmento {segment[0]}-{segment[1]} incompleto")
@@ -0,0 +1,312 @@
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+import aiohttp
+import downloader
+import scheduler
+from frontier import canonicalize_url
+
+# Priorità predefinite per tipo di file: a parità di priorità vale l'ordine di inserimento
+DEFAULT_PRIORITIES = {'documenti': 20, 'immagini': 10, 'file_video': 0, 'video': 0}
+
+# Secondi di validità della presa in carico di un download: rinnovata da DownloadWorkers
+# mentre il file è in corso, scaduta viene ripresa da un altro processo o dalla prossima esecuzione
+LEASE_SECONDS = 120
+
+class DownloadQueue:
+    """
+    Coda persistente dei file da scaricare, separata dall'estrazione delle pagine.
+
+    Gli estrattori vi inseriscono solo gli URL trovati; i download veri e propri
+    vengono eseguiti da DownloadWorkers. La coda è una tabella SQLite: i file non
+    ancora scaricati alla fine di un'esecuzione (o dopo un crash) vengono ripresi
+    alla successiva, e lo stesso URL (in forma canonica) non viene accodato due volte.
+
+    Più processi possono condividere lo stesso file: ogni istanza prende in carico i
+    download con un proprio identificativo (owner) e una scadenza (leased_until), che
+    rinnova finché il download è in corso; solo le prese in carico scadute (processo
+    terminato o bloccato) tornano disponibili.
+    """
+    def __init__(self, db_file='download_queue.db', priorities=None, max_attempts=3, lease_seconds=LEASE_SECONDS):
+        self.priorities = {**DEFAULT_PRIORITIES, **(priorities or {})}
+        self.max_attempts = max_attempts  # Tentativi prima di segnare un file come fallito
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex  # Identifica i download presi in carico da questa istanza
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            folder TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            path TEXT,
+            error TEXT,
+            added REAL,
+            updated REAL,
+            url_key TEXT,
+            owner TEXT,
+            leased_until REAL,
+            UNIQUE(url, kind)
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs(status, priority DESC, job_id);
+        """)
+        self._migrate()
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_url_key ON jobs(url_key, kind)")
+        self.conn.commit()
+
+    def _migrate(self):
+        """Aggiunge le colonne della chiave canonica e della presa in carico alle code create in precedenza."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in (('url_key', 'TEXT'), ('owner', 'TEXT'), ('leased_until', 'REAL')):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        rows = self.conn.execute("SELECT job_id, url FROM jobs WHERE url_key IS NULL").fetchall()
+        if rows:
+            # Le varianti dello stesso URL già presenti restano senza chiave (non vengono unite)
+            keys = {}
+            for job_id, url in rows:
+                keys.setdefault(canonicalize_url(url), job_id)
+            self.conn.executemany("UPDATE jobs SET url_key = ? WHERE job_id = ?", list(keys.items()))
+
+    def enqueue(self, urls, kind, folder, priority=None):
+        """
+        Accoda gli URL di un tipo di file ('immagini', 'documenti', 'file_video' o 'video').
+
+        Returns:
+            int: Il numero di URL effettivamente aggiunti (quelli già presenti vengono ignorati).
+        """
+        if priority is None:
+            priority = self.priorities.get(kind, 0)
+        now = time.time()
+        # Varianti dello stesso URL (parametri di tracciamento, frammento...) scaricherebbero lo
+        # stesso file parziale: conta la forma canonica, come in mediastore
+        rows = [(url, canonicalize_url(url), kind, folder, priority, now, now) for url in urls]
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.executemany("""
+                INSERT INTO jobs (url, url_key, kind, folder, priority, added, updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT DO NOTHING
+            """, rows)
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def claim(self, kinds=None):
+        """
+        Prende in carico il file in attesa con la priorità più alta (o un download la cui
+        presa in carico è scaduta).
+
+        Args:
+            kinds (list): Se indicata, considera solo i file di questi tipi.
+
+        Returns:
+            tuple: (job_id, url, kind, folder), o None se la coda è vuota.
+        """
+        kinds = list(kinds) if kinds is not None else list(self.priorities)
+        placeholders = ', '.join('?' * len(kinds))
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(f"""
+                UPDATE jobs SET status = 'running', attempts = attempts + 1, updated = ?,
+                       owner = ?, leased_until = ?
+                WHERE job_id = (
+                    SELECT job_id FROM jobs
+                    WHERE (status = 'pending' OR (status = 'running' AND IFNULL(leased_until, 0) < ?))
+                      AND kind IN ({placeholders})
+                    ORDER BY priority DESC, job_id LIMIT 1
+                )
+                RETURNING job_id, url, kind, folder
+            """, (now, self.owner, now + self.lease_seconds, now, *kinds)).fetchone()
+            self.conn.commit()
+        return row
+
+    def renew_leases(self):
+        """Prolunga la presa in carico di tutti i download in corso di questa istanza."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET leased_until = ? WHERE status = 'running' AND owner = ?",
+                (time.time() + self.lease_seconds, self.owner),
+            )
+            self.conn.commit()
+
+    def complete(self, job_id, path):
+        """Segna un download come completato."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'done', path = ?, error = NULL, updated = ?, owner = NULL WHERE job_id = ?",
+                (path, time.time(), job_id),
+            )
+            self.conn.commit()
+
+    def release(self, job_id):
+        """Rimette in coda un download interrotto prima di iniziare, senza contarlo come tentativo."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = attempts - 1, updated = ?, owner = NULL "
+                "WHERE job_id = ? AND owner = ?",
+                (time.time(), job_id, self.owner),
+            )
+            self.conn.commit()
+
+    def fail(self, job_id, error):
+        """Rimette in coda un download fallito, o lo segna come fallito dopo max_attempts tentativi."""
+        with self.lock:
+            self.conn.execute("""
+                UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                       error = ?, updated = ?, owner = NULL
+                WHERE job_id = ? AND owner = ?
+            """, (self.max_attempts, error, time.time(), job_id, self.owner))
+            self.conn.commit()
+
+    def counts(self):
+        """Restituisce il numero di download per stato (pending, running, done, failed)."""
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def close(self):
+        """Chiude la coda; i download ancora presi in carico da questa istanza tornano subito in attesa."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'pending', owner = NULL WHERE status = 'running' AND owner = ?",
+                (self.owner,),
+            )
+            self.conn.commit()
+            self.conn.close()
+
+class DownloadWorkers:
+    """
+    Stadio di download che consuma la DownloadQueue in un thread separato, con un
+    proprio event loop, una propria sessione HTTP e un numero fisso di worker.
+
+    Il crawl non attende i download: la velocità di visita delle pagine non dipende
+    più dalla dimensione dei file. La banda complessiva può essere limitata con
+    bandwidth (byte al secondo), tramite un TokenBucket condiviso dai worker.
+
+    I video (pagine ed embed) vengono passati al VideoDownloadService, che ha un proprio
+    pool di dimensione fissa: i worker non restano occupati per la durata di yt-dlp.
+    I file video diretti ('file_video') usano invece il downloader a segmenti Range.
+    """
+    def __init__(self, queue, concurrency=4, bandwidth=None, headers=None, poll_interval=0.5,
+                 video_service=None):
+        self.queue = queue
+        self.video_service = video_service  # VideoDownloadService per i job di tipo 'video'
+        self.concurrency = concurrency  # Download contemporanei
+        self.bandwidth = bandwidth  # Limite di banda in byte/s (None = nessun limite)
+        self.headers = headers
+        self.poll_interval = poll_interval  # Secondi di attesa quando la coda è vuota
+        self._thread = None
+        self._stopping = False  # Terminare quando la coda è vuota
+        self._aborting = False  # Terminare dopo il download in corso
+        self._renewing = threading.Event()  # Impostato per fermare il rinnovo delle prese in carico
+        self._renew_thread = None
+        # Video affidati al servizio yt-dlp e non ancora conclusi: con drain i worker li attendono,
+        # perché un video non riuscito torna in coda e va ripreso in questa stessa esecuzione
+        self._videos_in_flight = 0
+        self._videos_lock = threading.Lock()
+
+    def start(self):
+        """Avvia il thread dei download e quello che rinnova le prese in carico dei download in corso."""
+        self._thread = threading.Thread(target=self._run, name='download-workers', daemon=True)
+        self._thread.start()
+        self._renewing.clear()
+        self._renew_thread = threading.Thread(target=self._renew_leases, name='download-leases', daemon=True)
+        self._renew_thread.start()
+        return self
+
+    def _renew_leases(self):
+        # Anche i video affidati al servizio yt-dlp restano presi in carico fino alla fine
+        while not self._renewing.wait(self.queue.lease_seconds / 3):
+            self.queue.renew_leases()
+
+    def stop(self, drain=True):
+        """
+        Ferma lo stadio di download.
+
+        Args:
+            drain (bool): Se True attende che la coda sia svuotata, compresi i video ancora in corso
+                          nel servizio yt-dlp e i loro nuovi tentativi; altrimenti i worker si fermano
+                          dopo il file in corso e i download rimanenti restano in coda per la prossima esecuzione.
+        """
+        self._stopping = True
+        self._aborting = not drain
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.video_service is not None:
+            self.video_service.close(wait=drain)
+        if self._renew_thread is not None:
+            self._renewing.set()
+            self._renew_thread.join()
+            self._renew_thread = None
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        throttle = None
+        if self.bandwidth:
+            # Capacità pari a un secondo di banda: brevi picchi ammessi, media limitata
+            throttle = scheduler.TokenBucket(self.bandwidth, capacity=self.bandwidth).acquire
+        connector = aiohttp.TCPConnector(limit=self.concurrency * downloader.MAX_SEGMENTS)
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector) as session:
+            await asyncio.gather(*(self._worker(session, throttle) for _ in range(self.concurrency)))
+
+    def _submit_video(self, job_id, url):
+        """Affida un video al servizio yt-dlp; l'esito aggiorna la coda quando il download termina."""
+        def done(future):
+            try:
+                if future.cancelled():
+                    self.queue.release(job_id)
+                elif future.result():
+                    self.queue.complete(job_id, future.result())
+                else:
+                    self.queue.fail(job_id, 'Download non riuscito')
+            finally:
+                # Solo dopo l'aggiornamento della coda: un job tornato in attesa è già visibile ai worker
+                with self._videos_lock:
+                    self._videos_in_flight -= 1
+        with self._videos_lock:
+            self._videos_in_flight += 1
+        try:
+            future = self.video_service.submit(url)
+        except Exception:
+            with self._videos_lock:
+                self._videos_in_flight -= 1
+            raise
+        future.add_done_callback(done)
+
+    async def _worker(self, session, throttle):
+        # Senza servizio video i job di tipo 'video' restano in coda per un'esecuzione che lo preveda
+        kinds = [kind for kind in self.queue.priorities if kind != 'video' or self.video_service is not None]
+        while not self._aborting:
+            # Letto prima di claim: un video concluso dopo la lettura tiene vivo il worker per un altro giro
+            videos_in_flight = self._videos_in_flight
+            job = self.queue.claim(kinds)
+            if job is None:
+                if self._stopping and not videos_in_flight:
+                    return
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            job_id, url, kind, folder = job
+            if kind == 'video':
+                self._submit_video(job_id, url)
+                continue
+            try:
+                path = await downloader.download_file_async(url, folder, None, session, throttle)
+            except Exception as e:
+                print(f"Errore durante il download di {url}: {e}")
+                path = None
+
+            if path:
+                self.queue.complete(job_id, path)
+            else:
+                self.queue.fail(job_id, 'Download non riuscito')
@@ -1,381 +1,232 @@
-import re
-import os
-import utils
-import downloader
-from bs4 import BeautifulSoup
-import asyncio
-import yt_dlp
-
-class TextExtractor:
-    def __init__(self, soup, link):
-        self.soup = soup
-        self.link = link
-        self.methods = [
-            self._extract_with_beautifulsoup,
-            self._extract_with_regex,  # Aggiungi altri metodi di estrazione del testo
-            # ...
-        ]
-
-    def extract_sync(self):
-        """Estrae il testo in modalità sincrona, provando diversi metodi."""
-        text = ""
-        for method in self.methods:
-            try:
-                text = method()
-                if text:
-                    return text # Restituisci il testo non appena è disponibile
-            except Exception as e:
-                print(f"Errore con il metodo {method.__name__} per il testo: {e}")
-
-        return text
-
-    async def extract_async(self):
-        """Estrae il testo in modalità asincrona, provando diversi metodi in parallelo."""
-        loop = asyncio.get_event_loop()
-        tasks = [loop.run_in_executor(None, method) for method in self.methods]
-        results = await asyncio.gather(*tasks)
-        for text in results:
-            if text:
-                return text # Restituisci il testo non appena è disponibile
-
-        return ""
-
-    def _extract_with_beautifulsoup(self):
-        """Estrae il testo usando BeautifulSoup."""
-        text = self.soup.get_text(separator=' ', strip=True)
-        return text
-
-    def _extract_with_regex(self):
-      """Estrae il testo usando espressioni regolari (esempio)."""
-      text = ""
-      for tag in self.soup.find_all(text=True):
-          if tag.parent.name not in ['script', 'style']:  # Escludi script e style
-              content = tag.strip()
-              if content:
-                  text += content + " "
-      return text.strip()
-
-class ImageExtractor:
-    def __init__(self, soup, link):
-        self.soup = soup
-        self.link = link
-        self.methods = [
-            self._extract_with_beautifulsoup,
-            # Aggiungi altri metodi di estrazione immagini
-            # ...
-        ]
-        self.download_folder = 'downloaded_images'
-
-    def extract_sync(self):
-        """Estrae le immagini in modalità sincrona."""
-        image_urls = []
-        for method in self.methods:
-            try:
-                urls = method()
-                if urls:
-                    image_urls.extend(urls)
-            except Exception as e:
-                print(f"Errore con il metodo {method.__name__} per le immagini: {e}")
-        
-        # Scarica le immagini
-        if image_urls:
-          downloader.download_files(image_urls, self.download_folder, self.link)
-        return list(set(image_urls)) # Rimuovi duplicati
-
-    async def extract_async(self):
-        """Estrae le immagini in modalità asincrona."""
-        loop = asyncio.get_event_loop()
-        tasks = [loop.run_in_executor(None, method) for method in self.methods]
-        results = await asyncio.gather(*tasks)
-        image_urls = []
-        for urls in results:
-            if urls:
-                image_urls.extend(urls)
-
-        # Scarica le immagini
-        if image_urls:
-          await downloader.download_files_async(image_urls, self.download_folder, self.link)
-        return list(set(image_urls)) # Rimuovi duplicati
-
-    def _extract_with_beautifulsoup(self):
-        """Estrae gli URL delle immagini usando BeautifulSoup."""
-        image_urls = []
-        for img_tag in self.soup.find_all('img'):
-            src = img_tag.get('src')
-            data_src = img_tag.get('data-src')  # Gestisci anche data-src
-            
-            if src:
-              image_urls.append(utils.make_absolute_url(src, self.link))
-            if data_src:
-              image_urls.append(utils.make_absolute_url(data_src, self.link))
-        return image_urls
-
-class LinkExtractor:
-    def __init__(self, soup):
-        self.soup = soup
-        self.methods = [
-            self._extract_with_beautifulsoup,
-            # Aggiungi altri metodi
-            # ...
-        ]
-
-    def extract_sync(self):
-        """Estrae i link in modalità sincrona."""
-        links = []
-        for method in self.methods:
-            try:
-                extracted_links = method()
-                if extracted_links:
-                    links.extend(extracted_links)
-            except Exception as e:
-                print(f"Errore con il metodo {method.__name__} per i link: {e}")
-        return list(set(links)) # Rimuovi duplicati
-
-    async def extract_async(self):
-      """Estrae i link in modalità asincrona"""
-      loop = asyncio.get_event_loop()
-      tasks = [loop.run_in_executor(None, method) for method in self.methods]
-      results = await asyncio.gather(*tasks)
-      links = []
-      for extracted_links in results:
-          if extracted_links:
-              links.extend(extracted_links)
-      return list(set(links)) # Rimuovi duplicati
-
-    def _extract_with_beautifulsoup(self):
-        """Estrae i link usando BeautifulSoup."""
-        links = []
-        for a_tag in self.soup.find_all('a', href=True):
-            links.append(a_tag['href'])
-        return links
-
-class VideoExtractor:
-    def __init__(self, soup, link):
-        self.soup = soup
-        self.link = link
-        self.methods = [
-            self._extract_with_beautifulsoup,
-            # Aggiungi altri metodi di estrazione video se necessario
-            # ...
-        ]
-        self.download_folder = 'downloaded_videos'
-
-    def extract_sync(self):
-        """Estrae i video in modalità sincrona."""
-        video_urls = []
-        for method in self.methods:
-            try:
-                urls = method()
-                if urls:
-                    video_urls.extend(urls)
-            except Exception as e:
-                print(f"Errore con il metodo {method.__name__} per i video: {e}")
-
-        if video_urls:
-            self.download_videos_with_ytdlp(video_urls)  # Usa yt-dlp
-        return list(set(video_urls))
-
-    async def extract_async(self):
-        """Estrae i video in modalità asincrona."""
-        loop = asyncio.get_event_loop()
-        tasks = [loop.run_in_executor(None, method) for method in self.methods]
-        results = await asyncio.gather(*tasks)
-        video_urls = []
-        for urls in results:
-            if urls:
-                video_urls.extend(urls)
-
-        if video_urls:
-            await self.download_videos_with_ytdlp_async(video_urls)  # Usa yt-dlp
-        return list(set(video_urls))
-
-    def _extract_with_beautifulsoup(self):
-        """Estrae gli URL dei video usando BeautifulSoup."""
-        video_urls = []
-        for video_tag in self.soup.find_all('video'):
-            src = video_tag.get('src')
-            if src:
-                video_urls.append(utils.make_absolute_url(src, self.link))
-            for source_tag in video_tag.find_all('source'):
-                src = source_tag.get('src')
-                if src:
-                    video_urls.append(utils.make_absolute_url(src, self.link))
-
-        # iframe (e.g., YouTube, Vimeo, Dailymotion)
-        for iframe_tag in self.soup.find_all('iframe'):
-            src = iframe_tag.get('src')
-            if src and any(domain in src for domain in ['youtube.com', 'vimeo.com', 'dailymotion.com']):
-                video_urls.append(utils.make_absolute_url(src, self.link))
-
-        # Link diretti (es. tag 'a' con href a .mp4, .webm, etc.)
-        for a_tag in self.soup.find_all('a', href=True):
-            if any(a_tag['href'].endswith(ext) for ext in ['.mp4', '.webm', '.ogg', '.mov']):
-                video_urls.append(utils.make_absolute_url(a_tag['href'], self.link))
-
-        return video_urls
-
-    def download_videos_with_ytdlp(self, video_urls):
-        """Scarica i video usando yt-dlp in modalità sincrona."""
-        os.makedirs(self.download_folder, exist_ok=True)  # Crea la cartella se non esiste
-        ydl_opts = {
-            'outtmpl': os.path.join(self.download_folder, '%(title)s.%(ext)s'),
-            'noplaylist': True,  # Ignora i video che fanno parte di playlist
-            # Aggiungi altre opzioni yt-dlp se necessario
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            error_code = ydl.download(video_urls)
-            if error_code != 0:
-                print(f"Errore durante il download con yt-dlp per alcuni video")
-
-    async def download_videos_with_ytdlp_async(self, video_urls):
-        """Scarica i video usando yt-dlp in modalità asincrona."""
-        os.makedirs(self.download_folder, exist_ok=True)  # Crea la cartella se non esiste
-
-        async def download_single_video(url):
-            """Scarica un singolo video usando yt-dlp."""
-            ydl_opts = {
-                'outtmpl': os.path.join(self.download_folder, '%(title)s.%(ext)s'),
-                'noplaylist': True,
-                # Aggiungi altre opzioni yt-dlp se necessario
-            }
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                try:
-                    await loop.run_in_executor(None, lambda: ydl.download([url]))
-                except Exception as e:
-                    print(f"Errore durante il download di {url}: {e}")
-
-        loop = asyncio.get_event_loop()
-        tasks = [download_single_video(url) for url in video_urls]
-        await asyncio.gather(*tasks)
-
-class EmailExtractor:
-    def __init__(self, soup):
-        self.soup = soup
-        self.methods = [
-            self._extract_with_regex,
-            # Aggiungi altri metodi
-            # ...
-        ]
-
-    def extract_sync(self):
-        """Estrae le email in modalità sincrona."""
-        emails = []
-        for method in self.methods:
-            try:
-                extracted_emails = method()
-                if extracted_emails:
-                    emails.extend(extracted_emails)
-            except Exception as e:
-                print(f"Errore con il metodo {method.__name__} per le email: {e}")
-        return list(set(emails))
-
-    async def extract_async(self):
-      """Estrae le email in modalità asincrona"""
-      loop = asyncio.get_event_loop()
-      tasks = [loop.run_in_executor(None, method) for method in self.methods]
-      results = await asyncio.gather(*tasks)
-      emails = []
-      for extracted_emails in results:
-          if extracted_emails:
-              emails.extend(extracted_emails)
-      return list(set(emails))
-
-    def _extract_with_regex(self):
-        """Estrae le email usando espressioni regolari."""
-        email_pattern = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
-        emails = re.findall(email_pattern, self.soup.get_text())
-        return emails
-
-class PhoneNumberExtractor:
-    def __init__(self, soup):
-        self.soup = soup
-        self.methods = [
-            self._extract_with_regex,
-            # Aggiungi altri metodi
-            # ...
-        ]
-
-    def extract_sync(self):
-      """Estrae i numeri di telefono in modalità sincrona."""
-      phone_numbers = []
-      for method in self.methods:
-          try:
-              extracted_numbers = method()
-              if extracted_numbers:
-                  phone_numbers.extend(extracted_numbers)
-          except Exception as e:
-              print(f"Errore con il metodo {method.__name__} per i numeri di telefono: {e}")
-      return list(set(phone_numbers))
-
-    async def extract_async(self):
-      """Estrae i numeri di telefono in modalità asincrona"""
-      loop = asyncio.get_event_loop()
-      tasks = [loop.run_in_executor(None, method) for method in self.methods]
-      results = await asyncio.gather(*tasks)
-      phone_numbers = []
-      for extracted_numbers in results:
-          if extracted_numbers:
-              phone_numbers.extend(extracted_numbers)
-      return list(set(phone_numbers))
-
-    def _extract_with_regex(self):
-        """Estrae i numeri di telefono usando espressioni regolari."""
-        phone_patterns = [
-            r"\+?\d[\d -]{8,12}\d",  # Numeri internazionali e nazionali
-            # Aggiungi altri pattern per altri formati se necessario
-            # ...
-        ]
-        phone_numbers = []
-        for pattern in phone_patterns:
-            matches = re.findall(pattern, self.soup.get_text())
-            phone_numbers.extend(matches)
-        return phone_numbers
-
-class DocumentExtractor:
-    def __init__(self, soup, link):
-        self.soup = soup
-        self.link = link
-        self.methods = [
-            self._extract_with_beautifulsoup,
-            # Aggiungi altri metodi
-            # ...
-        ]
-        self.download_folder = 'downloaded_documents'
-
-    def extract_sync(self):
-        """Estrae i documenti in modalità sincrona."""
-        document_urls = []
-        for method in self.methods:
-            try:
-                urls = method()
-                if urls:
-                    document_urls.extend(urls)
-            except Exception as e:
-                print(f"Errore con il metodo {method.__name__} per i documenti: {e}")
-
-        if document_urls:
-          downloader.download_files(document_urls, self.download_folder, self.link)
-        return list(set(document_urls))
-
-    async def extract_async(self):
-        """Estrae i documenti in modalità asincrona."""
-        loop = asyncio.get_event_loop()
-        tasks = [loop.run_in_executor(None, method) for method in self.methods]
-        results = await asyncio.gather(*tasks)
-        document_urls = []
-        for urls in results:
-            if urls:
-                document_urls.extend(urls)
-
-        if document_urls:
-          await downloader.download_files_async(document_urls, self.download_folder, self.link)
-        return list(set(document_urls))
-
-    def _extract_with_beautifulsoup(self):
-        """Estrae gli URL dei documenti usando BeautifulSoup."""
-        document_urls = []
-        for a_tag in self.soup.find_all('a', href=True):
-            href = a_tag['href']
-            if any(href.endswith(ext) for ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar', '.txt']):
-                document_urls.append(utils.make_absolute_url(href, self.link))
-        return document_urls
\ No newline at end of file
+import os
+import utils
+import asyncio
+import pageview
+from urllib.parse import urlsplit
+
+# File video scaricabili direttamente: vanno al downloader a segmenti Range (tipo 'file_video'),
+# mentre pagine ed embed (YouTube, Vimeo, ...) vanno a yt-dlp (tipo 'video')
+VIDEO_FILE_EXTENSIONS = ('.mp4', '.webm', '.ogg', '.mov')
+VIDEO_FILE_KIND = 'file_video'
+# I file video hanno un proprio archivio (MediaStore), separato dai video scaricati da yt-dlp
+VIDEO_FILE_FOLDER = os.path.join('downloaded_videos', 'files')
+
+def is_video_file(url):
+    """Indica se l'URL punta direttamente a un file video (in base all'estensione del percorso)."""
+    return urlsplit(url).path.lower().endswith(VIDEO_FILE_EXTENSIONS)
+
+class Extractor:
+    """
+    Base comune degli estrattori: una sola implementazione per la modalità sincrona e asincrona.
+
+    Ogni sottoclasse elenca in self.methods i propri metodi di estrazione, dal principale
+    ai fallback. Con first_result = True i fallback vengono eseguiti solo se i metodi
+    precedenti non hanno trovato nulla; altrimenti i risultati di tutti i metodi vengono
+    uniti senza duplicati.
+
+    I metodi lavorano sulla PageView già in memoria, quindi vengono eseguiti direttamente
+    nel thread chiamante: extract_async non usa run_in_executor, ma cede il controllo
+    all'event loop tra un metodo e l'altro, così l'estrazione può essere annullata.
+    """
+    feature = None  # Chiave del risultato in page_data
+    label = None  # Nome usato nei messaggi di errore
+    first_result = False  # True: primo risultato non vuoto; False: unione dei risultati
+    download_kind = None  # Tipo di file da accodare nella coda dei download (solo estrattori multimediali)
+    download_folder = None
+
+    def __init__(self, page, link=None, download_queue=None, options=None):
+        self.page = page  # PageView della pagina
+        self.link = link
+        self.download_queue = download_queue  # Coda dei download (opzionale): gli URL vengono solo accodati
+        self.options = options or {}  # Opzioni specifiche dell'estrattore (es. text_mode per il testo)
+        self.methods = [
+            self._extract_from_page,
+            # Le sottoclassi possono aggiungere qui metodi alternativi
+        ]
+
+    def _run_method(self, method):
+        try:
+            return method()
+        except Exception as e:
+            print(f"Errore con il metodo {method.__name__} per {self.label}: {e}")
+            return None
+
+    def _combine(self, results):
+        """Unisce i risultati dei metodi eseguiti (rimuovendo i duplicati)."""
+        combined = []
+        for result in results:
+            if result:
+                combined.extend(result)
+        return list(set(combined))
+
+    @classmethod
+    def enqueue_downloads(cls, download_queue, urls):
+        """Accoda gli URL trovati nella coda dei download, con il tipo di file dell'estrattore."""
+        download_queue.enqueue(urls, cls.download_kind, cls.download_folder)
+
+    def _finish(self, results):
+        if self.first_result:
+            return results[-1] if results and results[-1] else self.empty()
+        values = self._combine(results)
+        # Accoda i file: il download avviene nello stadio separato della coda
+        if values and self.download_kind and self.download_queue is not None:
+            self.enqueue_downloads(self.download_queue, values)
+        return values
+
+    def empty(self):
+        """Risultato restituito se nessun metodo trova nulla."""
+        return [] if not self.first_result else ""
+
+    def extract_sync(self):
+        """Esegue l'estrazione in modalità sincrona."""
+        results = []
+        for method in self.methods:
+            results.append(self._run_method(method))
+            if self.first_result and results[-1]:
+                break # Risultato trovato: i fallback non servono
+        return self._finish(results)
+
+    async def extract_async(self):
+        """Esegue l'estrazione in modalità asincrona, cedendo il controllo tra un metodo e l'altro."""
+        results = []
+        for method in self.methods:
+            results.append(self._run_method(method))
+            if self.first_result and results[-1]:
+                break # Risultato trovato: i fallback non servono
+            await asyncio.sleep(0)
+        return self._finish(results)
+
+    def _extract_from_page(self):
+        raise NotImplementedError
+
+class TextExtractor(Extractor):
+    """
+    Opzioni:
+        text_mode: 'full' (tutto il testo visibile) o 'main' (solo il contenuto principale,
+                   con il testo completo come fallback se non viene riconosciuto).
+        max_text_bytes: dimensione massima in byte (UTF-8) del testo restituito.
+    """
+    feature = 'testo'
+    label = 'il testo'
+    first_result = True
+
+    def __init__(self, page, link=None, download_queue=None, options=None):
+        super().__init__(page, link, download_queue, options)
+        if self.options.get('text_mode') == 'main':
+            self.methods.insert(0, self._extract_main_content)
+
+    def _extract_main_content(self):
+        """Restituisce solo il contenuto principale della pagina, senza menu, footer e banner."""
+        return self.page.main_text(self.options.get('max_text_bytes'))
+
+    def _extract_from_page(self):
+        """Restituisce il testo visibile raccolto dalla PageView (script e style esclusi)."""
+        max_bytes = self.options.get('max_text_bytes')
+        if max_bytes is None:
+            return self.page.text
+        return pageview.build_text(self.page.text_nodes, max_bytes)
+
+class ImageExtractor(Extractor):
+    feature = 'immagini'
+    label = 'le immagini'
+    download_kind = 'immagini'
+    download_folder = 'downloaded_images'
+
+    def _extract_from_page(self):
+        """Estrae gli URL delle immagini dai tag <img> della PageView."""
+        image_urls = []
+        for src, data_src in self.page.images:  # Gestisci anche data-src
+            if src:
+              image_urls.append(utils.make_absolute_url(src, self.link))
+            if data_src:
+              image_urls.append(utils.make_absolute_url(data_src, self.link))
+        return image_urls
+
+class LinkExtractor(Extractor):
+    feature = 'link'
+    label = 'i link'
+
+    def _extract_from_page(self):
+        """Estrae i link dai tag <a> della PageView."""
+        return list(self.page.anchors)
+
+class VideoExtractor(Extractor):
+    feature = 'video'
+    label = 'i video'
+    download_kind = 'video'
+    download_folder = 'downloaded_videos'
+
+    @classmethod
+    def enqueue_downloads(cls, download_queue, urls):
+        """I file video diretti vanno al downloader a segmenti Range, gli altri URL a yt-dlp."""
+        files = [url for url in urls if is_video_file(url)]
+        pages = [url for url in urls if not is_video_file(url)]
+        if files:
+            download_queue.enqueue(files, VIDEO_FILE_KIND, VIDEO_FILE_FOLDER)
+        if pages:
+            download_queue.enqueue(pages, cls.download_kind, cls.download_folder)
+
+    def _extract_from_page(self):
+        """Estrae gli URL dei video dai nodi <video>, <source>, <iframe> e <a> della PageView."""
+        video_urls = []
+        for src in self.page.video_sources:
+            video_urls.append(utils.make_absolute_url(src, self.link))
+
+        # iframe (e.g., YouTube, Vimeo, Dailymotion)
+        for src in self.page.iframes:
+            if any(domain in src for domain in ['youtube.com', 'vimeo.com', 'dailymotion.com']):
+                video_urls.append(utils.make_absolute_url(src, self.link))
+
+        # Link diretti (es. tag 'a' con href a .mp4, .webm, etc.)
+        for href in self.page.anchors:
+            if href.endswith(VIDEO_FILE_EXTENSIONS):
+                video_urls.append(utils.make_absolute_url(href, self.link))
+
+        return video_urls
+
+class EmailExtractor(Extractor):
+    feature = 'email'
+    label = 'le email'
+
+    def _extract_from_page(self):
+        """Restituisce le email (in minuscolo) trovate nel testo della PageView."""
+        return self.page.contacts[0]
+
+class PhoneNumberExtractor(Extractor):
+    feature = 'numeri_telefono'
+    label = 'i numeri di telefono'
+
+    def _extract_from_page(self):
+        """
+        Restituisce i numeri di telefono, in formato E.164, trovati nel testo della PageView.
+        I pattern sono in contacts.PHONE_PATTERN.
+        """
+        return self.page.contacts[1]
+
+class DocumentExtractor(Extractor):
+    feature = 'documenti'
+    label = 'i documenti'
+    download_kind = 'documenti'
+    download_folder = 'downloaded_documents'
+
+    def _extract_from_page(self):
+        """Estrae gli URL dei documenti dai tag <a> della PageView."""
+        document_urls = []
+        for href in self.page.anchors:
+            if any(href.endswith(ext) for ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar', '.txt']):
+                document_urls.append(utils.make_absolute_url(href, self.link))
+        return document_urls
+
+# Estrattore associato a ogni feature
+EXTRACTORS = {
+    extractor.feature: extractor
+    for extractor in (TextExtractor, ImageExtractor, LinkExtractor, VideoExtractor,
+                      EmailExtractor, PhoneNumberExtractor, DocumentExtractor)
+}
+
+def create_extractors(features, page, link, download_queue=None, options=None):
+    """
+    Crea gli estrattori per le feature richieste, nello stesso ordine.
+    Le feature sconosciute vengono ignorate.
+    """
+    return [EXTRACTORS[feature](page, link, download_queue, options) for feature in features if feature in EXTRACTORS]
@@ -0,0 +1,117 @@
+import re
+
+# Tipi di contenuto analizzati come pagine; tutti gli altri vanno allo stadio dei download
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# Dimensione massima predefinita del corpo di una pagina: oltre, la pagina viene troncata
+DEFAULT_MAX_PAGE_BYTES = 10 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# Se il server non dichiara il Content-Type, il tipo viene riconosciuto dai primi byte
+SNIFF_BYTES = 1024
+HTML_SIGNATURE = re.compile(rb'^\s*(?:<\?xml[^>]*>\s*)?(?:<!--.*?-->\s*)*<(?:!doctype\s+html|html|head|body|title|meta|div|p|script)[\s>/]',
+                            re.IGNORECASE | re.DOTALL)
+
+class NonHtmlResponse(Exception):
+    """La risposta non è una pagina HTML: il corpo non viene letto né analizzato."""
+    def __init__(self, url, content_type):
+        super().__init__(f"Contenuto non HTML ({content_type or 'tipo sconosciuto'}): {url}")
+        self.url = url
+        self.content_type = content_type
+
+def media_type(content_type):
+    """Tipo MIME senza parametri, in minuscolo (es. 'text/html; charset=utf-8' -> 'text/html')."""
+    return (content_type or '').split(';', 1)[0].strip().lower()
+
+def looks_like_html(prefix):
+    """Riconosce l'HTML dai primi byte, per le risposte senza Content-Type."""
+    return bool(HTML_SIGNATURE.match(prefix.lstrip(b'\xef\xbb\xbf')[:SNIFF_BYTES]))
+
+def _check_headers(url, headers, max_bytes):
+    """
+    Controlla gli header prima di leggere il corpo.
+
+    Returns:
+        bool: True se il tipo va riconosciuto dai primi byte (Content-Type assente).
+
+    Raises:
+        NonHtmlResponse: Se il Content-Type dichiarato non è HTML.
+    """
+    content_type = media_type(headers.get('Content-Type'))
+    if content_type and content_type not in HTML_CONTENT_TYPES:
+        raise NonHtmlResponse(url, content_type)
+    length = headers.get('Content-Length', '')
+    if max_bytes and length.isdigit() and int(length) > max_bytes:
+        print(f"La pagina {url} è di {int(length)} byte: verranno letti solo i primi {max_bytes}")
+    return not content_type
+
+class BodyReader:
+    """
+    Accumula i blocchi del corpo fino a max_bytes, così la memoria usata da ogni
+    pagina resta limitata qualunque sia la dimensione della risposta. Comune alla
+    lettura sincrona (requests) e asincrona (aiohttp).
+    """
+    def __init__(self, url, headers, max_bytes=DEFAULT_MAX_PAGE_BYTES, sink=None):
+        self.url = url
+        self.max_bytes = max_bytes
+        self.sink = sink  # Parser incrementale che riceve i blocchi man mano (opzionale)
+        self.sniff = _check_headers(url, headers, max_bytes)
+        self.buffer = bytearray()
+        self.truncated = False
+
+    def feed(self, chunk):
+        """
+        Aggiunge un blocco del corpo.
+
+        Returns:
+            bool: False quando è stato raggiunto il limite e la lettura va interrotta.
+        """
+        if self.max_bytes and len(self.buffer) + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - len(self.buffer)]
+            self.truncated = True
+        self.buffer += chunk
+        if self.sniff and len(self.buffer) >= SNIFF_BYTES:
+            self._sniff()
+        if self.sink is not None and chunk and not self.sink.feed(chunk):
+            return False # Il parser ha già tutto ciò che serve: il resto del corpo non viene letto
+        return not self.truncated
+
+    def _sniff(self):
+        self.sniff = False
+        if not looks_like_html(self.buffer):
+            raise NonHtmlResponse(self.url, None)
+
+    def result(self):
+        """Restituisce il corpo letto (eventualmente troncato a max_bytes)."""
+        if self.sniff:
+            self._sniff()  # Corpo più corto di SNIFF_BYTES
+        if self.truncated:
+            print(f"Pagina {self.url} troncata a {self.max_bytes} byte")
+        return bytes(self.buffer)
+
+def read_body_sync(response, max_bytes=DEFAULT_MAX_PAGE_BYTES):
+    """
+    Legge in streaming il corpo di una risposta requests ottenuta con stream=True.
+
+    Returns:
+        tuple: (corpo in bytes, True se il corpo è stato troncato a max_bytes)
+
+    Raises:
+        NonHtmlResponse: Se la risposta non è HTML (riconosciuto dagli header o dai primi byte).
+    """
+    reader = BodyReader(response.url, response.headers, max_bytes)
+    for chunk in response.iter_content(CHUNK_SIZE):
+        if not reader.feed(chunk):
+            break
+    return reader.result(), reader.truncated
+
+async def read_body_async(response, max_bytes=DEFAULT_MAX_PAGE_BYTES, sink=None):
+    """
+    Versione asincrona di read_body_sync per le risposte aiohttp. Se indicato, sink
+    (es. parsers.StreamingParser) riceve ogni blocco appena arriva e può fermare la lettura.
+    """
+    reader = BodyReader(str(response.url), response.headers, max_bytes, sink)
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        if not reader.feed(chunk):
+            break
+    return reader.result(), reader.truncated
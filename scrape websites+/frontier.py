@@ -0,0 +1,233 @@
+import hashlib
+import heapq
+import math
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import utils
+
+# Parametri di tracciamento rimossi durante la canonicalizzazione degli URL
+TRACKING_PARAMS = {
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'spm', 'srsltid',
+}
+TRACKING_PREFIXES = ('utm_',)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonicalize_url(url):
+    """
+    Restituisce la forma canonica di un URL, usata per la deduplicazione:
+    schema e host in minuscolo, porta di default rimossa, frammento rimosso,
+    parametri di tracciamento eliminati e query string ordinata.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if ':' in host:
+        host = f"[{host}]"  # Letterale IPv6: hostname restituisce l'indirizzo senza parentesi
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else '')
+        netloc = f"{userinfo}@{netloc}"
+
+    path = parts.path or '/'
+    query_params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query = urlencode(sorted(query_params))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+class BloomFilter:
+    """
+    Insieme probabilistico a memoria limitata per gli URL già visti.
+    Non produce falsi negativi; la probabilità di falsi positivi resta intorno a
+    error_rate finché non si superano 'capacity' elementi.
+    Con i valori di default (10 milioni di URL, 0.1%) occupa circa 18 MB.
+    """
+    def __init__(self, capacity=10_000_000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing (Kirsch-Mitzenmacher) a partire da un unico digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        """Aggiunge un elemento. Restituisce False se era (probabilmente) già presente."""
+        added = False
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item):
+        return all(self.bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+# Dimensionamento automatico del BloomFilter degli URL visti: sotto-link stimati per pagina,
+# capacità minima e massima (10 milioni di URL occupano circa 18 MB)
+ESTIMATED_LINKS_PER_PAGE = 50
+MIN_SEEN_CAPACITY = 1024
+MAX_SEEN_CAPACITY = 10_000_000
+
+class URLFrontier:
+    """
+    Frontiera di crawling: coda di priorità degli URL da visitare con limite di
+    profondità, ambito (stesso dominio o lista di domini consentiti) e
+    deduplicazione degli URL canonici tramite BloomFilter.
+
+    L'ordine di default è breadth-first (priorità = profondità); si può passare
+    priority_fn(url, depth) per un ordinamento personalizzato (valori più bassi prima).
+
+    Il BloomFilter viene creato solo all'arrivo dei seed e, se seen_capacity è None,
+    dimensionato su seed, max_depth e max_urls: con max_depth=0 occupa pochi KB.
+    """
+    def __init__(self, max_depth=0, same_domain=True, allowed_domains=None, priority_fn=None,
+                 max_urls=None, seen_capacity=None, seen_error_rate=0.001):
+        self.max_depth = max_depth
+        self.same_domain = same_domain
+        self.allowed_domains = {d.lower().lstrip('.') for d in allowed_domains or []}
+        self.priority_fn = priority_fn
+        self.max_urls = max_urls  # Numero massimo di URL accodati (None = nessun limite)
+        self.seen_capacity = seen_capacity
+        self.seen_error_rate = seen_error_rate
+        self.seen = None  # BloomFilter creato da add_seeds() o dal primo add()
+        self.seed_hosts = set()
+        self.queue = []
+        self.in_progress = {}  # URL estratti dalla coda -> profondità
+        self.enqueued = 0
+        self._counter = 0  # Mantiene stabile l'ordine a parità di priorità
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __bool__(self):
+        return bool(self.queue)
+
+    @staticmethod
+    def _host(url):
+        host = (urlsplit(url).hostname or '').lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def _in_scope(self, url):
+        host = self._host(url)
+        if self.allowed_domains:
+            return any(host == d or host.endswith('.' + d) for d in self.allowed_domains)
+        if self.same_domain:
+            return any(host == h or host.endswith('.' + h) for h in self.seed_hosts)
+        return True
+
+    def _estimate_capacity(self, seed_count):
+        """URL che la frontiera può vedere al massimo: seed più i sotto-link stimati fino a max_depth."""
+        capacity = seed_count * ESTIMATED_LINKS_PER_PAGE ** self.max_depth
+        if self.max_urls is not None:
+            capacity = min(capacity, seed_count + self.max_urls)
+        return min(MAX_SEEN_CAPACITY, max(MIN_SEEN_CAPACITY, capacity))
+
+    def _seen_filter(self, seed_count=0):
+        if self.seen is None:
+            capacity = self.seen_capacity or self._estimate_capacity(seed_count)
+            self.seen = BloomFilter(capacity, self.seen_error_rate)
+        return self.seen
+
+    def _push(self, url, depth):
+        priority = self.priority_fn(url, depth) if self.priority_fn else depth
+        heapq.heappush(self.queue, (priority, self._counter, url, depth))
+        self._counter += 1
+        self.enqueued += 1
+
+    def add_seeds(self, links):
+        """
+        Accoda i link iniziali a profondità 0. I seed vengono accodati così come
+        sono stati forniti (restano le chiavi dei risultati) ma deduplicati in forma canonica.
+        """
+        links = list(links)
+        seen = self._seen_filter(len(links))
+        for link in links:
+            self.seed_hosts.add(self._host(link))
+        for link in links:
+            if seen.add(canonicalize_url(link)):
+                self._push(link, 0)
+
+    def add(self, url, depth):
+        """
+        Accoda un URL scoperto se rientra in profondità, ambito e limiti e non è già stato visto.
+
+        Returns:
+            bool: True se l'URL è stato accodato.
+        """
+        if depth > self.max_depth:
+            return False
+        if self.max_urls is not None and self.enqueued >= self.max_urls:
+            return False
+        if urlsplit(url).scheme.lower() not in ('http', 'https'):
+            return False
+        canonical = canonicalize_url(url)
+        if not self._in_scope(canonical):
+            return False
+        if not self._seen_filter().add(canonical):
+            return False
+        self._push(canonical, depth)
+        return True
+
+    def pop_batch(self, size):
+        """Estrae fino a 'size' URL in ordine di priorità."""
+        batch = []
+        while self.queue and len(batch) < size:
+            _, _, url, depth = heapq.heappop(self.queue)
+            self.in_progress[url] = depth
+            batch.append(url)
+        return batch
+
+    def should_expand(self, url):
+        """Indica se vale la pena estrarre i sotto-link della pagina (profondità non esaurita)."""
+        depth = self.in_progress.get(url)
+        return depth is not None and depth < self.max_depth
+
+    def add_child(self, parent_url, href):
+        """
+        Accoda subito un sotto-link di una pagina ancora in elaborazione (parsing incrementale),
+        senza segnarla come completata: expand() va chiamato comunque alla fine.
+
+        Returns:
+            bool: True se l'URL è stato accodato.
+        """
+        depth = self.in_progress.get(parent_url)
+        if depth is None or depth >= self.max_depth:
+            return False
+        return self.add(utils.make_absolute_url(href, parent_url), depth + 1)
+
+    def expand(self, parent_url, hrefs):
+        """
+        Accoda i sotto-link trovati in parent_url (relativi o assoluti) a profondità +1
+        e segna parent_url come completato.
+
+        Returns:
+            int: Il numero di nuovi URL accodati.
+        """
+        depth = self.in_progress.pop(parent_url, None)
+        if depth is None or depth >= self.max_depth:
+            return 0
+        added = 0
+        for href in hrefs or []:
+            if self.add(utils.make_absolute_url(href, parent_url), depth + 1):
+                added += 1
+        return added
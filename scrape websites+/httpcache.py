@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from frontier import canonicalize_url
+
+class HttpCache:
+    """
+    Cache HTTP su disco per i crawl ripetuti, indicizzata per URL canonico.
+
+    Per ogni pagina conserva il corpo della risposta e i validatori (ETag, Last-Modified),
+    così la richiesta successiva può essere condizionale (If-None-Match / If-Modified-Since)
+    e una risposta 304 viene servita dalla cache. Conserva anche l'ultimo risultato
+    dell'estrazione insieme all'hash del contenuto: se il contenuto non è cambiato
+    l'estrazione non viene rifatta.
+
+    I corpi sono file in sottocartelle (es. http_cache/ab/cd/<hash>.body), l'indice è un
+    database SQLite; superato max_bytes vengono eliminate le voci usate meno di recente.
+    """
+    def __init__(self, folder='http_cache', max_bytes=1024 ** 3):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(folder, 'index.db'), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS entries (
+            url_key TEXT PRIMARY KEY,
+            url TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            encoding TEXT,
+            content_hash TEXT,
+            size INTEGER,
+            last_access REAL,
+            features TEXT,
+            extraction TEXT
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()
+
+    def _body_path(self, url_key):
+        return os.path.join(self.folder, url_key[:2], url_key[2:4], url_key + '.body')
+
+    def conditional_headers(self, url):
+        """Restituisce gli header If-None-Match / If-Modified-Since per l'URL, se in cache."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified FROM entries WHERE url_key = ?", (self._key(url),)
+            ).fetchone()
+        headers = {}
+        if row:
+            etag, last_modified = row
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def load(self, url):
+        """
+        Restituisce (corpo, encoding) della versione in cache, o None se non disponibile.
+        Aggiorna l'istante di ultimo accesso usato per l'evizione LRU.
+        """
+        url_key = self._key(url)
+        with self.lock:
+            row = self.conn.execute("SELECT encoding FROM entries WHERE url_key = ?", (url_key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE entries SET last_access = ? WHERE url_key = ?", (time.time(), url_key))
+            self.conn.commit()
+        try:
+            with open(self._body_path(url_key), 'rb') as f:
+                return f.read(), row[0]
+        except OSError:
+            return None
+
+    def store(self, url, body, etag=None, last_modified=None, encoding=None):
+        """
+        Salva il corpo di una risposta 200 con i suoi validatori.
+
+        Returns:
+            bool: True se il contenuto è cambiato rispetto alla versione in cache.
+        """
+        url_key = self._key(url)
+        content_hash = hashlib.sha256(body).hexdigest()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT content_hash, size FROM entries WHERE url_key = ?", (url_key,)
+            ).fetchone()
+            changed = row is None or row[0] != content_hash
+
+            path = self._body_path(url_key)
+            if changed:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(body)
+
+            old_size = row[1] if row else 0
+            self.conn.execute("""
+                INSERT INTO entries (url_key, url, etag, last_modified, encoding, content_hash, size, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url_key) DO UPDATE SET
+                    etag = excluded.etag, last_modified = excluded.last_modified,
+                    encoding = excluded.encoding, content_hash = excluded.content_hash,
+                    size = excluded.size, last_access = excluded.last_access,
+                    features = CASE WHEN entries.content_hash = excluded.content_hash THEN entries.features END,
+                    extraction = CASE WHEN entries.content_hash = excluded.content_hash THEN entries.extraction END
+            """, (url_key, url, etag, last_modified, encoding, content_hash, len(body), time.time()))
+            self.conn.commit()
+            self.total_bytes += len(body) - old_size
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+        return changed
+
+    def load_extraction(self, url, features):
+        """
+        Restituisce (page_data, sub_links) salvati per il contenuto attuale, se l'estrazione
+        era stata fatta con le stesse feature; altrimenti None.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT features, extraction FROM entries WHERE url_key = ?", (self._key(url),)
+            ).fetchone()
+        if not row or row[1] is None or row[0] != json.dumps(sorted(features)):
+            return None
+        record = json.loads(row[1])
+        return record['page_data'], record['sub_links']
+
+    def save_extraction(self, url, features, page_data, sub_links=None):
+        """Associa il risultato dell'estrazione al contenuto attualmente in cache."""
+        record = json.dumps({'page_data': page_data, 'sub_links': sub_links}, ensure_ascii=False)
+        with self.lock:
+            self.conn.execute(
+                "UPDATE entries SET features = ?, extraction = ? WHERE url_key = ?",
+                (json.dumps(sorted(features)), record, self._key(url)),
+            )
+            self.conn.commit()
+
+    def _evict(self):
+        """Elimina le voci usate meno di recente fino a scendere al 90% di max_bytes."""
+        target = self.max_bytes * 0.9
+        rows = self.conn.execute("SELECT url_key, size FROM entries ORDER BY last_access").fetchall()
+        evicted = []
+        for url_key, size in rows:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(self._body_path(url_key))
+            except OSError:
+                pass
+            self.total_bytes -= size
+            evicted.append((url_key,))
+        self.conn.executemany("DELETE FROM entries WHERE url_key = ?", evicted)
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
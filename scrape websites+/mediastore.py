@@ -0,0 +1,152 @@
+import os
+import time
+import uuid
+import hashlib
+import mimetypes
+import sqlite3
+import threading
+from urllib.parse import urlparse
+from frontier import canonicalize_url
+
+class MediaStore:
+    """
+    Archivio di file indirizzato per contenuto: ogni file viene salvato una sola volta
+    con il nome pari al suo hash SHA-256 (es. downloaded_images/blobs/ab/cd/<sha256>.png),
+    indipendentemente da quanti URL lo servono.
+
+    Un indice SQLite associa ogni URL canonico al digest del suo contenuto, così un URL
+    già scaricato viene saltato prima di qualunque richiesta di rete, e file diversi con
+    lo stesso nome (es. logo.png) non si sovrascrivono più.
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        self.blobs_folder = os.path.join(folder, 'blobs')
+        self.tmp_folder = os.path.join(folder, 'tmp')
+        os.makedirs(self.blobs_folder, exist_ok=True)
+        os.makedirs(self.tmp_folder, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(folder, 'index.db'), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS blobs (
+            digest TEXT PRIMARY KEY,
+            path TEXT,
+            size INTEGER,
+            created REAL
+        );
+        CREATE TABLE IF NOT EXISTS urls (
+            url_key TEXT PRIMARY KEY,
+            url TEXT,
+            digest TEXT REFERENCES blobs(digest),
+            downloaded REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_urls_digest ON urls(digest);
+        """)
+        self.conn.commit()
+
+    def lookup(self, url):
+        """Restituisce il percorso del file già scaricato per l'URL, o None."""
+        with self.lock:
+            row = self.conn.execute("""
+                SELECT b.path FROM urls u JOIN blobs b ON b.digest = u.digest
+                WHERE u.url_key = ?
+            """, (canonicalize_url(url),)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def new_temp_path(self):
+        """Percorso temporaneo in cui scrivere un download in corso."""
+        return os.path.join(self.tmp_folder, uuid.uuid4().hex + '.part')
+
+    def partial_path(self, url):
+        """
+        Percorso temporaneo stabile per l'URL: a differenza di new_temp_path() resta lo
+        stesso tra un'esecuzione e l'altra, così un download interrotto può essere ripreso.
+        """
+        url_key = hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.tmp_folder, url_key + '.part')
+
+    @staticmethod
+    def guess_extension(url, content_type=None):
+        """Estensione del file ricavata dall'URL o, in mancanza, dal Content-Type."""
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        if ext and len(ext) <= 6 and ext[1:].isalnum():
+            return ext
+        if content_type:
+            guessed = mimetypes.guess_extension(content_type.split(';')[0].strip())
+            if guessed:
+                return guessed
+        return ''
+
+    def commit(self, url, temp_path, digest, ext=''):
+        """
+        Registra un download completato: se il contenuto esiste già il file temporaneo
+        viene eliminato, altrimenti viene spostato nella sua posizione definitiva.
+
+        Returns:
+            str: Il percorso del file nell'archivio.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT path FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if row and os.path.exists(row[0]):
+                os.remove(temp_path)
+                path = row[0]
+            else:
+                path = os.path.join(self.blobs_folder, digest[:2], digest[2:4], digest + ext)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO blobs (digest, path, size, created) VALUES (?, ?, ?, ?)",
+                    (digest, path, os.path.getsize(path), time.time()),
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO urls (url_key, url, digest, downloaded) VALUES (?, ?, ?, ?)",
+                (canonicalize_url(url), url, digest, time.time()),
+            )
+            self.conn.commit()
+        return path
+
+    def discard(self, temp_path):
+        """Elimina il file temporaneo di un download fallito."""
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+class HashingWriter:
+    """File in scrittura che calcola lo SHA-256 del contenuto mentre viene scritto."""
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk):
+        self.hasher.update(chunk)
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(folder):
+    """Restituisce l'archivio associato alla cartella, creandolo alla prima richiesta."""
+    with _stores_lock:
+        store = _stores.get(folder)
+        if store is None:
+            store = MediaStore(folder)
+            _stores[folder] = store
+        return store
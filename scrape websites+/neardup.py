@@ -0,0 +1,163 @@
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+from frontier import canonicalize_url
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3  # Parole per shingle: "a b c", "b c d", ...
+MIN_WORDS = 50  # Le pagine con meno parole (menu, errori, pagine vuote) non vengono confrontate
+MAX_DISTANCE = 3  # Bit diversi tra due SimHash perché le pagine siano considerate quasi uguali
+# Chiave dei risultati che collega un quasi duplicato alla sua pagina canonica
+DUPLICATE_FEATURE = 'duplicato_di'
+
+WORD_PATTERN = re.compile(r'\w+')
+
+def _shingle_hash(shingle):
+    """Hash stabile a 64 bit (hash() di Python cambia a ogni esecuzione)."""
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def simhash(text, shingle_size=SHINGLE_SIZE, min_words=MIN_WORDS):
+    """
+    Firma SimHash a 64 bit del testo, calcolata sugli shingle di parole.
+
+    Testi quasi uguali (mirror, copie ripubblicate, varianti di paginazione) hanno firme
+    che differiscono in pochi bit; testi diversi in circa metà dei bit.
+
+    Returns:
+        int: La firma, o None se il testo ha meno di min_words parole.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < min_words:
+        return None
+    hashes = {
+        _shingle_hash(' '.join(words[i:i + shingle_size]))
+        for i in range(len(words) - shingle_size + 1)
+    }
+    # Per ogni bit si contano gli shingle che lo hanno a 1: le colonne delle stringhe
+    # binarie vengono contate con str.count, senza un ciclo Python per ogni bit
+    threshold = len(hashes) / 2
+    columns = zip(*(format(value, '064b') for value in hashes))
+    signature = 0
+    for column in columns:
+        signature = (signature << 1) | (''.join(column).count('1') > threshold)
+    return signature
+
+def hamming_distance(a, b):
+    """Numero di bit diversi tra due firme."""
+    return (a ^ b).bit_count()
+
+def _to_signed(value):
+    """Le colonne INTEGER di SQLite sono a 64 bit con segno."""
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+class NearDuplicateIndex:
+    """
+    Indice LSH persistente delle firme SimHash delle pagine già elaborate.
+
+    La firma a 64 bit è divisa in max_distance + 1 bande: se due firme differiscono al più
+    in max_distance bit, almeno una banda è identica (principio dei cassetti). Per una
+    nuova pagina si leggono quindi solo le pagine con una banda in comune, tramite
+    l'indice della tabella, e si verifica la distanza di Hamming esatta.
+
+    Nell'indice sono registrate solo le pagine canoniche: una pagina quasi uguale a una
+    già vista viene collegata a quella e non aggiunta. Le tabelle possono stare nello
+    stesso database SQLite dei risultati (es. database.DB_FILE), anche con più processi.
+    """
+    def __init__(self, db_file='scraper_database.db', max_distance=MAX_DISTANCE, min_words=MIN_WORDS):
+        self.max_distance = max_distance
+        self.min_words = min_words
+        self.bands = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.bands
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS page_signatures (
+            url_key TEXT PRIMARY KEY,
+            url TEXT,
+            simhash INTEGER,
+            timestamp REAL
+        );
+        CREATE TABLE IF NOT EXISTS page_signature_bands (
+            band INTEGER,
+            value INTEGER,
+            url_key TEXT,
+            PRIMARY KEY (band, value, url_key)
+        ) WITHOUT ROWID;
+        """)
+
+    def _band_values(self, signature):
+        """
+        Valore di ciascuna banda della firma (gli ultimi bit in avanzo vanno nell'ultima banda).
+        Con max_distance=0 l'unica banda è l'intera firma a 64 bit: i valori vengono salvati
+        con segno, come la firma, per stare in una colonna INTEGER di SQLite.
+        """
+        mask = (1 << self.band_bits) - 1
+        values = [(signature >> (band * self.band_bits)) & mask for band in range(self.bands - 1)]
+        values.append(signature >> ((self.bands - 1) * self.band_bits))
+        return [_to_signed(value) for value in values]
+
+    def check(self, url, text):
+        """
+        Cerca una pagina canonica quasi uguale al testo; se non c'è, registra l'URL come canonico.
+
+        La ricerca e la registrazione avvengono nella stessa transazione, così due pagine
+        uguali elaborate in parallelo non diventano entrambe canoniche.
+
+        Returns:
+            tuple: (URL canonico, distanza in bit) se la pagina è un quasi duplicato, altrimenti None.
+        """
+        signature = simhash(text, min_words=self.min_words)
+        if signature is None:
+            return None
+        url_key = canonicalize_url(url)
+        bands = list(enumerate(self._band_values(signature)))
+        with self.lock:
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                candidates = self.conn.execute(f"""
+                    SELECT DISTINCT s.url_key, s.url, s.simhash
+                    FROM page_signature_bands b JOIN page_signatures s ON s.url_key = b.url_key
+                    WHERE b.url_key != ? AND ({' OR '.join('(b.band = ? AND b.value = ?)' for _ in bands)})
+                """, [url_key] + [item for band in bands for item in band]).fetchall()
+
+                best = None
+                for _, candidate_url, candidate_signature in candidates:
+                    distance = hamming_distance(signature, candidate_signature % (1 << SIMHASH_BITS))
+                    if distance <= self.max_distance and (best is None or distance < best[1]):
+                        best = (candidate_url, distance)
+
+                if best is None:
+                    # Pagina canonica (nuova, o già registrata con un contenuto diverso)
+                    self.conn.execute("DELETE FROM page_signature_bands WHERE url_key = ?", (url_key,))
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO page_signatures (url_key, url, simhash, timestamp) VALUES (?, ?, ?, ?)",
+                        (url_key, url, _to_signed(signature), time.time()),
+                    )
+                    self.conn.executemany(
+                        "INSERT INTO page_signature_bands (band, value, url_key) VALUES (?, ?, ?)",
+                        [(band, value, url_key) for band, value in bands],
+                    )
+                self.conn.execute("COMMIT")
+                return best
+            except Exception as e:
+                # Qualunque errore annulla la transazione: altrimenti resterebbe aperta e
+                # tutti i controlli successivi su questa connessione fallirebbero
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+                print(f"Errore durante il controllo dei quasi duplicati per {url}: {e}")
+                return None
+
+    def check_page(self, url, page):
+        """
+        Come check(), sul contenuto principale della PageView (o su tutto il testo se non
+        riconosciuto): menu e footer comuni alle pagine dello stesso sito non contano.
+        """
+        return self.check(url, page.main_text() or page.text)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
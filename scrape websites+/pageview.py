@@ -0,0 +1,228 @@
+import re
+import contacts
+
+# Tag il cui contenuto testuale non è visibile nella pagina
+HIDDEN_TEXT_TAGS = {'script', 'style', 'noscript', 'template'}
+
+# Contenitori di testo valutati dalla modalità "contenuto principale"
+BLOCK_TAGS = {'body', 'main', 'article', 'section', 'div', 'td', 'li', 'blockquote', 'pre', 'table', 'ul', 'ol', 'dl'}
+# Contenitori di navigazione e di servizio: il loro testo non fa mai parte del contenuto principale
+BOILERPLATE_TAGS = {'nav', 'header', 'footer', 'aside', 'form', 'menu', 'dialog', 'button', 'select'}
+# Indizi nelle classi e negli id dei contenitori (come in Readability)
+POSITIVE_HINTS = re.compile(r'article|content|post|entry|main|story|text|question|answer', re.I)
+NEGATIVE_HINTS = re.compile(r'cookie|consent|banner|navbar|menu|footer|header|sidebar|comment|share|social|'
+                            r'breadcrumb|promo|advert|popup|modal|related|subscribe|newsletter|widget', re.I)
+# Un blocco con più della metà del testo dentro link è considerato navigazione
+MAX_LINK_DENSITY = 0.5
+# Ogni virgola fuori dai link vale come questo numero di caratteri: la prosa ne è piena, menu e banner no
+COMMA_SCORE = 20
+# Liste di URL raccolte durante la visita, in ordine di scoperta
+URL_LISTS = ('anchors', 'images', 'video_sources', 'iframes')
+
+class PageView:
+    """
+    Vista di una pagina costruita con un'unica visita dell'albero DOM.
+    Raccoglie testo visibile, link e nodi multimediali, così gli estrattori
+    non devono ripercorrere l'intero documento ciascuno per conto proprio.
+
+    La vista non dipende dal parser: ogni backend in parsers.py la popola
+    chiamando add_text(), add_element() e end_element() durante la propria visita
+    del documento.
+
+    Durante la visita viene registrato anche il contenitore (div, article, td, ...)
+    di ogni frammento di testo, con la quantità di testo e di testo nei link:
+    main_text() usa queste misure per separare il contenuto principale da menu,
+    footer e banner senza una seconda analisi del documento.
+    """
+    def __init__(self):
+        self.text_nodes = []  # Frammenti di testo visibile, già ripuliti dagli spazi
+        self.anchors = []  # Valori href dei tag <a>
+        self.images = []  # Coppie (src, data-src) dei tag <img>
+        self.video_sources = []  # src dei tag <video> e dei loro <source>
+        self.iframes = []  # src dei tag <iframe>
+        self.text_chars = 0  # Caratteri di testo raccolti finora (usato dal parsing incrementale)
+        self._text = None
+        self._contacts = None
+        # Blocchi di testo: [blocco genitore, peso, caratteri, caratteri nei link, virgole fuori dai link]
+        self.blocks = [[None, 1.0, 0, 0, 0]]
+        self.text_blocks = []  # Blocco di appartenenza di ogni frammento di text_nodes
+        self._block_stack = [0]
+        self._link_depth = 0
+
+    def add_text(self, content):
+        """Aggiunge un nodo di testo visibile."""
+        content = content.strip()
+        if content:
+            self.text_nodes.append(content)
+            self.text_chars += len(content)
+            block_index = self._block_stack[-1]
+            self.text_blocks.append(block_index)
+            block = self.blocks[block_index]
+            block[2] += len(content)
+            if self._link_depth:
+                block[3] += len(content)
+            else:
+                block[4] += content.count(',')
+            self._text = None
+            self._contacts = None
+
+    def _open_block(self, name, attrs):
+        parent = self._block_stack[-1]
+        weight = 0.0 if name in BOILERPLATE_TAGS else self.blocks[parent][1]
+        if weight:
+            hints = attrs.get('class') or ''
+            if not isinstance(hints, str):  # BeautifulSoup restituisce le classi come lista
+                hints = ' '.join(hints)
+            hints = f"{hints} {attrs.get('id') or ''}"
+            if NEGATIVE_HINTS.search(hints):
+                weight *= 0.2
+            elif POSITIVE_HINTS.search(hints) or name in ('article', 'main'):
+                weight *= 1.5
+        self.blocks.append([parent, weight, 0, 0, 0])
+        self._block_stack.append(len(self.blocks) - 1)
+
+    def add_element(self, name, attrs, inside_video=False):
+        """
+        Registra un elemento del documento.
+
+        Args:
+            name (str): Nome del tag in minuscolo.
+            attrs (dict): Attributi dell'elemento.
+            inside_video (bool): True se l'elemento è discendente di un <video>
+                                 (richiesto solo per i tag <source>).
+        """
+        if name in BLOCK_TAGS or name in BOILERPLATE_TAGS:
+            self._open_block(name, attrs)
+        elif name == 'a':
+            self._link_depth += 1
+            href = attrs.get('href')
+            if href is not None:
+                self.anchors.append(href)
+        elif name == 'img':
+            self.images.append((attrs.get('src'), attrs.get('data-src')))
+        elif name == 'video':
+            src = attrs.get('src')
+            if src:
+                self.video_sources.append(src)
+        elif name == 'source':
+            src = attrs.get('src')
+            if src and inside_video:
+                self.video_sources.append(src)
+        elif name == 'iframe':
+            src = attrs.get('src')
+            if src:
+                self.iframes.append(src)
+
+    def end_element(self, name):
+        """Segnala la chiusura di un elemento aperto con add_element()."""
+        if name in BLOCK_TAGS or name in BOILERPLATE_TAGS:
+            if len(self._block_stack) > 1:
+                self._block_stack.pop()
+        elif name == 'a' and self._link_depth:
+            self._link_depth -= 1
+
+    def url_marks(self):
+        """Posizione attuale nelle liste di URL, da passare in seguito a urls_since()."""
+        return {name: len(getattr(self, name)) for name in URL_LISTS}
+
+    def urls_since(self, marks):
+        """
+        Vista con i soli URL trovati dopo marks (ottenuti da url_marks()): con il parsing
+        incrementale gli estrattori elaborano solo la parte nuova della pagina.
+        """
+        view = PageView()
+        for name in URL_LISTS:
+            setattr(view, name, getattr(self, name)[marks[name]:])
+        return view
+
+    @property
+    def text(self):
+        """Testo visibile della pagina, con i frammenti separati da uno spazio."""
+        if self._text is None:
+            self._text = ' '.join(self.text_nodes)
+        return self._text
+
+    @property
+    def contacts(self):
+        """
+        Coppia (emails, phones) estratta dal testo visibile con un'unica scansione,
+        condivisa da EmailExtractor e PhoneNumberExtractor.
+        """
+        if self._contacts is None:
+            self._contacts = contacts.extract_contacts(self.text)
+        return self._contacts
+
+    def _main_blocks(self):
+        """
+        Sceglie i blocchi del contenuto principale, con un punteggio simile a Readability:
+        ogni blocco vale i caratteri fuori dai link più COMMA_SCORE per ogni virgola (per il
+        peso dato da tag, classi e id), nulla se è soprattutto link; il punteggio viene sommato anche al genitore e, per
+        metà, al nonno. Il contenitore migliore e i fratelli con almeno un quinto del suo
+        punteggio formano il contenuto principale.
+
+        Returns:
+            set: Indici dei blocchi da mantenere, o None se la pagina non ha un contenuto riconoscibile.
+        """
+        totals = [0.0] * len(self.blocks)
+        for index, (parent, weight, chars, link_chars, commas) in enumerate(self.blocks):
+            if not chars or link_chars > chars * MAX_LINK_DENSITY:
+                continue
+            score = (chars - link_chars + commas * COMMA_SCORE) * weight
+            totals[index] += score
+            if parent is not None:
+                totals[parent] += score
+                grandparent = self.blocks[parent][0]
+                if grandparent is not None:
+                    totals[grandparent] += score / 2
+
+        best = max(range(len(totals)), key=totals.__getitem__)
+        if totals[best] <= 0:
+            return None
+        parent = self.blocks[best][0]
+        roots = {best} | {
+            index for index, block in enumerate(self.blocks)
+            if parent is not None and block[0] == parent and totals[index] >= totals[best] * 0.2
+        }
+
+        keep = set()
+        for index, (block_parent, weight, chars, link_chars, _) in enumerate(self.blocks):
+            if weight < 0.5 or link_chars > chars * MAX_LINK_DENSITY:
+                continue # Blocchi di servizio o di navigazione, anche dentro il contenuto
+            ancestor = index
+            while ancestor is not None and ancestor not in roots:
+                ancestor = self.blocks[ancestor][0]
+            if ancestor is not None:
+                keep.add(index)
+        return keep
+
+    def main_text(self, max_bytes=None):
+        """
+        Testo del solo contenuto principale (senza menu, footer, banner dei cookie, ...).
+        Restituisce una stringa vuota se non viene riconosciuto un contenuto principale.
+        """
+        keep = self._main_blocks()
+        if not keep:
+            return ''
+        nodes = [node for node, block in zip(self.text_nodes, self.text_blocks) if block in keep]
+        return build_text(nodes, max_bytes)
+
+def build_text(nodes, max_bytes=None):
+    """
+    Unisce i frammenti con uno spazio in un'unica join, fermandosi a max_bytes
+    (in UTF-8) se indicato. Il taglio non spezza mai un carattere multibyte.
+    """
+    if max_bytes is None:
+        return ' '.join(nodes)
+    parts = []
+    size = 0
+    for node in nodes:
+        encoded = node.encode('utf-8')
+        room = max_bytes - size - (1 if parts else 0)
+        if room <= 0:
+            break
+        if len(encoded) > room:
+            parts.append(encoded[:room].decode('utf-8', errors='ignore'))
+            break
+        parts.append(node)
+        size += len(encoded) + (1 if len(parts) > 1 else 0)
+    return ' '.join(parts)
@@ -0,0 +1,302 @@
+import codecs
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup, NavigableString, CData, Tag
+import utils
+from pageview import PageView, HIDDEN_TEXT_TAGS
+
+try:
+    from lxml import etree as lxml_etree, html as lxml_html
+except ImportError:  # lxml è opzionale
+    lxml_etree = lxml_html = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax è opzionale
+    LexborHTMLParser = None
+
+class SoupParser:
+    """Backend basato su BeautifulSoup con il parser 'html.parser' (sempre disponibile)."""
+    name = 'html.parser'
+
+    def parse(self, html):
+        """Analizza l'HTML (str o bytes) e restituisce una PageView."""
+        soup = BeautifulSoup(html, 'html.parser')
+        page = PageView()
+
+        # Visita iterativa con eventi di chiusura, come negli altri backend
+        hidden_depth = 0
+        video_depth = 0
+        stack = [(child, False) for child in reversed(soup.contents)]
+        while stack:
+            node, closing = stack.pop()
+            if not isinstance(node, Tag):
+                if type(node) in (NavigableString, CData) and not hidden_depth:
+                    page.add_text(node)
+                continue
+
+            name = node.name
+            if closing:
+                if name in HIDDEN_TEXT_TAGS:
+                    hidden_depth -= 1
+                elif name == 'video':
+                    video_depth -= 1
+                page.end_element(name)
+                continue
+
+            page.add_element(name, node.attrs, video_depth > 0)
+            if name in HIDDEN_TEXT_TAGS:
+                hidden_depth += 1
+            elif name == 'video':
+                video_depth += 1
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.contents))
+        return page
+
+class LxmlParser:
+    """Backend basato su lxml.html (parser libxml2 in C)."""
+    name = 'lxml'
+
+    def parse(self, html):
+        """Analizza l'HTML (str o bytes) e restituisce una PageView."""
+        page = PageView()
+        html = utils.decode_html(html)
+        if not html.strip():
+            return page  # lxml non accetta documenti vuoti
+        root = lxml_html.document_fromstring(html)
+
+        # Visita iterativa: la coda (tail) di un elemento va letta dopo i suoi figli
+        hidden_depth = 0
+        video_depth = 0
+        stack = [(root, False)]
+        while stack:
+            element, closing = stack.pop()
+            tag = element.tag
+            if not isinstance(tag, str):
+                # Commenti e processing instruction: conta solo il testo che li segue
+                if element.tail and not hidden_depth:
+                    page.add_text(element.tail)
+                continue
+
+            name = tag.lower()
+            if closing:
+                if name in HIDDEN_TEXT_TAGS:
+                    hidden_depth -= 1
+                elif name == 'video':
+                    video_depth -= 1
+                page.end_element(name)
+                if element.tail and not hidden_depth:
+                    page.add_text(element.tail)
+                continue
+
+            page.add_element(name, element.attrib, video_depth > 0)
+            if name in HIDDEN_TEXT_TAGS:
+                hidden_depth += 1
+            elif name == 'video':
+                video_depth += 1
+            if element.text and not hidden_depth:
+                page.add_text(element.text)
+
+            stack.append((element, True))
+            stack.extend((child, False) for child in reversed(element))
+        return page
+
+class SelectolaxParser:
+    """Backend basato su selectolax con il motore lexbor."""
+    name = 'selectolax'
+
+    def parse(self, html):
+        """Analizza l'HTML (str o bytes) e restituisce una PageView."""
+        page = PageView()
+        tree = LexborHTMLParser(utils.decode_html(html))
+        if tree.root is None:
+            return page
+
+        # traverse() non segnala la chiusura degli elementi: si ricava confrontando il
+        # genitore di ogni nodo con la pila degli elementi aperti
+        hidden_depth = 0
+        video_depth = 0
+        open_ids = []
+        open_tags = []
+        for node in tree.root.traverse(include_text=True):
+            parent = node.parent
+            parent_id = parent.mem_id if parent is not None else None
+            while open_ids and open_ids[-1] != parent_id:
+                open_ids.pop()
+                closed = open_tags.pop()
+                if closed in HIDDEN_TEXT_TAGS:
+                    hidden_depth -= 1
+                elif closed == 'video':
+                    video_depth -= 1
+                page.end_element(closed)
+
+            tag = node.tag
+            if tag == '-text':
+                if not hidden_depth:
+                    page.add_text(node.text_content)
+                continue
+            if tag.startswith('-'):  # Esclude commenti e doctype
+                continue
+
+            page.add_element(tag, node.attributes, video_depth > 0)
+            if tag in HIDDEN_TEXT_TAGS:
+                hidden_depth += 1
+            elif tag == 'video':
+                video_depth += 1
+            open_ids.append(node.mem_id)
+            open_tags.append(tag)
+
+        while open_tags:
+            page.end_element(open_tags.pop())
+        return page
+
+class _PageTarget:
+    """
+    Riceve gli eventi di un parser push (apertura, chiusura, testo) e popola la PageView,
+    con le stesse regole dei backend a albero. Il testo arriva a pezzi (anche spezzato tra
+    due blocchi della risposta): viene unito fino all'evento successivo.
+    """
+    def __init__(self, page):
+        self.page = page
+        self.hidden_depth = 0
+        self.video_depth = 0
+        self.pending_text = []
+
+    def flush_text(self):
+        if self.pending_text:
+            if not self.hidden_depth:
+                self.page.add_text(''.join(self.pending_text))
+            self.pending_text = []
+
+    def start(self, tag, attrib):
+        self.flush_text()
+        name = tag.lower()
+        self.page.add_element(name, attrib, self.video_depth > 0)
+        if name in HIDDEN_TEXT_TAGS:
+            self.hidden_depth += 1
+        elif name == 'video':
+            self.video_depth += 1
+
+    def end(self, tag):
+        self.flush_text()
+        name = tag.lower()
+        if name in HIDDEN_TEXT_TAGS:
+            self.hidden_depth = max(0, self.hidden_depth - 1)
+        elif name == 'video':
+            self.video_depth = max(0, self.video_depth - 1)
+        self.page.end_element(name)
+
+    def data(self, content):
+        self.pending_text.append(content)
+
+    def comment(self, content):
+        self.flush_text()  # Come nei backend ad albero, un commento separa due nodi di testo
+
+    def close(self):
+        self.flush_text()
+
+class _StdlibPushParser(HTMLParser):
+    """Parser push di ripiego (html.parser della libreria standard) per _PageTarget."""
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {name: value or '' for name, value in attrs})
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+    def handle_comment(self, data):
+        self.target.comment(data)
+
+class StreamingParser:
+    """
+    Parsing incrementale: riceve il corpo a blocchi mentre viene scaricato e popola la
+    PageView man mano, senza costruire l'albero del documento. Usa il parser push di
+    lxml (interfaccia target) se installato, altrimenti html.parser.
+
+    Dopo ogni blocco chiama on_progress(page) con la pagina parziale (es. per accodare
+    subito i file trovati) e, se stop_when(page) è vero, interrompe la lettura: le
+    feature richieste sono già soddisfatte e il resto del corpo non serve.
+    """
+    def __init__(self, on_progress=None, stop_when=None):
+        self.page = PageView()
+        self.on_progress = on_progress
+        self.stop_when = stop_when
+        self.started = False  # True dopo il primo blocco ricevuto
+        self.stopped = False  # True se la lettura è stata interrotta prima della fine del corpo
+        self._encoding = None
+        self._decoder = None
+        self._target = _PageTarget(self.page)
+        if lxml_etree is not None:
+            self._parser = lxml_etree.HTMLParser(target=self._target)
+        else:
+            self._parser = _StdlibPushParser(self._target)
+
+    def begin(self, encoding=None):
+        """Indica la codifica dichiarata dal server (None: viene cercata nel primo blocco)."""
+        self._encoding = encoding
+
+    def feed(self, chunk):
+        """
+        Analizza un blocco del corpo (bytes).
+
+        Returns:
+            bool: False se la lettura può fermarsi.
+        """
+        if self._decoder is None:
+            encoding = self._encoding or utils.sniff_encoding(chunk)
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            self.started = True
+        text = self._decoder.decode(chunk)
+        if text:
+            self._parser.feed(text)
+        if self.on_progress is not None:
+            self.on_progress(self.page)
+        if self.stop_when is not None and self.stop_when(self.page):
+            self.stopped = True
+            return False
+        return True
+
+    def close(self):
+        """Completa il parsing (anche di un documento interrotto) e restituisce la PageView."""
+        if self._decoder is not None:
+            text = self._decoder.decode(b'', final=True)
+            if text:
+                self._parser.feed(text)
+            try:
+                self._parser.close()
+            except Exception:  # lxml segnala i documenti vuoti o interrotti: la pagina parziale resta valida
+                self._target.close()
+        return self.page
+
+# Backend in ordine di preferenza per la selezione automatica
+BACKENDS = {
+    'selectolax': (SelectolaxParser, LexborHTMLParser is not None),
+    'lxml': (LxmlParser, lxml_html is not None),
+    'html.parser': (SoupParser, True),
+}
+
+def available_backends():
+    """Restituisce i nomi dei backend installati, dal più veloce al più lento."""
+    return [name for name, (_, available) in BACKENDS.items() if available]
+
+def get_parser(name='auto'):
+    """
+    Restituisce un'istanza del backend richiesto.
+    Con 'auto' viene scelto il backend più veloce installato; se il backend
+    richiesto non è installato si ripiega su 'html.parser'.
+    """
+    if name == 'auto':
+        name = available_backends()[0]
+    if name not in BACKENDS:
+        raise ValueError(f"Parser HTML sconosciuto: {name}. Valori ammessi: auto, {', '.join(BACKENDS)}")
+
+    parser_class, available = BACKENDS[name]
+    if not available:
+        print(f"Avviso: il parser '{name}' non è installato, uso 'html.parser'.")
+        parser_class = SoupParser
+    return parser_class()
@@ -0,0 +1,199 @@
+import asyncio
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+class TokenBucket:
+    """
+    Token bucket per limitare la frequenza delle richieste verso un singolo host.
+    I token mancanti vengono "prenotati": ogni chiamante riceve il tempo da attendere,
+    quindi più richieste concorrenti verso lo stesso host vengono distanziate correttamente.
+    Le prenotazioni sono protette da un lock: il bucket può essere condiviso tra thread.
+    """
+    def __init__(self, rate, capacity=1):
+        self.rate = rate  # Token generati al secondo (<= 0 significa nessun limite)
+        self.capacity = capacity  # Numero massimo di richieste consecutive (burst)
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        """Aggiorna la frequenza (es. dopo aver letto il Crawl-delay di robots.txt)."""
+        with self.lock:
+            self._refill()
+            self.rate = rate
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount=1):
+        """Prenota 'amount' token e restituisce i secondi da attendere prima di usarli."""
+        with self.lock:
+            if self.rate <= 0:
+                return 0.0
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire_sync(self, amount=1):
+        """Attende (bloccando) finché non è disponibile un token."""
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire(self, amount=1):
+        """Attende (senza bloccare l'event loop) finché non è disponibile un token."""
+        wait = self.reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class HostState:
+    """Stato di cortesia associato a un singolo host: rate limit, concorrenza e robots.txt."""
+    def __init__(self, rate, burst, max_per_host):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_per_host = max_per_host
+        self.semaphore = None  # Creato pigramente dentro l'event loop
+        self.thread_semaphore = threading.BoundedSemaphore(max_per_host)  # Modalità sincrona
+        self.robots = None  # RobotFileParser, o None se robots.txt non è disponibile
+        self.robots_loaded = None  # Future/flag che indica il caricamento di robots.txt
+        self.robots_lock = threading.Lock()  # Un solo thread scarica robots.txt
+
+class CrawlScheduler:
+    """
+    Scheduler di crawling con un limite globale di richieste in volo e regole
+    di cortesia per host (token bucket, richieste concorrenti massime, Crawl-delay).
+    Host diversi procedono in parallelo: il throughput cresce con il numero di host
+    invece di essere limitato da una pausa fissa dopo ogni pagina. In modalità
+    sincrona le richieste vengono eseguite da un pool di max_workers thread, in
+    quella asincrona da coroutine nello stesso event loop.
+    """
+    def __init__(self, max_workers=20, max_per_host=2, requests_per_second=1.0, burst=1,
+                 respect_robots=True, user_agent='*'):
+        self.max_workers = max_workers  # Richieste massime in volo su tutti gli host
+        self.max_per_host = max_per_host  # Richieste massime in volo per singolo host
+        self.requests_per_second = requests_per_second  # Frequenza massima per host
+        self.burst = burst  # Richieste consecutive ammesse prima di applicare il rate limit
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.hosts = {}
+        self.lock = threading.Lock()  # Protegge self.hosts nei thread della modalità sincrona
+
+    def _get_host_state(self, link):
+        host = urlparse(link).netloc.lower()
+        with self.lock:
+            state = self.hosts.get(host)
+            if state is None:
+                state = HostState(self.requests_per_second, self.burst, self.max_per_host)
+                self.hosts[host] = state
+        return state
+
+    def _robots_url(self, link):
+        parsed = urlparse(link)
+        return f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+
+    def _apply_robots(self, state, robots_text):
+        """Analizza robots.txt e adegua il rate limit dell'host al suo Crawl-delay."""
+        if robots_text is None:
+            return
+        parser = RobotFileParser()
+        parser.parse(robots_text.splitlines())
+        state.robots = parser
+
+        delay = parser.crawl_delay(self.user_agent)
+        if delay:
+            delay_rate = 1.0 / float(delay)
+            if self.requests_per_second <= 0 or delay_rate < self.requests_per_second:
+                state.bucket.set_rate(delay_rate)
+
+    def _is_allowed(self, state, link):
+        if state.robots is None:
+            return True
+        return state.robots.can_fetch(self.user_agent, link)
+
+    def _load_robots_sync(self, state, link, session):
+        try:
+            response = session.get(self._robots_url(link), timeout=10)
+            robots_text = response.text if response.status_code == 200 else None
+        except Exception as e:
+            print(f"Impossibile leggere robots.txt per {link}: {e}")
+            robots_text = None
+        self._apply_robots(state, robots_text)
+        state.robots_loaded = True
+
+    async def _load_robots_async(self, state, link, session):
+        try:
+            async with session.get(self._robots_url(link)) as response:
+                robots_text = await response.text() if response.status == 200 else None
+        except Exception as e:
+            print(f"Impossibile leggere robots.txt per {link}: {e}")
+            robots_text = None
+        self._apply_robots(state, robots_text)
+
+    def run_sync(self, links, handler, session=None):
+        """
+        Esegue handler(link) per ogni link in un pool di max_workers thread, con al più
+        max_per_host richieste contemporanee per host, attendendo solo quando lo stesso
+        host viene richiesto prima di quanto consentito dal suo rate limit.
+
+        handler viene chiamato da più thread contemporaneamente.
+
+        Returns:
+            list: I risultati di handler nello stesso ordine dei link.
+        """
+        def process(link):
+            state = self._get_host_state(link)
+            if self.respect_robots and session is not None:
+                with state.robots_lock:
+                    if state.robots_loaded is None:
+                        self._load_robots_sync(state, link, session)
+            if not self._is_allowed(state, link):
+                print(f"Link escluso da robots.txt: {link}")
+                return {'error': 'Bloccato da robots.txt'}
+
+            with state.thread_semaphore:
+                state.bucket.acquire_sync()
+                return handler(link)
+
+        if not links:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(links)),
+                                thread_name_prefix='crawl') as executor:
+            return list(executor.map(process, links))
+
+    async def run_async(self, links, handler, session=None):
+        """
+        Esegue la coroutine handler(link) per ogni link rispettando il limite globale
+        di richieste in volo e i limiti di ciascun host.
+
+        Returns:
+            list: I risultati di handler nello stesso ordine dei link.
+        """
+        global_slots = asyncio.Semaphore(self.max_workers)
+
+        async def process(link):
+            state = self._get_host_state(link)
+            if state.semaphore is None:
+                state.semaphore = asyncio.Semaphore(state.max_per_host)
+            if self.respect_robots and session is not None:
+                if state.robots_loaded is None:
+                    state.robots_loaded = asyncio.ensure_future(self._load_robots_async(state, link, session))
+                await state.robots_loaded
+            if not self._is_allowed(state, link):
+                print(f"Link escluso da robots.txt: {link}")
+                return {'error': 'Bloccato da robots.txt'}
+
+            # Il posto globale viene occupato solo quando l'host è pronto,
+            # così un host lento non blocca le richieste verso gli altri.
+            async with state.semaphore:
+                await state.bucket.acquire()
+                async with global_slots:
+                    return await handler(link)
+
+        return await asyncio.gather(*(process(link) for link in links))
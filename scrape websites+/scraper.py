@@ -1,135 +1,566 @@
-import asyncio
-import aiohttp
-import requests
-from bs4 import BeautifulSoup
-import time
-import extractors
-import utils
-
-class Scraper:
-    def __init__(self, links, features):
-        self.links = links
-        self.features = features
-        self.results = {}  # Per salvare i risultati
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
-        }
-
-    def run_sync(self):
-        """
-        Esegue lo scraping in modalità sincrona.
-        """
-        for link in self.links:
-            self.results[link] = self.scrape_page(link)
-
-        utils.save_results(self.results)
-
-    async def run_async(self):
-        """
-        Esegue lo scraping in modalità asincrona.
-        """
-        tasks = [self.scrape_page_async(link) for link in self.links]
-        results_list = await asyncio.gather(*tasks)
-
-        for i, link in enumerate(self.links):
-            self.results[link] = results_list[i]
-
-        utils.save_results(self.results)
-
-    def scrape_page(self, link):
-        """
-        Esegue lo scraping di una singola pagina in modalità sincrona.
-        """
-        page_data = {}
-        try:
-            response = requests.get(link, headers=self.headers)
-            response.raise_for_status()  # Gestione degli errori HTTP
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            for feature in self.features:
-                if feature == 'testo':
-                    extractor = extractors.TextExtractor(soup, link)
-                    page_data['testo'] = extractor.extract_sync()
-                elif feature == 'immagini':
-                    extractor = extractors.ImageExtractor(soup, link)
-                    page_data['immagini'] = extractor.extract_sync()
-                elif feature == 'link':
-                    extractor = extractors.LinkExtractor(soup)
-                    page_data['link'] = extractor.extract_sync()
-                elif feature == 'video':
-                    extractor = extractors.VideoExtractor(soup, link)
-                    page_data['video'] = extractor.extract_sync()
-                elif feature == 'email':
-                    extractor = extractors.EmailExtractor(soup)
-                    page_data['email'] = extractor.extract_sync()
-                elif feature == 'numeri_telefono':
-                    extractor = extractors.PhoneNumberExtractor(soup)
-                    page_data['numeri_telefono'] = extractor.extract_sync()
-                elif feature == 'documenti':
-                    extractor = extractors.DocumentExtractor(soup, link)
-                    page_data['documenti'] = extractor.extract_sync()
-
-                # ... altri casi per altre feature ...
-            time.sleep(1) # Rate limiting
-        except requests.exceptions.RequestException as e:
-            print(f"Errore durante la richiesta a {link}: {e}")
-            page_data['error'] = str(e)
-        except Exception as e:
-            print(f"Errore durante l'estrazione da {link}: {e}")
-            page_data['error'] = str(e)
-        return page_data
-
-    async def scrape_page_async(self, link):
-        """
-        Esegue lo scraping di una singola pagina in modalità asincrona.
-        """
-        page_data = {}
-        try:
-            async with aiohttp.ClientSession(headers=self.headers) as session:
-                async with session.get(link) as response:
-                    response.raise_for_status()
-                    html_content = await response.text()
-
-                soup = BeautifulSoup(html_content, 'html.parser')
-
-                # Esecuzione asincrona degli estrattori per una singola pagina
-                tasks = []
-                for feature in self.features:
-                    if feature == 'testo':
-                        extractor = extractors.TextExtractor(soup, link)
-                        tasks.append(extractor.extract_async())
-                    elif feature == 'immagini':
-                        extractor = extractors.ImageExtractor(soup, link)
-                        tasks.append(extractor.extract_async())
-                    elif feature == 'link':
-                        extractor = extractors.LinkExtractor(soup)
-                        tasks.append(extractor.extract_async())
-                    elif feature == 'video':
-                        extractor = extractors.VideoExtractor(soup, link)
-                        tasks.append(extractor.extract_async())
-                    elif feature == 'email':
-                        extractor = extractors.EmailExtractor(soup)
-                        tasks.append(extractor.extract_async())
-                    elif feature == 'numeri_telefono':
-                        extractor = extractors.PhoneNumberExtractor(soup)
-                        tasks.append(extractor.extract_async())
-                    elif feature == 'documenti':
-                        extractor = extractors.DocumentExtractor(soup, link)
-                        tasks.append(extractor.extract_async())
-                    # ... aggiungi altri estrattori ...
-
-                results = await asyncio.gather(*tasks)
-
-                # Assegna i risultati al dizionario page_data
-                for i, feature in enumerate(self.features):
-                    page_data[feature] = results[i]
-
-                await asyncio.sleep(1) # Rate limiting
-        except aiohttp.ClientError as e:
-            print(f"Errore durante la richiesta a {link}: {e}")
-            page_data['error'] = str(e)
-        except Exception as e:
-            print(f"Errore durante l'estrazione da {link}: {e}")
-            page_data['error'] = str(e)
-        return page_data
\ No newline at end of file
+import asyncio
+import aiohttp
+from concurrent.futures import ProcessPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+import downloadqueue
+import extractors
+import fetcher
+import frontier
+import httpcache
+import neardup
+import parsers
+import scheduler
+import sink
+import utils
+import videoservice
+import workers
+
+# Feature i cui file vengono scaricati dallo stadio della coda dei download
+MEDIA_FEATURES = ('immagini', 'video', 'documenti')
+
+# Feature che il parsing incrementale può considerare complete prima della fine della
+# pagina, con il numero di valori già presenti nella PageView parziale
+EARLY_STOP_COUNTS = {
+    'link': lambda page: len(page.anchors),
+    'immagini': lambda page: len(page.images),
+}
+
+class Scraper:
+    def __init__(self, links, features, max_connections=100, max_connections_per_host=10,
+                 dns_cache_ttl=300, keepalive_timeout=30, max_workers=20,
+                 max_requests_per_host=2, requests_per_second_per_host=1.0, respect_robots=True,
+                 max_depth=0, same_domain=True, allowed_domains=None, parser='auto',
+                 process_workers=0, process_batch_size=16, output_path='results.jsonl', compression=None,
+                 flush_every=50, keep_results=False, cache_folder=None, cache_max_bytes=1024 ** 3,
+                 download_queue_path='download_queue.db', download_workers=4, download_bandwidth=None,
+                 download_priorities=None, wait_for_downloads=True, video_workers=2,
+                 video_max_height=720, video_max_filesize=500 * 1024 * 1024, video_max_duration=None,
+                 text_mode='full', max_text_bytes=None, near_duplicates_path=None,
+                 near_duplicate_distance=neardup.MAX_DISTANCE, max_page_bytes=fetcher.DEFAULT_MAX_PAGE_BYTES,
+                 download_non_html=True, incremental_parsing=False, early_stop_limits=None,
+                 seen_capacity=None):
+        self.links = links
+        self.features = features
+        # Opzioni degli estrattori: text_mode 'main' tiene solo il contenuto principale della pagina,
+        # max_text_bytes limita la dimensione del testo salvato (None = nessun limite)
+        self.extractor_options = {'text_mode': text_mode, 'max_text_bytes': max_text_bytes}
+        # Chiave dell'estrazione in cache: cambia se cambiano le feature o le opzioni del testo
+        self.extraction_key = list(features)
+        if 'testo' in features:
+            self.extraction_key.append(f"testo:{text_mode}:{max_text_bytes}")
+        self.results = {}  # Risultati in memoria, popolato solo se keep_results è True
+        self.keep_results = keep_results
+        # I risultati di ogni pagina vengono scritti subito in streaming (JSONL, opzionalmente gzip/zstd)
+        self.writer = sink.JsonlWriter(output_path, compression=compression, batch_size=flush_every)
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+        }
+        # Parametri del pool di connessioni condiviso da pagine e downloader
+        self.max_connections = max_connections  # Limite totale di connessioni aperte
+        self.max_connections_per_host = max_connections_per_host  # Limite di connessioni keep-alive per host
+        self.dns_cache_ttl = dns_cache_ttl  # Secondi di validità della cache DNS
+        self.keepalive_timeout = keepalive_timeout  # Secondi prima di chiudere una connessione inattiva
+        self.session = None  # Sessione HTTP della run corrente (requests o aiohttp)
+        self.max_page_bytes = max_page_bytes  # Byte letti al massimo dal corpo di una pagina (None = nessun limite)
+        self.download_non_html = download_non_html  # Le risposte non HTML (PDF, immagini, ...) vanno nella coda dei download
+        self.parser = parsers.get_parser(parser)  # Backend HTML: 'auto', 'selectolax', 'lxml' o 'html.parser'
+        # In modalità asincrona, se > 0, parsing ed estrazione avvengono in un pool di processi
+        self.process_workers = process_workers
+        self.process_batch_size = process_batch_size  # Pagine inviate insieme a un processo worker
+        self.process_pool = None
+        self.process_batcher = None
+        # In modalità asincrona (senza pool di processi) la pagina viene analizzata mentre arriva:
+        # file e sotto-link vengono accodati subito e la lettura si ferma quando le feature
+        # sono soddisfatte (es. early_stop_limits={'link': 200, 'immagini': 50})
+        self.incremental_parsing = incremental_parsing
+        self.early_stop_limits = early_stop_limits or {}
+        # Cache HTTP su disco con richieste condizionali (disattivata se cache_folder è None)
+        self.http_cache = httpcache.HttpCache(cache_folder, cache_max_bytes) if cache_folder else None
+        # Indice LSH dei quasi duplicati (disattivato se near_duplicates_path è None): mirror e copie
+        # di pagine già elaborate vengono collegati alla pagina canonica invece di essere estratti
+        self.near_duplicates_path = near_duplicates_path
+        self.near_duplicate_distance = near_duplicate_distance
+        self.near_duplicates = None
+        if near_duplicates_path:
+            self.near_duplicates = neardup.NearDuplicateIndex(near_duplicates_path, near_duplicate_distance)
+        # Scheduler con pool globale e regole di cortesia per host (sostituisce le pause fisse)
+        self.scheduler = scheduler.CrawlScheduler(
+            max_workers=max_workers,
+            max_per_host=max_requests_per_host,
+            requests_per_second=requests_per_second_per_host,
+            respect_robots=respect_robots,
+            user_agent=self.headers['User-Agent'],
+        )
+        # Crawling ricorsivo dei sotto-link (max_depth=0 visita solo i link forniti)
+        self.max_depth = max_depth
+        self.same_domain = same_domain  # Segue solo i link dello stesso dominio dei link iniziali
+        self.allowed_domains = allowed_domains  # Se indicata, ha precedenza su same_domain
+        self.seen_capacity = seen_capacity  # URL previsti nel BloomFilter della frontiera (None = stimati da seed e max_depth)
+        self.batch_size = max_workers * 4  # URL estratti dalla frontiera a ogni giro
+        self.frontier = None
+        self.discovered_links = {}  # Sotto-link trovati nelle pagine ancora da espandere
+        # Stadio dei download: gli estrattori accodano gli URL, un pool separato li scarica
+        self.download_queue_path = download_queue_path
+        self.download_workers = download_workers  # Download contemporanei
+        self.download_bandwidth = download_bandwidth  # Limite di banda in byte/s (None = nessun limite)
+        self.download_priorities = download_priorities  # Es. {'documenti': 20, 'immagini': 10, 'video': 0}
+        self.wait_for_downloads = wait_for_downloads  # A fine crawl attende lo svuotamento della coda
+        # Servizio yt-dlp con pool fisso e politiche di formato/dimensione per i video
+        self.video_workers = video_workers
+        self.video_max_height = video_max_height
+        self.video_max_filesize = video_max_filesize  # Byte (None = nessun limite)
+        self.video_max_duration = video_max_duration  # Secondi (None = nessun limite)
+        self.download_queue = None
+        self.download_pool = None
+
+    def _create_sync_session(self):
+        """
+        Crea una requests.Session con un pool di connessioni riutilizzabili.
+        """
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=self.max_connections,
+                              pool_maxsize=self.max_connections_per_host)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _create_async_session(self):
+        """
+        Crea una aiohttp.ClientSession con connettore keep-alive e cache DNS.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return aiohttp.ClientSession(headers=self.headers, connector=connector)
+
+    def _create_frontier(self):
+        """
+        Crea la frontiera di crawling a partire dai link forniti.
+        """
+        url_frontier = frontier.URLFrontier(
+            max_depth=self.max_depth,
+            same_domain=self.same_domain,
+            allowed_domains=self.allowed_domains,
+            seen_capacity=self.seen_capacity,
+        )
+        url_frontier.add_seeds(self.links)
+        return url_frontier
+
+    def _start_downloads(self):
+        """
+        Apre la coda persistente dei download e avvia i worker, se sono richieste feature
+        multimediali o se le risposte non HTML vanno scaricate.
+        """
+        if not self.download_non_html and not any(feature in MEDIA_FEATURES for feature in self.features):
+            return
+        self.download_queue = downloadqueue.DownloadQueue(self.download_queue_path, self.download_priorities)
+        video_service = None
+        if 'video' in self.features:
+            video_service = videoservice.VideoDownloadService(
+                extractors.VideoExtractor.download_folder,
+                workers=self.video_workers,
+                max_height=self.video_max_height,
+                max_filesize=self.video_max_filesize,
+                max_duration=self.video_max_duration,
+            )
+        self.download_pool = downloadqueue.DownloadWorkers(
+            self.download_queue,
+            concurrency=self.download_workers,
+            bandwidth=self.download_bandwidth,
+            headers=self.headers,
+            video_service=video_service,
+        ).start()
+
+    def _stop_downloads(self):
+        """
+        Ferma i worker dei download (attendendo la coda se wait_for_downloads è True) e chiude la coda.
+        """
+        if self.download_pool is None:
+            return
+        if self.wait_for_downloads:
+            print("Crawl completato, attendo il termine dei download in coda...")
+        self.download_pool.stop(drain=self.wait_for_downloads)
+        print(f"Stato dei download: {self.download_queue.counts()}")
+        self.download_queue.close()
+        self.download_pool = None
+        self.download_queue = None
+
+    def close(self):
+        """
+        Chiude le connessioni SQLite della cache HTTP e dell'indice dei quasi duplicati,
+        aperte alla creazione dello Scraper. Va chiamato quando lo Scraper non serve più
+        (o si usa lo Scraper come context manager, con with o async with).
+        """
+        if self.http_cache is not None:
+            self.http_cache.close()
+        if self.near_duplicates is not None:
+            self.near_duplicates.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _collect_batch(self, batch, results_list):
+        """
+        Salva i risultati di un gruppo di pagine e accoda i loro sotto-link nella frontiera.
+        """
+        for link, page_data in zip(batch, results_list):
+            self.writer.write(link, page_data)
+            if self.keep_results:
+                self.results[link] = page_data
+            self.frontier.expand(link, self.discovered_links.pop(link, None))
+
+    def _record_sub_links(self, page, link, page_data):
+        """
+        Memorizza i sotto-link della pagina se la frontiera deve ancora espanderla.
+        """
+        if self.frontier is None or not self.frontier.should_expand(link):
+            return
+        if 'link' in page_data:
+            self.discovered_links[link] = page_data['link']
+        else:
+            self.discovered_links[link] = extractors.LinkExtractor(page).extract_sync()
+
+    def _near_duplicate(self, link, page):
+        """
+        Se la pagina è un quasi duplicato di una pagina già elaborata, restituisce i dati che
+        la collegano alla pagina canonica (l'estrazione viene saltata), altrimenti None.
+        """
+        if self.near_duplicates is None:
+            return None
+        match = self.near_duplicates.check_page(link, page)
+        if match is None:
+            return None
+        canonical_url, distance = match
+        print(f"{link} è un quasi duplicato di {canonical_url} (distanza {distance}), estrazione saltata")
+        return {neardup.DUPLICATE_FEATURE: canonical_url}
+
+    def _features_satisfied(self, link, page):
+        """
+        Indica se la PageView parziale basta già per tutte le feature richieste: il testo ha
+        raggiunto max_text_bytes (in modalità 'full'), link e immagini il numero indicato in
+        early_stop_limits. Le altre feature richiedono sempre la pagina intera.
+        """
+        features = list(self.features)
+        if self.frontier is not None and self.frontier.should_expand(link):
+            features.append('link')  # Alla frontiera servono i sotto-link
+        for feature in features:
+            if feature == 'testo':
+                max_bytes = self.extractor_options['max_text_bytes']
+                # I caratteri sono al più i byte UTF-8: raggiunti i caratteri, il limite è superato
+                if self.extractor_options['text_mode'] != 'full' or not max_bytes or page.text_chars < max_bytes:
+                    return False
+            elif feature not in EARLY_STOP_COUNTS or feature not in self.early_stop_limits:
+                return False
+            elif EARLY_STOP_COUNTS[feature](page) < self.early_stop_limits[feature]:
+                return False
+        return True
+
+    def _create_stream(self, link):
+        """
+        Crea il parser incrementale di una pagina. Dopo ogni blocco ricevuto, i file trovati
+        vengono accodati nei download e i sotto-link nella frontiera, senza attendere la fine
+        della pagina; gli estrattori vengono comunque eseguiti sulla pagina completa.
+        """
+        stream = parsers.StreamingParser()
+        media_features = []
+        if self.download_queue is not None:
+            media_features = [feature for feature in self.features if feature in MEDIA_FEATURES]
+        # Con l'indice dei quasi duplicati i sotto-link attendono il controllo sulla pagina completa
+        expand_early = self.near_duplicates is None
+        emitted = set()
+        marks = stream.page.url_marks()
+
+        def on_progress(page):
+            nonlocal marks
+            new_part = page.urls_since(marks)  # Solo gli URL trovati nell'ultimo blocco
+            marks = page.url_marks()
+            if expand_early and self.frontier.should_expand(link):
+                for href in new_part.anchors:
+                    self.frontier.add_child(link, href)
+            for extractor in extractors.create_extractors(media_features, new_part, link):
+                new_urls = [url for url in extractor.extract_sync() if url not in emitted]
+                if new_urls:
+                    emitted.update(new_urls)
+                    extractor.enqueue_downloads(self.download_queue, new_urls)
+
+        stream.on_progress = on_progress
+        if self.early_stop_limits or self.extractor_options['max_text_bytes']:
+            stream.stop_when = lambda page: self._features_satisfied(link, page)
+        return stream
+
+    def _cache_headers(self, link):
+        """
+        Restituisce gli header della richiesta condizionale se la pagina è in cache.
+        """
+        return self.http_cache.conditional_headers(link) if self.http_cache is not None else {}
+
+    def _store_in_cache(self, link, body, headers, encoding):
+        """
+        Salva la risposta nella cache HTTP e indica se il contenuto è cambiato.
+        """
+        if self.http_cache is None:
+            return True
+        return self.http_cache.store(link, body, headers.get('ETag'), headers.get('Last-Modified'), encoding)
+
+    def _cached_page(self, link, changed):
+        """
+        Se il contenuto non è cambiato, restituisce i dati estratti nella visita precedente
+        (evitando di rifare l'estrazione), altrimenti None.
+        """
+        if self.http_cache is None or changed:
+            return None
+        cached = self.http_cache.load_extraction(link, self.extraction_key)
+        if cached is None:
+            return None
+        page_data, sub_links = cached
+        if self.frontier is not None and self.frontier.should_expand(link):
+            if sub_links is None:
+                return None
+            self.discovered_links[link] = sub_links
+        print(f"Contenuto invariato, uso l'estrazione in cache per {link}")
+        return page_data
+
+    def _save_extraction(self, link, page_data):
+        """
+        Memorizza nella cache il risultato dell'estrazione della pagina.
+        """
+        if self.http_cache is not None and 'error' not in page_data:
+            self.http_cache.save_extraction(link, self.extraction_key, page_data, self.discovered_links.get(link))
+
+    @staticmethod
+    def _decode_body(body, encoding):
+        """
+        Decodifica il corpo con la codifica dichiarata dal server; se assente la codifica
+        viene cercata solo nei primi byte (BOM e <meta charset>), non nell'intero documento.
+        """
+        return body.decode(encoding, errors='replace') if encoding else utils.decode_html(body)
+
+    def _route_non_html(self, link, content_type):
+        """
+        Affida allo stadio dei download una risposta che non è una pagina HTML
+        (il corpo non è stato letto) e restituisce i dati da salvare per il link.
+        """
+        content_type = content_type or 'sconosciuto'
+        if self.download_queue is None:
+            print(f"{link} non è una pagina HTML ({content_type}): ignorato")
+            return {'error': f"Contenuto non HTML: {content_type}"}
+        if content_type.startswith('image/'):
+            self.download_queue.enqueue([link], extractors.ImageExtractor.download_kind,
+                                        extractors.ImageExtractor.download_folder)
+        elif content_type.startswith('video/'):
+            # Un file video servito direttamente: downloader a segmenti Range, attivo anche senza la feature 'video'
+            self.download_queue.enqueue([link], extractors.VIDEO_FILE_KIND, extractors.VIDEO_FILE_FOLDER)
+        else:
+            self.download_queue.enqueue([link], extractors.DocumentExtractor.download_kind,
+                                        extractors.DocumentExtractor.download_folder)
+        print(f"{link} non è una pagina HTML ({content_type}): accodato nei download")
+        return {'contenuto_non_html': content_type}
+
+    def _fetch_sync(self, link):
+        """
+        Scarica una pagina, con richiesta condizionale se è già in cache. Un corpo troncato
+        a max_page_bytes non viene salvato nella cache: non è la risposta completa a cui
+        si riferiscono ETag e Last-Modified.
+
+        Returns:
+            tuple: (corpo in bytes, encoding dichiarato o None, True se il contenuto è cambiato)
+        """
+        for conditional in (True, False):
+            headers = self._cache_headers(link) if conditional else {}
+            # In streaming: il corpo viene letto solo dopo il controllo degli header, fino a max_page_bytes
+            with self.session.get(link, headers=headers, stream=True) as response:
+                if response.status_code == 304 and conditional:
+                    cached = self.http_cache.load(link) if self.http_cache is not None else None
+                    if cached is not None:
+                        return cached[0], cached[1], False
+                    continue # Copia in cache non disponibile: nuova richiesta non condizionale
+                response.raise_for_status()  # Gestione degli errori HTTP
+                content_type = response.headers.get('Content-Type', '').lower()
+                encoding = response.encoding if 'charset=' in content_type else None
+                body, truncated = fetcher.read_body_sync(response, self.max_page_bytes)
+                if truncated:
+                    return body, encoding, True
+                return body, encoding, self._store_in_cache(link, body, response.headers, encoding)
+
+    async def _fetch_async(self, link, stream=None):
+        """
+        Versione asincrona di _fetch_sync. Se indicato, stream (parsers.StreamingParser)
+        analizza il corpo mentre arriva; se interrompe la lettura, o se il corpo è troncato
+        a max_page_bytes, il corpo è incompleto e non viene salvato nella cache.
+        """
+        for conditional in (True, False):
+            headers = self._cache_headers(link) if conditional else {}
+            async with self.session.get(link, headers=headers) as response:
+                if response.status == 304 and conditional:
+                    cached = self.http_cache.load(link) if self.http_cache is not None else None
+                    if cached is not None:
+                        return cached[0], cached[1], False
+                    continue # Copia in cache non disponibile: nuova richiesta non condizionale
+                response.raise_for_status()
+                encoding = response.charset
+                if stream is not None:
+                    stream.begin(encoding)
+                body, truncated = await fetcher.read_body_async(response, self.max_page_bytes, stream)
+                if truncated or (stream is not None and stream.stopped):
+                    return body, encoding, True
+                return body, encoding, self._store_in_cache(link, body, response.headers, encoding)
+
+    def run_sync(self):
+        """
+        Esegue lo scraping in modalità sincrona.
+        """
+        self.session = self._create_sync_session()
+        self.frontier = self._create_frontier()
+        self.writer.open()
+        self._start_downloads()
+        try:
+            while self.frontier:
+                batch = self.frontier.pop_batch(self.batch_size)
+                results_list = self.scheduler.run_sync(batch, self.scrape_page, self.session)
+                self._collect_batch(batch, results_list)
+        finally:
+            self.writer.close()
+            self.session.close()
+            self.session = None
+            self._stop_downloads()
+
+    async def run_async(self):
+        """
+        Esegue lo scraping in modalità asincrona.
+        """
+        self.session = self._create_async_session()
+        self.frontier = self._create_frontier()
+        self.writer.open()
+        self._start_downloads()
+        if self.process_workers > 0:
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                initializer=workers.init_worker,
+                initargs=(self.parser.name, self.near_duplicates_path, self.near_duplicate_distance),
+            )
+            self.process_batcher = workers.BatchSubmitter(
+                self.process_pool, self.features, self.extractor_options, self.process_batch_size,
+            )
+        try:
+            while self.frontier:
+                batch = self.frontier.pop_batch(self.batch_size)
+                results_list = await self.scheduler.run_async(batch, self.scrape_page_async, self.session)
+                self._collect_batch(batch, results_list)
+        finally:
+            self.writer.close()
+            await self.session.close()
+            self.session = None
+            if self.process_pool is not None:
+                self.process_pool.shutdown()
+                self.process_pool = None
+                self.process_batcher = None
+            # L'attesa dei download avviene nel thread dello stadio, senza bloccare l'event loop
+            await asyncio.get_running_loop().run_in_executor(None, self._stop_downloads)
+
+    def scrape_page(self, link):
+        """
+        Esegue lo scraping di una singola pagina in modalità sincrona.
+        """
+        page_data = {}
+        try:
+            body, encoding, changed = self._fetch_sync(link)
+            cached_data = self._cached_page(link, changed)
+            if cached_data is not None:
+                return cached_data
+
+            page = self.parser.parse(self._decode_body(body, encoding))  # Un'unica visita del DOM condivisa dagli estrattori
+
+            duplicate_data = self._near_duplicate(link, page)
+            if duplicate_data is not None:
+                self._save_extraction(link, duplicate_data)
+                return duplicate_data
+
+            for extractor in extractors.create_extractors(self.features, page, link, self.download_queue, self.extractor_options):
+                page_data[extractor.feature] = extractor.extract_sync()
+
+            self._record_sub_links(page, link, page_data)
+            self._save_extraction(link, page_data)
+        except fetcher.NonHtmlResponse as e:
+            return self._route_non_html(link, e.content_type)
+        except requests.exceptions.RequestException as e:
+            print(f"Errore durante la richiesta a {link}: {e}")
+            page_data['error'] = str(e)
+        except Exception as e:
+            print(f"Errore durante l'estrazione da {link}: {e}")
+            page_data['error'] = str(e)
+        return page_data
+
+    async def scrape_page_async(self, link):
+        """
+        Esegue lo scraping di una singola pagina in modalità asincrona.
+        """
+        page_data = {}
+        try:
+            stream = None
+            if self.incremental_parsing and self.process_pool is None:
+                stream = self._create_stream(link)
+            body, encoding, changed = await self._fetch_async(link, stream)
+            cached_data = self._cached_page(link, changed)
+            if cached_data is not None:
+                return cached_data
+
+            if self.process_pool is not None:
+                return await self._extract_in_process(body, link, encoding)
+
+            if stream is not None and stream.started:
+                page = stream.close()  # Pagina già analizzata durante il download
+            else:
+                page = self.parser.parse(self._decode_body(body, encoding))  # Un'unica visita del DOM condivisa dagli estrattori
+
+            duplicate_data = self._near_duplicate(link, page)
+            if duplicate_data is not None:
+                self._save_extraction(link, duplicate_data)
+                return duplicate_data
+
+            # Gli estrattori lavorano sulla PageView in memoria: nessun thread, solo punti
+            # di cessione all'event loop tra un metodo e l'altro
+            for extractor in extractors.create_extractors(self.features, page, link, self.download_queue, self.extractor_options):
+                page_data[extractor.feature] = await extractor.extract_async()
+
+            self._record_sub_links(page, link, page_data)
+            self._save_extraction(link, page_data)
+        except fetcher.NonHtmlResponse as e:
+            return self._route_non_html(link, e.content_type)
+        except aiohttp.ClientError as e:
+            print(f"Errore durante la richiesta a {link}: {e}")
+            page_data['error'] = str(e)
+        except Exception as e:
+            print(f"Errore durante l'estrazione da {link}: {e}")
+            page_data['error'] = str(e)
+        return page_data
+
+    async def _extract_in_process(self, html_bytes, link, encoding):
+        """
+        Invia l'HTML grezzo al pool di processi per parsing ed estrazione (a gruppi di
+        pagine), poi accoda nella coda dei download i file trovati dal worker.
+        """
+        include_sub_links = self.frontier is not None and self.frontier.should_expand(link)
+        page_data, sub_links = await self.process_batcher.submit(html_bytes, link, include_sub_links, encoding)
+        if sub_links is not None:
+            self.discovered_links[link] = sub_links
+
+        for feature, values in page_data.items():
+            extractor_class = extractors.EXTRACTORS.get(feature)  # None per il collegamento ai duplicati
+            if values and extractor_class is not None and extractor_class.download_kind:
+                extractor_class.enqueue_downloads(self.download_queue, values)
+        self._save_extraction(link, page_data)
+        return page_data
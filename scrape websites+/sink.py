@@ -0,0 +1,113 @@
+import io
+import gzip
+import json
+
+try:
+    import zstandard
+except ImportError:  # zstandard è opzionale, serve solo per la compressione .zst
+    zstandard = None
+
+def _infer_compression(path):
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+class JsonlWriter:
+    """
+    Scrive i risultati in streaming, un record JSON compatto per riga (JSONL),
+    opzionalmente compresso con gzip o zstd.
+
+    I record vengono accumulati in memoria e scritti ogni 'batch_size' pagine:
+    la memoria resta costante qualunque sia la dimensione del crawl e, in caso
+    di crash, si perdono al massimo le pagine dell'ultimo gruppo non ancora scritto.
+    Ogni gruppo viene chiuso come blocco compresso indipendente, quindi il file
+    resta leggibile anche se l'esecuzione si interrompe.
+    """
+    def __init__(self, path='results.jsonl', compression=None, batch_size=50):
+        self.path = path
+        self.compression = compression or _infer_compression(path)  # None, 'gzip' o 'zstd'
+        self.batch_size = batch_size
+        self.buffer = []
+        self.written = 0
+        self._file = None
+        self._compressor = None
+
+        if self.compression not in (None, 'gzip', 'zstd'):
+            raise ValueError(f"Compressione non supportata: {self.compression}")
+        if self.compression == 'zstd' and zstandard is None:
+            raise ImportError("Per la compressione zstd installa il pacchetto 'zstandard'")
+
+    def open(self):
+        """Apre il file in modalità append (i record delle esecuzioni precedenti vengono mantenuti)."""
+        self._file = open(self.path, 'ab')
+        if self.compression == 'zstd':
+            self._compressor = zstandard.ZstdCompressor()
+        return self
+
+    def write(self, link, page_data):
+        """Accoda il record di una pagina e scrive il gruppo quando è pieno."""
+        record = {'url': link, **page_data}
+        self.buffer.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Scrive su disco i record in attesa."""
+        if not self.buffer or self._file is None:
+            return
+        data = ('\n'.join(self.buffer) + '\n').encode('utf-8')
+        # Ogni gruppo è un membro gzip / frame zstd completo: i file concatenati restano validi
+        if self.compression == 'gzip':
+            data = gzip.compress(data)
+        elif self.compression == 'zstd':
+            data = self._compressor.compress(data)
+        self._file.write(data)
+        self._file.flush()
+        self.written += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        """Scrive i record rimanenti e chiude il file."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def read_records(path, compression=None):
+    """
+    Legge in streaming i record di un file JSONL scritto da JsonlWriter.
+    Un'eventuale ultima riga incompleta (es. dopo un crash) viene ignorata.
+    """
+    compression = compression or _infer_compression(path)
+    if compression == 'gzip':
+        f = gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    elif compression == 'zstd':
+        if zstandard is None:
+            raise ImportError("Per leggere file zstd installa il pacchetto 'zstandard'")
+        raw = open(path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        f = io.TextIOWrapper(reader, encoding='utf-8', errors='replace')
+    else:
+        f = open(path, 'r', encoding='utf-8', errors='replace')
+
+    with f:
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Riga non valida ignorata in {path}")
+        except (EOFError, zstandard.ZstdError if zstandard else EOFError) as e:
+            print(f"File {path} troncato, lettura interrotta: {e}")
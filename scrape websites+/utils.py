@@ -1,19 +1,70 @@
-import os
-import json
-from urllib.parse import urljoin
-
-def save_results(results):
-    """
-    Salva i risultati in un file JSON.
-    """
-    with open('results.json', 'a') as f:
-        json.dump(results, f, indent=4)
-
-def make_absolute_url(url, base_url):
-    """Converte un URL relativo in un URL assoluto."""
-    if url.startswith('http'):
-        return url
-    else:
-        return urljoin(base_url, url)
-
+import os
+import re
+import json
+import codecs
+from urllib.parse import urljoin
+
+def save_results(results):
+    """
+    Salva i risultati in un file JSON.
+    """
+    with open('results.json', 'a') as f:
+        json.dump(results, f, indent=4)
+
+def make_absolute_url(url, base_url):
+    """Converte un URL relativo in un URL assoluto."""
+    if url.startswith('http'):
+        return url
+    else:
+        return urljoin(base_url, url)
+
+CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+
+def sniff_encoding(prefix, default_encoding='utf-8', sniff_bytes=4096):
+    """
+    Cerca la codifica nel BOM e poi nel tag <meta charset> dei primi 'sniff_bytes' byte;
+    se non trovata (o non valida) restituisce default_encoding. Basta l'inizio del
+    documento: può essere usata anche sul primo blocco di una risposta in streaming.
+    """
+    for bom, encoding in ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')):
+        if prefix.startswith(bom):
+            return encoding
+
+    match = CHARSET_PATTERN.search(prefix[:sniff_bytes])
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode('ascii')).name
+        except LookupError:
+            pass
+    return default_encoding
+
+def decode_html(content, default_encoding='utf-8', sniff_bytes=4096):
+    """
+    Decodifica il contenuto HTML in stringa con la codifica trovata da sniff_encoding(),
+    sostituendo i byte non decodificabili.
+    """
+    if isinstance(content, str):
+        return content
+    return content.decode(sniff_encoding(content, default_encoding, sniff_bytes), errors='replace')
+
+def load_results(path='results.json'):
+    """
+    Legge un file di risultati scritto da save_results, che può contenere più
+    documenti JSON concatenati (uno per esecuzione), e li unisce in un unico dizionario.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    decoder = json.JSONDecoder()
+    results = {}
+    pos = 0
+    while pos < len(content):
+        while pos < len(content) and content[pos].isspace():
+            pos += 1
+        if pos >= len(content):
+            break
+        document, pos = decoder.raw_decode(content, pos)
+        results.update(document)
+    return results
+
 # Aggiungi altre funzioni di utilità...
\ No newline at end of file
@@ -0,0 +1,191 @@
+import os
+import time
+import shutil
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import yt_dlp
+from frontier import canonicalize_url
+
+class VideoDownloadService:
+    """
+    Servizio di download dei video con yt-dlp, con un pool di dimensione fissa.
+
+    Ogni thread del pool crea una sola istanza di YoutubeDL e la riusa per tutti i
+    video che scarica, invece di crearne una nuova per ogni URL. Un indice SQLite
+    registra i video già scaricati per (estrattore, ID): lo stesso video raggiunto da
+    URL diversi (pagina, embed, link abbreviato) viene scaricato una volta sola, e gli
+    URL già visti vengono saltati senza interrogare il sito.
+
+    Politiche di formato e dimensione:
+        max_height: altezza massima del formato scelto (es. 720).
+        max_filesize: dimensione massima in byte; i video più grandi vengono saltati.
+        max_duration: durata massima in secondi; i video più lunghi vengono saltati.
+    """
+    def __init__(self, folder='downloaded_videos', workers=2, max_height=720,
+                 max_filesize=500 * 1024 * 1024, max_duration=None):
+        self.folder = folder
+        self.workers = workers
+        self.max_height = max_height
+        self.max_filesize = max_filesize
+        self.max_duration = max_duration
+        os.makedirs(folder, exist_ok=True)
+
+        self.lock = threading.Lock()
+        # Indice proprio (videos.db, tabella video_urls): la cartella può contenere anche un MediaStore (index.db)
+        self.conn = sqlite3.connect(os.path.join(folder, 'videos.db'), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS videos (
+            extractor_key TEXT,
+            video_id TEXT,
+            path TEXT,
+            downloaded REAL,
+            PRIMARY KEY (extractor_key, video_id)
+        );
+        CREATE TABLE IF NOT EXISTS video_urls (
+            url_key TEXT PRIMARY KEY,
+            extractor_key TEXT,
+            video_id TEXT
+        );
+        """)
+        self.conn.commit()
+
+        self._local = threading.local()
+        self._instances = []  # Istanze YoutubeDL create dai thread, chiuse in close()
+        self._in_flight = {}  # URL canonico -> Future, per non scaricare due volte lo stesso URL
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='yt-dlp')
+
+    def _ydl_options(self):
+        # Senza ffmpeg non è possibile unire video e audio separati: si sceglie un formato unico
+        if shutil.which('ffmpeg'):
+            video_format = f'bv*[height<={self.max_height}]+ba/b[height<={self.max_height}]/b'
+        else:
+            video_format = f'b[height<={self.max_height}]/b'
+        options = {
+            'outtmpl': os.path.join(self.folder, '%(extractor_key)s-%(id)s.%(ext)s'),
+            'format': video_format,
+            'noplaylist': True,  # Ignora i video che fanno parte di playlist
+            'quiet': True,
+            'noprogress': True,
+        }
+        if self.max_filesize:
+            options['max_filesize'] = self.max_filesize
+        return options
+
+    def _get_ydl(self):
+        """Istanza YoutubeDL del thread corrente, creata alla prima richiesta."""
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL(self._ydl_options())
+            self._local.ydl = ydl
+            with self.lock:
+                self._instances.append(ydl)
+        return ydl
+
+    def submit(self, url):
+        """
+        Accoda il download di un video senza attenderne la fine.
+
+        Returns:
+            Future: Risolto con il percorso del file, o None se il video è stato saltato o non è scaricabile.
+        """
+        url_key = canonicalize_url(url)
+        with self.lock:
+            future = self._in_flight.get(url_key)
+            if future is not None:
+                return future
+            path = self._known_path(url_key)
+            if path is not None:
+                future = Future()
+                future.set_result(path)
+                return future
+            future = self.executor.submit(self._download, url, url_key)
+            self._in_flight[url_key] = future
+        future.add_done_callback(lambda _: self._forget(url_key))
+        return future
+
+    def _forget(self, url_key):
+        with self.lock:
+            self._in_flight.pop(url_key, None)
+
+    def _known_path(self, url_key):
+        """Percorso del video già scaricato per l'URL, se il file esiste ancora (da chiamare con il lock)."""
+        row = self.conn.execute("""
+            SELECT v.path FROM video_urls u
+            JOIN videos v ON v.extractor_key = u.extractor_key AND v.video_id = u.video_id
+            WHERE u.url_key = ?
+        """, (url_key,)).fetchone()
+        if row and row[0] and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def _check_policy(self, info):
+        """Restituisce il motivo per cui il video va saltato, o None se rispetta le politiche."""
+        duration = info.get('duration')
+        if self.max_duration and duration and duration > self.max_duration:
+            return f"durata {duration:.0f}s oltre il limite di {self.max_duration}s"
+        size = info.get('filesize') or info.get('filesize_approx')
+        if self.max_filesize and size and size > self.max_filesize:
+            return f"dimensione {size} byte oltre il limite di {self.max_filesize}"
+        return None
+
+    def _download(self, url, url_key):
+        ydl = self._get_ydl()
+        try:
+            # Prima solo i metadati: servono l'ID del video e le politiche di formato/dimensione
+            info = ydl.extract_info(url, download=False)
+            if not info:
+                return None
+            video_key = (info.get('extractor_key'), info.get('id'))
+
+            with self.lock:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO video_urls (url_key, extractor_key, video_id) VALUES (?, ?, ?)",
+                    (url_key, *video_key),
+                )
+                self.conn.commit()
+                row = self.conn.execute(
+                    "SELECT path FROM videos WHERE extractor_key = ? AND video_id = ?", video_key
+                ).fetchone()
+            if row and row[0] and os.path.exists(row[0]):
+                print(f"Video {video_key[1]} già scaricato, salto {url}")
+                return row[0]
+
+            reason = self._check_policy(info)
+            if reason:
+                print(f"Video {url} saltato: {reason}")
+                return None
+
+            # Scarica riusando le informazioni già estratte, senza interrogare di nuovo il sito
+            result = ydl.process_ie_result(info, download=True)
+            downloads = result.get('requested_downloads') or [{}]
+            path = downloads[0].get('filepath') or ydl.prepare_filename(result)
+            if not os.path.exists(path):
+                return None  # Es. file oltre max_filesize scartato da yt-dlp durante il download
+
+            with self.lock:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO videos (extractor_key, video_id, path, downloaded) VALUES (?, ?, ?, ?)",
+                    (*video_key, path, time.time()),
+                )
+                self.conn.commit()
+            return path
+        except Exception as e:
+            print(f"Errore durante il download con yt-dlp di {url}: {e}")
+            return None
+
+    def close(self, wait=True):
+        """
+        Chiude il pool e le istanze YoutubeDL.
+
+        Args:
+            wait (bool): Se True attende i video in coda; altrimenti annulla quelli non ancora
+                         iniziati. I video già in download vengono comunque completati.
+        """
+        self.executor.shutdown(wait=True, cancel_futures=not wait)
+        with self.lock:
+            for ydl in self._instances:
+                ydl.close()
+            self._instances = []
+            self.conn.close()
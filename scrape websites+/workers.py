@@ -0,0 +1,127 @@
+import asyncio
+import extractors
+import neardup
+import parsers
+import utils
+
+# Parser e indice dei quasi duplicati del processo worker, creati una sola volta da init_worker
+_parser = None
+_near_duplicates = None
+
+def init_worker(parser_name, near_duplicates_path=None, near_duplicate_distance=neardup.MAX_DISTANCE):
+    """
+    Inizializzatore del ProcessPoolExecutor: prepara il backend HTML nel processo worker
+    e, se richiesto, apre l'indice dei quasi duplicati (condiviso tra i processi tramite SQLite).
+    """
+    global _parser, _near_duplicates
+    _parser = parsers.get_parser(parser_name)
+    if near_duplicates_path:
+        _near_duplicates = neardup.NearDuplicateIndex(near_duplicates_path, near_duplicate_distance)
+
+def extract_page(html, link, features, include_sub_links=False, encoding=None, options=None):
+    """
+    Analizza l'HTML ed esegue gli estrattori richiesti all'interno del processo worker.
+    I file non vengono scaricati qui: per immagini, video e documenti vengono
+    restituiti solo gli URL, che il processo principale inserisce nella coda dei download.
+    Se la pagina è un quasi duplicato di una già elaborata, l'estrazione viene saltata e
+    page_data contiene solo il collegamento alla pagina canonica.
+
+    Args:
+        html (bytes): Corpo della risposta HTTP.
+        link (str): URL della pagina.
+        features (list): Feature da estrarre.
+        include_sub_links (bool): Se True restituisce anche i sotto-link per la frontiera.
+        encoding (str): Codifica dichiarata dal server, se nota.
+        options (dict): Opzioni degli estrattori (es. text_mode, max_text_bytes).
+
+    Returns:
+        tuple: (page_data, sub_links) dove sub_links è None se non richiesto.
+    """
+    # Senza codifica dichiarata, la codifica viene cercata solo nei primi byte
+    html = html.decode(encoding, errors='replace') if encoding else utils.decode_html(html)
+    page = _parser.parse(html)
+
+    if _near_duplicates is not None:
+        match = _near_duplicates.check_page(link, page)
+        if match is not None:
+            # Quasi duplicato: solo il collegamento alla pagina canonica, senza estrazione né sotto-link
+            return {neardup.DUPLICATE_FEATURE: match[0]}, None
+
+    page_data = {}
+    for extractor in extractors.create_extractors(features, page, link, options=options):
+        page_data[extractor.feature] = extractor.extract_sync()
+
+    sub_links = None
+    if include_sub_links:
+        sub_links = page_data['link'] if 'link' in page_data else extractors.LinkExtractor(page).extract_sync()
+    return page_data, sub_links
+
+def extract_pages(pages, features, options=None):
+    """
+    Versione a gruppi di extract_page: un'unica chiamata al processo worker per più pagine,
+    così il costo di serializzazione e di passaggio tra processi è condiviso.
+
+    Args:
+        pages (list): Tuple (html, link, include_sub_links, encoding).
+
+    Returns:
+        list: Per ogni pagina (page_data, sub_links), oppure l'eccezione sollevata.
+    """
+    results = []
+    for html, link, include_sub_links, encoding in pages:
+        try:
+            results.append(extract_page(html, link, features, include_sub_links, encoding, options))
+        except Exception as e:
+            results.append(e)
+    return results
+
+class BatchSubmitter:
+    """
+    Raggruppa le pagine da analizzare e le invia al pool di processi a gruppi.
+
+    Ogni pagina attende al massimo max_delay secondi che il gruppo si riempia: con
+    molte pagine in arrivo i gruppi sono pieni, con poche il ritardo resta trascurabile.
+    """
+    def __init__(self, pool, features, options=None, batch_size=16, max_delay=0.01):
+        self.pool = pool
+        self.features = features
+        self.options = options
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.pending = []  # Coppie (argomenti della pagina, future in attesa)
+        self._timer = None
+
+    async def submit(self, html, link, include_sub_links=False, encoding=None):
+        """Accoda una pagina e restituisce (page_data, sub_links) quando il suo gruppo è stato elaborato."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append(((html, link, include_sub_links, encoding), future))
+        if len(self.pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        loop = asyncio.get_running_loop()
+        done = loop.run_in_executor(self.pool, extract_pages, [args for args, _ in batch], self.features, self.options)
+        done.add_done_callback(lambda result: self._distribute(batch, result))
+
+    @staticmethod
+    def _distribute(batch, result):
+        """Consegna a ogni pagina del gruppo il proprio risultato."""
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue # Pagina annullata nel frattempo
+            if result.exception() is not None:
+                future.set_exception(result.exception())
+            elif isinstance(result.result()[index], Exception):
+                future.set_exception(result.result()[index])
+            else:
+                future.set_result(result.result()[index])